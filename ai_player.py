@@ -13,13 +13,15 @@ class BaseAIPlayer(ABC):
     Abstract base class for AI poker players.
     """
 
-    def __init__(self, name: str, money: int = 1000):
+    def __init__(self, name: str, money: int = 1000, rng: Optional[random.Random] = None):
         """
         Initialize the AI player.
 
         Args:
             name: Player name (displayed in game)
             money: Starting chip stack (default: 1000)
+            rng: Optional random.Random for the bot's choices (default: the
+                global random module); pass a seeded one for reproducible play
         """
         self.name = name
         self.money = money
@@ -29,6 +31,9 @@ class BaseAIPlayer(ABC):
         self.current_bet = 0
         self.is_folded = False
         self.is_active = True  # Player is still in the game
+        self.rng = rng if rng is not None else random
+        self.seat = None  # Seat name at the table, set when asked to act
+        self.opponent_model = None  # Table's OpponentModel, set when asked to act
 
     def _calculate_willing_to_bet(self):
         """Calculate how much AI is willing to bet based on hand strength."""
@@ -47,6 +52,8 @@ class BaseAIPlayer(ABC):
                 - pot: Current pot size
                 - player_bet: Human player's current bet
                 - opponent_bet: AI opponent's current bet
+                - gemini_bet: Gemini bot's current bet (when seated)
+                - folded: Names of the seats that have folded
             player: Player object representing this AI, containing:
                 - hand: Current hand
                 - money: Current chip stack
@@ -75,11 +82,10 @@ class BaseAIPlayer(ABC):
 
         # Get pot and betting info from game_state
         curr_pot = game_state.get("pot", 0)
-        player_bet = game_state.get("player_bet", 0)
-        opponent_bet = game_state.get("opponent_bet", 0)
-        
-        # Calculate amount needed to call
-        amount_to_call = player_bet - opponent_bet
+        highest_bet = max([v for k, v in game_state.items() if k.endswith("_bet")] or [0])
+
+        # Calculate amount needed to call (from whichever seat this bot is in)
+        amount_to_call = highest_bet - player.current_bet
         
         # If amount_to_call is negative, we're ahead in betting
         if amount_to_call < 0:
@@ -88,23 +94,23 @@ class BaseAIPlayer(ABC):
         # If willing to keep playing and call is available
         if amount_to_call > 0 and amount_to_call <= remaining_willing_to_bet:
             choices = ["call", "raise"]
-            decision = random.choice(choices)
+            decision = self.rng.choice(choices)
             
             if decision == "call":
                 return ("call", None)
             else:  # raise
-                raise_amount = random.randint(1, remaining_willing_to_bet)
+                raise_amount = self.rng.randint(1, remaining_willing_to_bet)
                 return ("raise", raise_amount)
         
         # If no call needed (we're matched or ahead)
         elif amount_to_call == 0:
             choices = ["hold", "raise"]
-            decision = random.choice(choices)
+            decision = self.rng.choice(choices)
             
             if decision == "hold":
                 return ("call", None)  # "hold" maps to "call" with no amount
             else:  # raise
-                raise_amount = random.randint(1, remaining_willing_to_bet)
+                raise_amount = self.rng.randint(1, remaining_willing_to_bet)
                 return ("raise", raise_amount)
         
         # Amount to call exceeds what we're willing to bet
@@ -210,6 +216,18 @@ class BaseAIPlayer(ABC):
         expected_loss = (1 - win_probability) * bet_to_call
         return expected_winnings - expected_loss
 
+    def _opponent_stats(self):
+        """
+        Observed statistics of the other seats at this table.
+
+        Returns:
+            dict: {seat: stats} from OpponentModel.stats, empty if the table
+            keeps no opponent model
+        """
+        if self.opponent_model is None:
+            return {}
+        return self.opponent_model.snapshot(exclude=self.seat)
+
     def _get_full_hand_info(self, hand):
         """
         Get complete information about a hand.
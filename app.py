@@ -1,15 +1,153 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 from game_logic import Pot, gen_card
 from player import Player
-from deck import Deck
-from hand_evaluator import HandEvaluator
 from ai_player import BaseAIPlayer
-from llm_logic import GeminiBot
+from llm_logic import GeminiBot, create_gemini_batcher
+from decision_cache import DecisionCache
+from llm_backends import create_backend_from_env
+from llm_resilience import CircuitBreaker, Deadline, DecisionPathStats, RateLimiter
+from game_flow import evaluate_winner, apply_player_action
+from speculation import Speculator
+from decision_store import DecisionStore
+from strategy_bot import StrategyBot
+from mcts_bot import MCTSBot
+from opponent_model import OpponentModel
+from profiling import RequestProfiler
+from hand_replay import HandRecorder, deal_hand, finish_recording, record_action
+from tracing import TRACER, traced
+from table_persistence import TablePersistence
+from table_store import SharedTables, TableConflict, create_table_store_from_env
+from simulation import SimulationBusy, SimulationRunner
+from structured_logging import LogPipeline, bind_log_context, log_context
+from idempotency import (IDEMPOTENCY_HEADER, MAX_KEY_LENGTH, REPLAYED_HEADER, Idempotency,
+                         IdempotencyConflict, IdempotencyInFlight, request_fingerprint)
+from wire_format import (COMPACT_MEDIA_TYPE, ResponseCompressor, add_vary, compact_state, dumps_compact,
+                         wants_compact)
+import atexit
+import logging
 import os
 
 app = Flask(__name__)
 
-# Using GAME_STATE instead of global variables
+# Logging goes through a queue to a writer thread, as JSON lines (LOG_LEVEL,
+# LOG_LEVELS, LOG_SAMPLE, LOG_FORMAT, LOG_FILE; see structured_logging)
+LOGGING = LogPipeline.from_env().install()
+atexit.register(LOGGING.close)
+logger = logging.getLogger("app")
+
+# Opt-in profiling of sampled or admin-flagged requests (PROFILE_MODE, PROFILE_ADMIN_TOKEN)
+PROFILER = RequestProfiler.from_env()
+PROFILER.install(app)
+
+# gzip/brotli for /api/* responses of at least API_COMPRESS_MIN_BYTES, per Accept-Encoding
+COMPRESSOR = None
+if os.environ.get("API_COMPRESSION", "1") != "0":
+    COMPRESSOR = ResponseCompressor(min_size=int(os.environ.get("API_COMPRESS_MIN_BYTES", 512)))
+    COMPRESSOR.install(app)
+
+# One cache for every Gemini bot, so common spots skip the LLM round trip.
+# Set DECISION_CACHE_PATH to keep entries across restarts.
+DECISION_CACHE = DecisionCache(
+    max_entries=int(os.environ.get("DECISION_CACHE_SIZE", 1024)),
+    ttl_seconds=float(os.environ.get("DECISION_CACHE_TTL", 900)),
+    explore_rate=float(os.environ.get("DECISION_CACHE_EXPLORE", 0.05)),
+    path=os.environ.get("DECISION_CACHE_PATH"),
+)
+atexit.register(DECISION_CACHE.save)
+
+# LLM backend shared by every Gemini bot (LLM_BACKEND=gemini|fake|http)
+try:
+    LLM_BACKEND = create_backend_from_env()
+except Exception as e:
+    logger.warning("Could not create LLM backend: %s", e)
+    LLM_BACKEND = None
+
+# Latency budget for all bot decisions in one /api/action request, and a
+# breaker that stops calling the LLM while it keeps failing
+DECISION_BUDGET_MS = float(os.environ.get("DECISION_BUDGET_MS", 2500))
+CIRCUIT_BREAKER = CircuitBreaker(
+    failure_threshold=int(os.environ.get("LLM_BREAKER_FAILURES", 5)),
+    reset_timeout=float(os.environ.get("LLM_BREAKER_RESET_SECONDS", 15)),
+)
+DECISION_PATHS = DecisionPathStats()
+
+# Process-wide pacing of LLM calls (LLM_RATE_LIMIT calls/s); callers queue by
+# wait time and priority, and are shed to the fallback when the queue is full
+RATE_LIMITER = None
+if os.environ.get("LLM_RATE_LIMIT"):
+    RATE_LIMITER = RateLimiter(
+        rate=float(os.environ["LLM_RATE_LIMIT"]),
+        burst=float(os.environ["LLM_RATE_BURST"]) if os.environ.get("LLM_RATE_BURST") else None,
+        max_queue=int(os.environ.get("LLM_QUEUE_SIZE", 64)),
+        max_wait=float(os.environ.get("LLM_QUEUE_MAX_WAIT_MS", 1000)) / 1000.0,
+    )
+STRUCTURED_OUTPUT = os.environ.get("GEMINI_STRUCTURED_OUTPUT", "1") == "1"
+STREAMING = os.environ.get("GEMINI_STREAMING", "0") == "1"
+
+# Optional micro-batching of Gemini prompts across tables (GEMINI_BATCH_WINDOW_MS)
+DECISION_BATCHER = None
+if os.environ.get("GEMINI_BATCH_WINDOW_MS"):
+    try:
+        DECISION_BATCHER = create_gemini_batcher(
+            window_ms=float(os.environ["GEMINI_BATCH_WINDOW_MS"]),
+            max_batch_size=int(os.environ.get("GEMINI_BATCH_SIZE", 8)),
+            backend=LLM_BACKEND,
+            rate_limiter=RATE_LIMITER,
+        )
+    except Exception as e:
+        logger.warning("Could not start Gemini batcher: %s", e)
+
+# Persist every bot decision for analytics (DECISION_STORE_PATH, SQLite WAL)
+DECISION_STORE = None
+if os.environ.get("DECISION_STORE_PATH"):
+    DECISION_STORE = DecisionStore(os.environ["DECISION_STORE_PATH"])
+    atexit.register(DECISION_STORE.close)
+
+# Precompute bot replies to the human's likely next actions (opt-in: SPECULATION=1).
+# Each state change starts up to SPECULATION_BRANCHES extra background bot
+# (LLM) calls sharing the live breaker and decision cache.
+SPECULATOR = None
+if os.environ.get("SPECULATION", "0") == "1":
+    SPECULATOR = Speculator(max_branches=int(os.environ.get("SPECULATION_BRANCHES", 2)))
+
+# Opponent strategy (OPPONENT_BOT=base|strategy|mcts). The strategy bot plays
+# a table solved by cfr_solver.py; it is the default when a table is given.
+STRATEGY_TABLE_PATH = os.environ.get("STRATEGY_TABLE_PATH")
+OPPONENT_BOT = os.environ.get("OPPONENT_BOT", "strategy" if STRATEGY_TABLE_PATH else "base")
+MCTS_BUDGET_MS = float(os.environ.get("MCTS_BUDGET_MS", 50))
+MCTS_WORKERS = int(os.environ["MCTS_WORKERS"]) if os.environ.get("MCTS_WORKERS") else None
+
+# Append every finished hand (seed, actions, bot decisions) for replay (HAND_RECORD_PATH)
+HAND_RECORDER = HandRecorder(os.environ["HAND_RECORD_PATH"]) if os.environ.get("HAND_RECORD_PATH") else None
+
+# Durable tables and balances (TABLE_DB_PATH, SQLite WAL): snapshots plus a
+# group-committed action log, restored on startup
+TABLE_PERSISTENCE = None
+if os.environ.get("TABLE_DB_PATH"):
+    TABLE_PERSISTENCE = TablePersistence(
+        os.environ["TABLE_DB_PATH"],
+        snapshot_entries=int(os.environ.get("TABLE_SNAPSHOT_ENTRIES", 64)),
+        commit_interval=float(os.environ.get("TABLE_COMMIT_INTERVAL_MS", 20)) / 1000.0,
+        synchronous=os.environ.get("TABLE_DB_SYNC", "FULL"),
+    )
+    atexit.register(TABLE_PERSISTENCE.close)
+
+# Shared tables for multi-worker deployments (TABLE_STORE=sqlite:PATH or
+# redis://...): any worker serves any table through versioned writes
+TABLE_STORE = create_table_store_from_env()
+if TABLE_STORE and TABLE_PERSISTENCE:
+    logger.warning("TABLE_STORE is set; the shared store keeps the tables, ignoring TABLE_DB_PATH")
+    TABLE_PERSISTENCE.close()
+    TABLE_PERSISTENCE = None
+
+# Server-side batch simulations (POST /api/simulate) on a worker process pool
+SIMULATOR = SimulationRunner.from_env(strategy_table=STRATEGY_TABLE_PATH)
+atexit.register(SIMULATOR.close)
+
+# Replies to recent idempotency keys per table, so retried actions are not applied twice
+IDEMPOTENCY = Idempotency.from_env()
+
+# Tables are kept in TABLES by id instead of global variables
 
 
 def card_to_dict(card, hidden=False):
@@ -27,60 +165,37 @@ def card_to_dict(card, hidden=False):
         "suit": card.suit,
         "image": img_url,
     }
-def evaluate_winner(state):
-    """Evaluate winner among all active players (not folded)."""
-    player = state["player"]
-    opponent = state["opponent"]
-    gemini = state.get("gemini_bot")
-    
-    # Get best hands for all players
-    p_best = HandEvaluator.evaluate_hand(player.hand) if player.hand else None
-    o_best = HandEvaluator.evaluate_hand(opponent.hand) if opponent.hand else None
-    g_best = HandEvaluator.evaluate_hand(gemini.hand) if gemini and gemini.hand else None
-    
-    active_players = []
-    if not player.is_folded and p_best:
-        active_players.append(("player", player, p_best))
-    if not opponent.is_folded and o_best:
-        active_players.append(("opponent", opponent, o_best))
-    if gemini and not gemini.is_folded and g_best:
-        active_players.append(("gemini_bot", gemini, g_best))
-    
-    if len(active_players) == 0:
-        return "tie", p_best, o_best, g_best
-    if len(active_players) == 1:
-        return active_players[0][0], p_best, o_best, g_best
-    
-    # Find winner by comparing hands
-    best_player = active_players[0]
-    for i in range(1, len(active_players)):
-        result = HandEvaluator.compare_hands(best_player[1].hand, active_players[i][1].hand)
-        if result == 2:  # Current player beats best
-            best_player = active_players[i]
-    
-    return best_player[0], p_best, o_best, g_best
-
 def make_state():
-    deck = Deck()
-    deck.reset()
-
     player = Player("You", starting_money=1000, is_bot=False)
-    opponent = BaseAIPlayer("Opponent", money=1000)
+    opponent = None
+    try:
+        if OPPONENT_BOT == "strategy":
+            opponent = StrategyBot("Opponent", money=1000, table_path=STRATEGY_TABLE_PATH or "strategy_table.bin")
+        elif OPPONENT_BOT == "mcts":
+            opponent = MCTSBot("Opponent", money=1000, budget_ms=MCTS_BUDGET_MS, workers=MCTS_WORKERS)
+    except Exception as e:
+        logger.warning("Could not create %s opponent: %s", OPPONENT_BOT, e)
+    if opponent is None:
+        opponent = BaseAIPlayer("Opponent", money=1000)
     
     try:
-        gemini_bot = GeminiBot("Gemini", money=1000, personality="balanced")
-        print("✅ GeminiBot initialized successfully!")
+        gemini_bot = GeminiBot("Gemini", money=1000, personality="balanced",
+                               decision_cache=DECISION_CACHE,
+                               batcher=DECISION_BATCHER,
+                               backend=LLM_BACKEND,
+                               circuit_breaker=CIRCUIT_BREAKER,
+                               path_stats=DECISION_PATHS,
+                               structured_output=STRUCTURED_OUTPUT,
+                               streaming=STREAMING,
+                               decision_store=DECISION_STORE,
+                               rate_limiter=RATE_LIMITER)
+        logger.debug("GeminiBot initialized")
     except Exception as e:
-        print(f"⚠️ Could not initialize GeminiBot: {e}")
-        print("Using BaseAIPlayer as fallback for third player")
+        logger.warning("Could not initialize GeminiBot: %s; using BaseAIPlayer for the third player", e)
         gemini_bot = BaseAIPlayer("Gemini (Fallback)", money=1000)
-    
-    player.receive_hand(deck.deal_hand(5))
-    opponent.receive_hand(deck.deal_hand(5))
-    gemini_bot.receive_hand(deck.deal_hand(5))
 
     state = {
-        "deck": deck,
+        "deck": None,
         "player": player,
         "opponent": opponent,
         "gemini_bot": gemini_bot,
@@ -90,49 +205,96 @@ def make_state():
         "gemini_held": False,
         "status": "playing",
         "result": None,
+        "version": 0,
+        "opponent_model": OpponentModel(),
     }
+    state["opponent_model"].start_hand()
+    deal_hand(state)
     return state
 
 
-GAME_STATE = make_state()
+def persist_deal(table_id, state, snapshot=False):
+    """Log a newly dealt hand (snapshot=True for a new game, which resets the stacks)."""
+    if TABLE_PERSISTENCE:
+        TABLE_PERSISTENCE.log_deal(table_id, state, snapshot=snapshot)
 
 
-def reset_hand_keep_balances():
-    """Reset hand/pot but keep player balances intact."""
-    global GAME_STATE
-    if not GAME_STATE:
-        GAME_STATE = make_state()
-        return GAME_STATE
+DEFAULT_TABLE = "default"
+TABLES = TABLE_PERSISTENCE.restore(make_state) if TABLE_PERSISTENCE else {}
+# In shared mode TABLES only caches what the store holds; tables are created there on first use
+SHARED_TABLES = SharedTables(TABLE_STORE, make_state, TABLES) if TABLE_STORE else None
+if not SHARED_TABLES and DEFAULT_TABLE not in TABLES:
+    TABLES[DEFAULT_TABLE] = make_state()
+    persist_deal(DEFAULT_TABLE, TABLES[DEFAULT_TABLE], snapshot=True)
+
+
+def current_table_id():
+    """Table id from the JSON body or query string (the web client uses the default table)."""
+    data = request.get_json(force=True, silent=True) or {}
+    return str(data.get("table_id") or request.args.get("table_id") or DEFAULT_TABLE)
+
+
+def get_table(table_id):
+    """Return the table's state, creating the table on first use."""
+    state = TABLES.get(table_id)
+    if state is None:
+        state = TABLES[table_id] = make_state()
+        persist_deal(table_id, state, snapshot=True)
+    return state
+
 
-    deck = Deck()
-    deck.reset()
-    GAME_STATE["deck"] = deck
+def run_on_table(table_id, fn, create=True):
+    """
+    Run a request's update of one table: on this worker's TABLES, or in
+    shared mode as a versioned write to the table store, re-run on conflict.
 
-    player = GAME_STATE["player"]
-    opponent = GAME_STATE["opponent"]
-    gemini_bot = GAME_STATE.get("gemini_bot")
+    Args:
+        table_id: Table id
+        fn: fn(state) -> (result, change, state), see SharedTables.transact
+        create: Create a missing table first (otherwise fn gets None)
+
+    Returns:
+        tuple: (result, state afterwards)
+    """
+    if SHARED_TABLES:
+        return SHARED_TABLES.transact(table_id, fn, create=create)
+    result, _, state = fn(get_table(table_id) if create else TABLES.get(table_id))
+    TABLES[table_id] = state
+    return result, state
+
+
+def reset_hand_keep_balances(state):
+    """Reset hand/pot but keep player balances intact."""
+    if not state:
+        return make_state()
+
+    player = state["player"]
+    opponent = state["opponent"]
+    gemini_bot = state.get("gemini_bot")
 
     player.reset_for_new_round()
     opponent.reset_for_new_round()
     if gemini_bot:
         gemini_bot.reset_for_new_round()
 
-    GAME_STATE.update({
+    state.update({
         "pot": 0,
         "player_held": False,
         "opponent_held": False,
         "gemini_held": False,
         "status": "playing",
         "result": None,
+        "version": state.get("version", 0) + 1,
     })
 
-    player.receive_hand(deck.deal_hand(5))
-    opponent.receive_hand(deck.deal_hand(5))
-    if gemini_bot:
-        gemini_bot.receive_hand(deck.deal_hand(5))
-    return GAME_STATE
+    if state.get("opponent_model") is not None:
+        state["opponent_model"].start_hand()
+
+    deal_hand(state)
+    return state
 
 
+@traced()
 def serialize_state(state, reveal_opponent=False):
     player = state["player"]
     opponent = state["opponent"]
@@ -165,6 +327,7 @@ def serialize_state(state, reveal_opponent=False):
             "held": state.get("opponent_held", False),
         },
         "winner_preview": winner,
+        "version": state.get("version", 0),
     }
     
     if gemini_bot:
@@ -179,6 +342,23 @@ def serialize_state(state, reveal_opponent=False):
     return result
 
 
+def render_state(state, reveal_opponent=False):
+    """State payload in the encoding the request asked for (see wire_format)."""
+    if wants_compact(request.headers.get("Accept")):
+        return compact_state(state, reveal_opponent)
+    return serialize_state(state, reveal_opponent)
+
+
+def respond(payload):
+    """Response for a render_state payload."""
+    if isinstance(payload, list):
+        response = app.response_class(dumps_compact(payload), mimetype=COMPACT_MEDIA_TYPE)
+    else:
+        response = jsonify(payload)
+    add_vary(response, "Accept")
+    return response
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -189,196 +369,189 @@ def index():
 
 
 
+@app.errorhandler(TableConflict)
+def table_conflict(e):
+    return jsonify({"error": str(e)}), 409
+
+
+@app.errorhandler(SimulationBusy)
+def simulation_busy(e):
+    return jsonify({"error": str(e)}), 429
+
+
+@app.errorhandler(IdempotencyConflict)
+def idempotency_conflict(e):
+    return jsonify({"error": str(e)}), 422
+
+
+@app.errorhandler(IdempotencyInFlight)
+def idempotency_in_flight(e):
+    return jsonify({"error": str(e)}), 409
+
+
 @app.post('/api/new-game')
 def api_new_game():
-    global GAME_STATE
-    GAME_STATE = make_state()
-    return jsonify(serialize_state(GAME_STATE))
+    table_id = current_table_id()
+
+    def new_game(old_state):
+        state = make_state()
+        if old_state is not None and old_state.get("replies") is not None:
+            state["replies"] = old_state["replies"]
+        return render_state(state), ("deal", None), state
+
+    with log_context(table=table_id):
+        result, state = run_on_table(table_id, new_game, create=False)
+    persist_deal(table_id, state, snapshot=True)
+    schedule_speculation(table_id, state)
+    return respond(result)
 
 
 @app.post('/api/new-hand')
 def api_new_hand():
     """Start a new hand but keep player balances."""
-    global GAME_STATE
-    GAME_STATE = reset_hand_keep_balances()
-    return jsonify(serialize_state(GAME_STATE))
+    table_id = current_table_id()
 
+    def new_hand(state):
+        state = reset_hand_keep_balances(state)
+        return render_state(state), ("deal", None), state
 
-@app.get('/api/state')
-def api_state():
-    return jsonify(serialize_state(GAME_STATE, reveal_opponent=GAME_STATE.get("status") == "finished"))
-
-def get_highest_bet(state):
-    """Get the highest current bet among all players."""
-    bets = [state["player"].current_bet, state["opponent"].current_bet]
-    if state.get("gemini_bot"):
-        bets.append(state["gemini_bot"].current_bet)
-    return max(bets)
-
-def all_players_held_or_folded(state):
-    """Check if all active players have held or folded."""
-    player_done = state.get("player_held") or state["player"].is_folded
-    opponent_done = state.get("opponent_held") or state["opponent"].is_folded
-    gemini_done = True
-    if state.get("gemini_bot"):
-        gemini_done = state.get("gemini_held") or state["gemini_bot"].is_folded
-    return player_done and opponent_done and gemini_done
-
-
-def process_ai_turns_in_order(state, run_gemini: bool = True):
-    """Always act in order: human already acted -> opponent bot -> Gemini.
-
-    The `run_gemini` flag gates calling the Gemini API to avoid unnecessary
-    calls. Set to True only when it's the bot's turn after a player action
-    that advances the round (e.g., hold or raise)."""
-    opponent = state["opponent"]
-    gemini_bot = state.get("gemini_bot")
+    with log_context(table=table_id):
+        result, state = run_on_table(table_id, new_hand, create=False)
+    persist_deal(table_id, state)
+    schedule_speculation(table_id, state)
+    return respond(result)
 
-    highest_bet = get_highest_bet(state)
 
-    if hasattr(opponent, 'decide_action') and not state.get("opponent_held"):
-        process_ai_decision(opponent, "opponent", state, highest_bet)
-        highest_bet = get_highest_bet(state)
+@app.get('/api/state')
+def api_state():
+    def read(state):
+        return render_state(state, reveal_opponent=state.get("status") == "finished"), None, state
+
+    result, _ = run_on_table(current_table_id(), read)
+    return respond(result)
+
+@app.get('/api/metrics')
+def api_metrics():
+    return jsonify({
+        "decision_cache": DECISION_CACHE.stats(),
+        "batcher": DECISION_BATCHER.stats() if DECISION_BATCHER else None,
+        "circuit_breaker": CIRCUIT_BREAKER.stats(),
+        "rate_limiter": RATE_LIMITER.stats() if RATE_LIMITER else None,
+        "decision_paths": DECISION_PATHS.stats(),
+        "decision_budget_ms": DECISION_BUDGET_MS,
+        "speculation": SPECULATOR.stats() if SPECULATOR else None,
+        "decision_store": DECISION_STORE.stats() if DECISION_STORE else None,
+        "hand_recorder": HAND_RECORDER.stats() if HAND_RECORDER else None,
+        "profiling": PROFILER.stats() if PROFILER.enabled else None,
+        "tracing": TRACER.stats() if TRACER.enabled else None,
+        "table_persistence": TABLE_PERSISTENCE.stats() if TABLE_PERSISTENCE else None,
+        "shared_tables": SHARED_TABLES.stats() if SHARED_TABLES else None,
+        "compression": COMPRESSOR.stats() if COMPRESSOR else None,
+        "simulation": SIMULATOR.stats(),
+        "idempotency": IDEMPOTENCY.stats(),
+        "logging": LOGGING.stats(),
+        "search": {
+            table_id: state["opponent"].search_stats()
+            for table_id, state in TABLES.items()
+            if isinstance(state["opponent"], MCTSBot)
+        },
+    })
 
-    if run_gemini and gemini_bot and hasattr(gemini_bot, 'decide_action') and not state.get("gemini_held"):
-        process_ai_decision(gemini_bot, "gemini", state, highest_bet)
 
-def process_ai_decision(ai_player, ai_name, state, _highest_bet):
-    """Process an AI player's decision."""
-    class MockBettingManager:
-        def __init__(self, pot, current_bet):
-            self.pot = pot
-            self.current_round = type('obj', (object,), {'current_bet': current_bet})()
-        
-        def get_pot(self):
-            return self.pot
-    
-    class MockGameState:
-        def __init__(self, pot, current_bet):
-            self.betting_manager = MockBettingManager(pot, current_bet)
-    
-    simple_state = {
-        'pot': state["pot"],
-        'player_bet': state["player"].current_bet,
-        'opponent_bet': state["opponent"].current_bet
-    }
-    if state.get("gemini_bot"):
-        simple_state['gemini_bet'] = state["gemini_bot"].current_bet
-    
-    current_highest_for_mock = get_highest_bet(state)
-    gemini_state = MockGameState(state["pot"], current_highest_for_mock)
-    
-    try:
-        if isinstance(ai_player, GeminiBot):
-            ai_action, ai_amount = ai_player.decide_action(gemini_state, ai_player)
-        else:
-            ai_action, ai_amount = ai_player.decide_action(simple_state, ai_player)
-
-        current_highest = get_highest_bet(state)
-
-        if ai_action == "raise" and ai_amount:
-            call_needed = max(0, current_highest - ai_player.current_bet)
-            total_bet = call_needed + max(0, ai_amount)
-            ai_bet = ai_player.place_bet(min(total_bet, ai_player.money))
-            state["pot"] += ai_bet
-            state[f"{ai_name}_held"] = False
-            state["player_held"] = False
-            state["opponent_held"] = False
-            if state.get("gemini_bot"):
-                state["gemini_held"] = False
-            state[f"{ai_name}_held"] = False
-
-        elif ai_action == "call":
-            call_needed = max(0, current_highest - ai_player.current_bet)
-            if call_needed > 0:
-                call_amt = ai_player.place_bet(min(call_needed, ai_player.money))
-                state["pot"] += call_amt
-            state[f"{ai_name}_held"] = True
-
-        elif ai_action == "fold":
-            ai_player.is_folded = True
-            state[f"{ai_name}_held"] = True
+def schedule_speculation(table_id, state):
+    """Start precomputing bot replies while the human thinks."""
+    if SPECULATOR:
+        SPECULATOR.schedule(table_id, state)
 
-    except Exception as e:
-        print(f"AI decision error for {ai_name}: {e}")
-        current_highest = get_highest_bet(state)
-        call_needed = max(0, current_highest - ai_player.current_bet)
-        if call_needed > 0 and ai_player.money >= call_needed:
-            call_amt = ai_player.place_bet(min(call_needed, ai_player.money))
-            state["pot"] += call_amt
-        state[f"{ai_name}_held"] = True
 
 @app.post('/api/action')
+@traced()
 def api_action():
-    global GAME_STATE
     data = request.get_json(force=True, silent=True) or {}
     action = data.get("action")
     amount = int(data.get("amount", 0))
-
-    if GAME_STATE["status"] != "playing":
-        return jsonify(serialize_state(GAME_STATE, reveal_opponent=True))
-
-    player = GAME_STATE["player"]
-    opponent = GAME_STATE["opponent"]
-    gemini_bot = GAME_STATE.get("gemini_bot")
-
-    if action == "raise":
-        bet = player.place_bet(max(0, amount))
-        GAME_STATE["pot"] += bet
-        GAME_STATE["player_held"] = False
-        GAME_STATE["opponent_held"] = False
-        GAME_STATE["gemini_held"] = False
-        # After a player raise, allow bots to act; include Gemini
-        process_ai_turns_in_order(GAME_STATE, run_gemini=True)
-            
-    elif action == "call":
-        highest_bet = get_highest_bet(GAME_STATE)
-        call_needed = highest_bet - player.current_bet
-        if call_needed > 0:
-            call_amt = player.place_bet(min(call_needed, player.money))
-            GAME_STATE["pot"] += call_amt
-        GAME_STATE["player_held"] = True
-        # Do not immediately trigger Gemini on player call; wait for hold/raise
-        
-    elif action == "fold":
-        player.is_folded = True
-        GAME_STATE["player_held"] = True
-        # Folding ends player's participation; do not trigger Gemini here
-        
-    elif action == "hold":
-        highest_bet = get_highest_bet(GAME_STATE)
-        if highest_bet > player.current_bet:
-            return jsonify(serialize_state(GAME_STATE, reveal_opponent=False))
-        
-        GAME_STATE["player_held"] = True
-        # After player holds (and is matched), let bots act; include Gemini
-        process_ai_turns_in_order(GAME_STATE, run_gemini=True)
-    
-    if all_players_held_or_folded(GAME_STATE):
-        winner, _, _, _ = evaluate_winner(GAME_STATE)
-        GAME_STATE["status"] = "finished"
-        GAME_STATE["result"] = winner
-
-        if winner == "player":
-            player.win_pot(GAME_STATE["pot"])
-        elif winner == "opponent":
-            opponent.win_pot(GAME_STATE["pot"])
-        elif winner == "gemini_bot" and gemini_bot:
-            gemini_bot.win_pot(GAME_STATE["pot"])
-        else:  # tie
-            active_count = sum([not p.is_folded for p in [player, opponent, gemini_bot] if p])
-            if active_count > 0:
-                share = GAME_STATE["pot"] // active_count
-                if not player.is_folded:
-                    player.win_pot(share)
-                if not opponent.is_folded:
-                    opponent.win_pot(share)
-                if gemini_bot and not gemini_bot.is_folded:
-                    gemini_bot.win_pot(share)
-        GAME_STATE["pot"] = 0
-        return jsonify(serialize_state(GAME_STATE, reveal_opponent=True))
-
-    return jsonify(serialize_state(GAME_STATE, reveal_opponent=False))
+    table_id = current_table_id()
+    key = request.headers.get(IDEMPOTENCY_HEADER) or data.get("request_id")
+    key = str(key) if key else None
+    if key and len(key) > MAX_KEY_LENGTH:
+        return jsonify({"error": f"Idempotency key longer than {MAX_KEY_LENGTH} characters"}), 400
+    fingerprint = request_fingerprint(action, amount)
+    deadline = Deadline.from_ms(DECISION_BUDGET_MS)
+    accepted = None
+    replayed = False
+    # Bot decisions of the first attempt; a retry after a write conflict
+    # replays them instead of asking the bots (and paying for Gemini) again
+    decisions = {}
+    speculated = False
+
+    def act(state):
+        nonlocal accepted, replayed, speculated
+        accepted = None
+        # Spans of one hand share the hand's seed, so its requests line up as one timeline
+        TRACER.current_span().set(table=table_id, hand=state.get("seed"), action=action)
+        bind_log_context(hand=state.get("seed"))
+        reply = IDEMPOTENCY.lookup(state, key, fingerprint)
+        replayed = reply is not None
+        if replayed:
+            response = app.response_class(reply[0], mimetype=reply[1])
+            response.headers[REPLAYED_HEADER] = "true"
+            add_vary(response, "Accept")
+            return response, None, state
+        if state["status"] != "playing":
+            response = respond(render_state(state, reveal_opponent=True))
+            IDEMPOTENCY.remember(state, key, fingerprint, response)
+            return response, None, state
+
+        if SPECULATOR and not speculated:
+            speculated = True
+            decisions.update(SPECULATOR.take(table_id, state, action, amount,
+                                             timeout=deadline.remaining() if deadline else None) or {})
+
+        if apply_player_action(state, action, amount, deadline=deadline, decisions=decisions):
+            record_action(state, action, amount, decisions)
+            accepted = {'action': action, 'amount': amount, 'decisions': decisions}
+        change = ("action", accepted) if accepted else None
+        response = respond(render_state(state, reveal_opponent=state["status"] == "finished"))
+        IDEMPOTENCY.remember(state, key, fingerprint, response)
+        return response, change, state
+
+    # Side effects outside the table run once, after the (possibly retried) update is stored
+    with log_context(table=table_id), IDEMPOTENCY.running(table_id, key):
+        response, state = run_on_table(table_id, act)
+    if replayed:
+        return response
+    if key:
+        IDEMPOTENCY.record_stored()
+    if accepted and TABLE_PERSISTENCE:
+        TABLE_PERSISTENCE.log_action(table_id, action, amount, accepted['decisions'])
+    if state["status"] == "finished":
+        record = finish_recording(state)
+        if record and HAND_RECORDER:
+            HAND_RECORDER.append(record)
+    schedule_speculation(table_id, state)
+    return response
+
+
+
+@app.post('/api/simulate')
+def api_simulate():
+    """Play bot-only hands on the worker pool and stream the results as NDJSON."""
+    data = request.get_json(force=True, silent=True) or {}
+    try:
+        config = SIMULATOR.parse_config(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    job = SIMULATOR.start(config)
+    response = Response(job.lines(), mimetype="application/x-ndjson")
+    response.headers["X-Simulation-Id"] = job.id
+    return response
+
+
+@app.delete('/api/simulate/<job_id>')
+def api_simulate_cancel(job_id):
+    if not SIMULATOR.cancel(job_id):
+        return jsonify({"error": f"No running simulation {job_id}"}), 404
+    return jsonify({"cancelled": job_id})
 
 
 if __name__ == '__main__':
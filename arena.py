@@ -0,0 +1,306 @@
+"""
+Bot arena - headless round-robin matches between bot strategies
+
+Every matchup is played in duplicate: each random deal is replayed once per
+seat rotation, so every bot holds every hand and card luck mostly cancels
+out. Batches of duplicate deals run on a process pool; each finished batch
+is streamed as a JSON line, and a matchup stops early once every bot's
+result is clearly different from zero (or its hand limit is reached).
+
+Hands run through the same rules as the app (game_flow), with every seat
+played by a bot and stacks reset before each hand.
+
+Usage:
+    python arena.py base strategy mcts:20 gemini --seats 2 --max-hands 20000
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ai_player import BaseAIPlayer
+from game_flow import all_players_held_or_folded, get_highest_bet, process_ai_decision, settle_hand
+from game_logic import create_card
+from structured_logging import reset_worker_logging
+
+SEATS = (("player", "player"), ("opponent", "opponent"), ("gemini", "gemini_bot"))
+STACK = 1000
+ANTE = 10
+MAX_BETTING_PASSES = 8
+
+
+# ------------------- BOTS -------------------
+
+def make_bot(spec: str, name: str) -> BaseAIPlayer:
+    """
+    Build a bot from a spec string.
+
+    base, strategy[:TABLE_PATH], mcts[:BUDGET_MS], gemini[:PERSONALITY]
+    (GeminiBot on the offline FakeBackend stand-in)
+    """
+    kind, _, arg = spec.partition(":")
+    if kind == "base":
+        return BaseAIPlayer(name, money=STACK)
+    if kind == "strategy":
+        from strategy_bot import StrategyBot
+        return StrategyBot(name, money=STACK, table_path=arg or "strategy_table.bin")
+    if kind == "mcts":
+        from mcts_bot import MCTSBot
+        # Arena workers are already separate processes; search in-process
+        return MCTSBot(name, money=STACK, budget_ms=float(arg or 20), workers=0)
+    if kind == "gemini":
+        from llm_backends import FakeBackend
+        from llm_logic import GeminiBot
+        return GeminiBot(name, money=STACK, personality=arg or "balanced",
+                         backend=FakeBackend(), structured_output=True)
+    raise ValueError(f"Unknown bot spec: {spec}")
+
+
+# ------------------- HANDS -------------------
+
+def play_hand(bots: Sequence[BaseAIPlayer], hands, rng_seed: int) -> List[int]:
+    """
+    Play one hand with bots[i] in seat i holding hands[i].
+
+    Returns:
+        list: Chips won (or lost) by each seat
+    """
+    run_hand(bots, hands, rng_seed)
+    return [bot.money - STACK for bot in bots]
+
+
+def run_hand(bots: Sequence[BaseAIPlayer], hands, rng_seed: int,
+             stacks: Optional[Sequence[int]] = None, ante: int = ANTE,
+             blinds: Optional[Sequence[int]] = None) -> Tuple[int, str]:
+    """
+    Play one hand to the end; stacks[i] (default STACK) is seat i's starting
+    stack and blinds[i] its blind, posted on top of the ante.
+
+    Returns:
+        tuple: (pot at showdown, winning seat key or "tie"); the bots keep
+        their final stacks
+    """
+    random.seed(rng_seed)  # BaseAIPlayer draws from the global RNG
+    state = {
+        "deck": None,
+        "pot": 0,
+        "status": "playing",
+        "result": None,
+        "version": 0,
+        "gemini_bot": None,
+    }
+    for i, ((name, key), bot, hand) in enumerate(zip(SEATS, bots, hands)):
+        bot.reset_for_new_round()
+        bot.money = stacks[i] if stacks else STACK
+        bot.receive_hand(list(hand))
+        state[key] = bot
+        state[f"{name}_held"] = False
+        # Forced bets go all-in when the stack is short (bots' place_bet does not cap)
+        state["pot"] += bot.place_bet(min(ante + (blinds[i] if blinds else 0), bot.money))
+
+    seats = [(name, state[key]) for name, key in SEATS[:len(bots)]]
+
+    def hand_over():
+        # The hand also ends as soon as one seat is left, before it could fold too
+        return all_players_held_or_folded(state) or sum(not b.is_folded for b in bots) <= 1
+
+    for _ in range(MAX_BETTING_PASSES):
+        for name, bot in seats:
+            if bot.is_folded or state[f"{name}_held"]:
+                continue
+            process_ai_decision(bot, name, state, get_highest_bet(state))
+            if hand_over():
+                break
+        if hand_over():
+            break
+    # Betting that never settles (raise wars) goes to showdown as it stands
+    pot = state["pot"]
+    settle_hand(state)
+    return pot, state["result"]
+
+
+def play_duplicate_batch(task) -> Dict:
+    """
+    Worker: play `deals` duplicate deal sets for one matchup.
+
+    Returns:
+        dict: matchup index and, per bot, its per-hand average over each
+        duplicate set (one sample per set)
+    """
+    matchup_index, specs, first_deal, deals, seed = task
+    n = len(specs)
+    bots = [make_bot(spec, f"{spec}#{i}") for i, spec in enumerate(specs)]
+    samples = [[] for _ in range(n)]
+    started = time.time()
+    for deal in range(first_deal, first_deal + deals):
+        rng = random.Random(seed * 1000003 + deal)
+        ids = rng.sample(range(1, 53), 5 * n)
+        hands = [[create_card(c) for c in ids[i * 5:(i + 1) * 5]] for i in range(n)]
+        totals = [0] * n
+        for rotation in range(n):
+            # Bot b sits in seat (b + rotation) % n and holds that seat's hand
+            order = [(b + rotation) % n for b in range(n)]
+            seated = [None] * n
+            for b, seat in enumerate(order):
+                seated[seat] = bots[b]
+            result = play_hand(seated, hands, rng.getrandbits(32))
+            for b, seat in enumerate(order):
+                totals[b] += result[seat]
+        for b in range(n):
+            samples[b].append(totals[b] / n)
+    return {
+        'matchup': matchup_index,
+        'samples': samples,
+        'seconds': time.time() - started,
+    }
+
+
+# ------------------- STATISTICS -------------------
+
+class MatchupStats:
+    """Running mean / variance (Welford) of per-hand results for each bot."""
+
+    def __init__(self, specs: Sequence[str]):
+        self.specs = list(specs)
+        self.count = 0
+        self._mean = [0.0] * len(specs)
+        self._m2 = [0.0] * len(specs)
+
+    def add(self, samples: Sequence[Sequence[float]]):
+        for j in range(len(samples[0])):
+            self.count += 1
+            for b, bot_samples in enumerate(samples):
+                x = bot_samples[j]
+                delta = x - self._mean[b]
+                self._mean[b] += delta / self.count
+                self._m2[b] += delta * (x - self._mean[b])
+
+    def interval(self, bot: int, z: float):
+        """(mean, half width) in chips per 100 hands."""
+        if self.count < 2:
+            return self._mean[bot] * 100, math.inf
+        stderr = math.sqrt(self._m2[bot] / (self.count - 1) / self.count)
+        return self._mean[bot] * 100, z * stderr * 100
+
+    def significant(self, z: float) -> bool:
+        """Every bot's interval excludes zero."""
+        for b in range(len(self.specs)):
+            mean, half = self.interval(b, z)
+            if abs(mean) <= half:
+                return False
+        return True
+
+    def report(self, hands_per_set: int, z: float = 1.96) -> Dict:
+        bots = []
+        for b, spec in enumerate(self.specs):
+            mean, half = self.interval(b, z)
+            bots.append({'bot': spec, 'chips_per_100': mean, 'ci95': half})
+        return {'hands': self.count * hands_per_set, 'duplicate_sets': self.count, 'bots': bots}
+
+
+# ------------------- ROUND ROBIN -------------------
+
+def run_round_robin(specs: Sequence[str], seats: int = 2, max_hands: int = 20000,
+                    min_hands: int = 2000, batch_deals: int = 100, stop_z: float = 3.0,
+                    workers: Optional[int] = None, seed: int = 0,
+                    on_result: Callable[[Dict], None] = print) -> List[Dict]:
+    """
+    Play every `seats`-sized combination of bots against each other.
+
+    Args:
+        specs: Bot specs (see make_bot)
+        seats: Bots per table (2 or 3)
+        max_hands: Hand limit per matchup
+        min_hands: Hands played before early stopping is considered
+        batch_deals: Duplicate deal sets per worker task
+        stop_z: z-score every bot's result must clear to stop early; higher
+            than 1.96 because the test is repeated after every batch
+        workers: Processes (default: all cores)
+        seed: Seed for the deals (same seed, same cards)
+        on_result: Called with each streamed result dict
+
+    Returns:
+        list: Final report per matchup
+    """
+    if not 2 <= seats <= len(SEATS):
+        raise ValueError(f"seats must be between 2 and {len(SEATS)}")
+    matchups = list(itertools.combinations(specs, seats))
+    stats = [MatchupStats(m) for m in matchups]
+    next_deal = [0] * len(matchups)
+    done = [False] * len(matchups)
+    max_sets = max(1, max_hands // seats)
+    min_sets = min_hands // seats
+    workers = workers or os.cpu_count() or 1
+    started = time.time()
+
+    def submit(pool, i):
+        deals = min(batch_deals, max_sets - next_deal[i])
+        future = pool.submit(play_duplicate_batch, (i, matchups[i], next_deal[i], deals, seed))
+        next_deal[i] += deals
+        return future
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=reset_worker_logging) as pool:
+        pending = set()
+        # Keep about two batches per worker in flight, spread over the matchups
+        for i in itertools.islice(itertools.cycle(range(len(matchups))), 2 * workers):
+            if next_deal[i] < max_sets:
+                pending.add(submit(pool, i))
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                i = result['matchup']
+                if done[i]:
+                    continue
+                stats[i].add(result['samples'])
+                s = stats[i]
+                stop = s.count >= max_sets or (s.count >= min_sets and s.significant(stop_z))
+                report = dict(s.report(seats), matchup=i, final=stop,
+                              elapsed=time.time() - started)
+                on_result(report)
+                if stop:
+                    done[i] = True
+                    continue
+                if next_deal[i] < max_sets:
+                    pending.add(submit(pool, i))
+            # Hand idle workers to matchups that still need hands
+            open_matchups = [i for i in range(len(matchups)) if not done[i] and next_deal[i] < max_sets]
+            while open_matchups and len(pending) < 2 * workers:
+                i = min(open_matchups, key=lambda m: next_deal[m])
+                pending.add(submit(pool, i))
+                if next_deal[i] >= max_sets:
+                    open_matchups.remove(i)
+    return [dict(s.report(seats), matchup=i) for i, s in enumerate(stats)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Round-robin bot matches with duplicate dealing")
+    parser.add_argument("bots", nargs="+", help="bot specs: base, strategy[:PATH], mcts[:MS], gemini[:PERSONALITY]")
+    parser.add_argument("--seats", type=int, default=2, help="bots per table (2 or 3)")
+    parser.add_argument("--max-hands", type=int, default=20000, help="hand limit per matchup")
+    parser.add_argument("--min-hands", type=int, default=2000, help="hands before stopping early")
+    parser.add_argument("--batch", type=int, default=100, help="duplicate deal sets per task")
+    parser.add_argument("--stop-z", type=float, default=3.0, help="z-score needed to stop early")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="append JSON lines here instead of stdout")
+    args = parser.parse_args()
+
+    out = open(args.out, "a") if args.out else sys.stdout
+
+    def emit(report):
+        out.write(json.dumps(report) + "\n")
+        out.flush()
+
+    final = run_round_robin(args.bots, args.seats, args.max_hands, args.min_hands, args.batch,
+                            args.stop_z, args.workers, args.seed, on_result=emit)
+    for report in final:
+        line = ", ".join(f"{b['bot']} {b['chips_per_100']:+.1f} ± {b['ci95']:.1f}" for b in report['bots'])
+        print(f"[{report['hands']} hands] {line} chips/100", file=sys.stderr)
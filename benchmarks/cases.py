@@ -0,0 +1,278 @@
+"""
+Benchmark cases
+
+Each case is registered with @bench and returns a zero-argument callable;
+everything before the return is setup and is not timed. Inputs are built
+from fixed seeds so every run measures the same work.
+"""
+
+import os
+import random
+
+CASES = {}
+
+
+def bench(name: str):
+    def register(factory):
+        CASES[name] = factory
+        return factory
+    return register
+
+
+def _hands(count: int, seed: int = 0):
+    from game_logic import create_card
+    rng = random.Random(seed)
+    hands = []
+    for _ in range(count):
+        ids = rng.sample(range(1, 53), 10)
+        hands.append(([create_card(c) for c in ids[:5]], [create_card(c) for c in ids[5:]]))
+    return hands
+
+
+class _MockGameState:
+    """Same shape as the MockGameState process_ai_decision gives GeminiBot."""
+
+    def __init__(self, pot: int, current_bet: int):
+        self.betting_manager = self
+        self.pot = pot
+        self.current_round = self
+        self.current_bet = current_bet
+
+    def get_pot(self):
+        return self.pot
+
+
+# ------------------- EVALUATOR -------------------
+
+@bench("evaluator.evaluate_hand")
+def evaluate_hand():
+    from hand_evaluator import HandEvaluator
+    hands = [a for a, _ in _hands(200)]
+
+    def run():
+        for hand in hands:
+            HandEvaluator.evaluate_hand(hand)
+    return run
+
+
+@bench("evaluator.compare_hands")
+def compare_hands():
+    from hand_evaluator import HandEvaluator
+    pairs = _hands(200)
+
+    def run():
+        for a, b in pairs:
+            HandEvaluator.compare_hands(a, b)
+    return run
+
+
+@bench("evaluator.win_prob")
+def win_prob():
+    from hand_evaluator import win_prob as win_prob_
+    hands = [a for a, _ in _hands(200)]
+
+    def run():
+        for hand in hands:
+            win_prob_(hand)
+    return run
+
+
+# ------------------- DECK -------------------
+
+@bench("deck.deal_hand")
+def deal_hand():
+    from deck import Deck
+
+    def run():
+        deck = Deck(rng=random.Random(7))
+        for _ in range(3):
+            deck.deal_hand(5)
+    return run
+
+
+# ------------------- TABLE CORE -------------------
+
+def _table(seed: int = 0):
+    from table_core import Seat, Table
+    rng = random.Random(seed)
+    ids = rng.sample(range(1, 53), 15)
+    return Table(tuple(Seat(1000, 10, tuple(ids[i * 5:(i + 1) * 5])) for i in range(3)), pot=30)
+
+
+@bench("core.apply_hand")
+def core_apply_hand():
+    from table_core import Action, apply
+    table = _table()
+    actions = [Action("player", "raise", 20, human=True), Action("opponent", "call"),
+               Action("gemini", "raise", 40), Action("player", "call", human=True),
+               Action("opponent", "call"), Action("player", "hold", human=True), Action("table", "showdown")]
+
+    def run():
+        t = table
+        for action in actions:
+            t = apply(t, action)
+    return run
+
+
+@bench("core.snapshot")
+def core_snapshot():
+    from table_core import table_from_state
+    app = _app()
+    state = app.make_state()
+
+    def run():
+        table_from_state(state)
+    return run
+
+
+@bench("game_flow.clone_state")
+def clone_state():
+    from game_flow import clone_state
+    app = _app()
+    state = app.make_state()
+
+    def run():
+        clone_state(state)
+    return run
+
+
+# ------------------- BOTS -------------------
+
+@bench("bots.base_decide_action")
+def base_decide_action():
+    from ai_player import BaseAIPlayer
+    bot = BaseAIPlayer("Bench", rng=random.Random(3))
+    hands = [a for a, _ in _hands(50)]
+    spots = [{'pot': 60, 'player_bet': 40, 'opponent_bet': 0, 'gemini_bet': 20},
+             {'pot': 30, 'player_bet': 10, 'opponent_bet': 10, 'gemini_bet': 10}]
+
+    def run():
+        for hand in hands:
+            bot.hand = hand
+            for spot in spots:
+                bot.decide_action(spot, bot)
+    return run
+
+
+def _gemini_bot(structured: bool):
+    from llm_backends import FakeBackend
+    from llm_logic import GeminiBot
+    bot = GeminiBot("Bench", backend=FakeBackend(seed=1), structured_output=structured)
+    bot.hand = _hands(1)[0][0]
+    return bot
+
+
+@bench("bots.gemini_build_prompt")
+def gemini_build_prompt():
+    bot = _gemini_bot(structured=False)
+    game_state = _MockGameState(pot=60, current_bet=40)
+
+    def run():
+        bot._build_prompt(bot._prepare_context(game_state, bot))
+    return run
+
+
+@bench("bots.gemini_build_prompt_structured")
+def gemini_build_prompt_structured():
+    bot = _gemini_bot(structured=True)
+    game_state = _MockGameState(pot=60, current_bet=40)
+
+    def run():
+        bot._build_prompt(bot._prepare_context(game_state, bot))
+    return run
+
+
+@bench("bots.gemini_parse_response")
+def gemini_parse_response():
+    bot = _gemini_bot(structured=False)
+    text = ('Here is my decision:\n```json\n{"action": "raise", "amount": 50, '
+            '"reasoning": "Strong pair against a small bet", "confidence": 0.8}\n```')
+
+    def run():
+        bot._parse_response(text)
+    return run
+
+
+# ------------------- APP -------------------
+
+def _app():
+    # Offline, deterministic app: fake LLM, no speculation threads, no recording,
+    # and only warnings logged (the log writes to stdout, beside the report)
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["SPECULATION"] = "0"
+    os.environ.pop("HAND_RECORD_PATH", None)
+    os.environ.pop("DECISION_STORE_PATH", None)
+    import app
+    return app
+
+
+@bench("app.serialize_state")
+def serialize_state():
+    app = _app()
+    state = app.make_state()
+
+    def run():
+        app.serialize_state(state, reveal_opponent=True)
+    return run
+
+
+@bench("app.compact_state")
+def compact_state():
+    from wire_format import compact_state, dumps_compact
+    app = _app()
+    state = app.make_state()
+
+    def run():
+        dumps_compact(compact_state(state, reveal_opponent=True))
+    return run
+
+
+@bench("routes.state")
+def route_state():
+    app = _app()
+    client = app.app.test_client()
+    client.post('/api/new-game', json={'table_id': 'bench'})
+
+    def run():
+        client.get('/api/state?table_id=bench')
+    return run
+
+
+@bench("routes.state_compact")
+def route_state_compact():
+    from wire_format import COMPACT_MEDIA_TYPE
+    app = _app()
+    client = app.app.test_client()
+    client.post('/api/new-game', json={'table_id': 'bench'})
+
+    def run():
+        client.get('/api/state?table_id=bench', headers={'Accept': COMPACT_MEDIA_TYPE})
+    return run
+
+
+@bench("routes.new_game_and_hold")
+def route_new_game_and_hold():
+    app = _app()
+    client = app.app.test_client()
+    random.seed(0)
+
+    def run():
+        # A new game each time keeps stacks from drifting over thousands of runs
+        client.post('/api/new-game', json={'table_id': 'bench'})
+        client.post('/api/action', json={'table_id': 'bench', 'action': 'hold'})
+    return run
+
+
+@bench("routes.action_replay")
+def route_action_replay():
+    app = _app()
+    client = app.app.test_client()
+    client.post('/api/new-game', json={'table_id': 'bench'})
+    headers = {'Idempotency-Key': 'bench-retry'}
+    client.post('/api/action', json={'table_id': 'bench', 'action': 'hold'}, headers=headers)
+
+    def run():
+        # A retried action answered from the table's reply window
+        client.post('/api/action', json={'table_id': 'bench', 'action': 'hold'}, headers=headers)
+    return run
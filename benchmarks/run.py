@@ -0,0 +1,167 @@
+"""
+Benchmark runner
+
+Times every case in benchmarks/cases.py with timeit and compares against
+the stored baseline. Each case is normalized by a fixed pure-Python
+calibration loop, so a baseline saved on one machine stays comparable on
+a faster or slower CI box. The calibration and the case are timed in
+several interleaved rounds (best of a few repeats each) and the median
+of the per-round ratios is kept, so one noisy timing of either side does
+not move the result; regressions are judged on that median, and a case
+that looks regressed is measured again before it fails the run.
+
+Usage:
+    python benchmarks/run.py                    # compare with baseline.json
+    python benchmarks/run.py --save             # record a new baseline
+    python benchmarks/run.py -k evaluator       # only matching cases
+    python benchmarks/run.py --threshold 0.25   # allowed slowdown (default 25%)
+
+Exits with status 1 if any case regressed beyond the threshold.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.cases import CASES  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def _calibration():
+    total = 0
+    for i in range(20000):
+        total += i * i % 7
+    return total
+
+
+def _loops(timer: timeit.Timer, min_time: float) -> int:
+    """Calls per timing so that one timing takes at least `min_time` seconds."""
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    return number
+
+
+def measure(fn, repeat: int = 5, min_time: float = 0.2) -> float:
+    """Best seconds per call over `repeat` runs of at least `min_time` each."""
+    timer = timeit.Timer(fn)
+    number = _loops(timer, min_time)
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def measure_case(name: str, repeat: int = 3, rounds: int = 5, min_time: float = 0.05) -> dict:
+    """Median over `rounds` of (best case time / best calibration time), timed back to back."""
+    case, calibration = timeit.Timer(CASES[name]()), timeit.Timer(_calibration)
+    case_loops, calibration_loops = _loops(case, min_time), _loops(calibration, min_time)
+    samples = []
+    for _ in range(rounds):
+        base = min(calibration.repeat(repeat=repeat, number=calibration_loops)) / calibration_loops
+        seconds = min(case.repeat(repeat=repeat, number=case_loops)) / case_loops
+        samples.append((seconds / base, seconds))
+    samples.sort()
+    normalized, seconds = samples[len(samples) // 2]
+    return {'seconds': seconds, 'normalized': normalized}
+
+
+def run_cases(pattern: str = "", repeat: int = 3, rounds: int = 5) -> dict:
+    results = {}
+    for name in CASES:
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure_case(name, repeat, rounds)
+        print(f"  {name:<40} {results[name]['seconds'] * 1e6:>12.1f} us", file=sys.stderr)
+    return {
+        'calibration_seconds': measure(_calibration, repeat),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float):
+    """Return (rows, regressed) comparing normalized times."""
+    rows, regressed = [], []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            rows.append((name, result['seconds'], None, "new"))
+            continue
+        ratio = result['normalized'] / base['normalized']
+        status = "ok"
+        if ratio > 1 + threshold:
+            status = "REGRESSED"
+            regressed.append(name)
+        elif ratio < 1 - threshold:
+            status = "faster"
+        rows.append((name, result['seconds'], ratio, status))
+    return rows, regressed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("-k", dest="pattern", default="", help="only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=3, help="timings per round (the best counts)")
+    parser.add_argument("--rounds", type=int, default=5, help="calibrated rounds per case (the median counts)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--retries", type=int, default=3, help="re-measure a regressed case this many times")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--json", dest="json_out", default=None, help="also write results here")
+    args = parser.parse_args(argv)
+
+    print(f"Running {len(CASES)} benchmark cases...", file=sys.stderr)
+    current = run_cases(args.pattern, args.repeat, args.rounds)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.save:
+        baseline = {}
+        if args.pattern and os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        merged = dict(current, results=dict(baseline.get('results', {}), **current['results']))
+        with open(args.baseline, "w") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save first")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    rows, regressed = compare(current, baseline, args.threshold)
+    for _ in range(args.retries):
+        if not regressed:
+            break
+        # Noise only ever makes a case slower: keep the best measurement
+        for name in regressed:
+            again = measure_case(name, args.repeat, args.rounds)
+            if again['normalized'] < current['results'][name]['normalized']:
+                current['results'][name] = again
+        rows, regressed = compare(current, baseline, args.threshold)
+    print(f"{'case':<40} {'time':>12} {'vs baseline':>12}  status")
+    for name, seconds, ratio, status in rows:
+        ratio_text = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(f"{name:<40} {seconds * 1e6:>10.1f}us {ratio_text:>12}  {status}")
+    if regressed:
+        print(f"\n{len(regressed)} case(s) regressed more than {args.threshold:.0%}: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Worker scaling benchmark for shared table state
+
+Starts the app with 1..N worker processes sharing one table store
+(TABLE_STORE=sqlite:...) and drives it with concurrent HTTP clients that
+play random actions on a pool of tables; every request goes to any
+worker. Reports throughput, latency and optimistic-write conflicts per
+worker count, one JSON line each.
+
+With gunicorn installed the workers are `gunicorn -w N app:app`;
+otherwise (or with --server processes) N single-process servers are
+started on consecutive ports and the clients spread requests over them,
+which exercises the same shared-state path without gunicorn.
+
+The bots use the offline FakeBackend; --llm-latency adds a simulated
+Gemini round trip (e.g. constant:50).
+
+Usage:
+    python benchmarks/workers.py --workers 1,2,4 --clients 16 --seconds 10
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ACTIONS = ("raise", "call", "hold", "call", "hold", "fold")
+
+
+def _free_ports(count: int) -> List[int]:
+    socks = [socket.socket() for _ in range(count)]
+    for s in socks:
+        s.bind(("127.0.0.1", 0))
+    ports = [s.getsockname()[1] for s in socks]
+    for s in socks:
+        s.close()
+    return ports
+
+
+def start_servers(workers: int, server: str, env: Dict) -> (List[subprocess.Popen], List[str]):
+    """Start the app; returns the processes and the base URLs to spread requests over."""
+    if server == "gunicorn":
+        port = _free_ports(1)[0]
+        cmd = [sys.executable, "-m", "gunicorn", "-w", str(workers), "--threads", "4",
+               "-b", f"127.0.0.1:{port}", "app:app"]
+        procs = [subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)]
+        return procs, [f"http://127.0.0.1:{port}"]
+    ports = _free_ports(workers)
+    code = "import sys; from app import app; app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)"
+    procs = [subprocess.Popen([sys.executable, "-c", code, str(port)], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+             for port in ports]
+    return procs, [f"http://127.0.0.1:{port}" for port in ports]
+
+
+def _request(url: str, path: str, body=None, timeout: float = 30.0):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url + path, data=data, method="POST" if data else "GET",
+                                 headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def wait_ready(urls: List[str], timeout: float = 60.0):
+    deadline = time.time() + timeout
+    for url in urls:
+        while True:
+            try:
+                if _request(url, "/api/state?table_id=warmup")[0] == 200:
+                    break
+            except OSError:
+                pass
+            if time.time() > deadline:
+                raise RuntimeError(f"Server at {url} did not start")
+            time.sleep(0.2)
+
+
+def drive(urls: List[str], clients: int, tables: int, seconds: float, seed: int) -> Dict:
+    """Run `clients` threads for `seconds`; each request picks a table and a worker at random."""
+    latencies, statuses = [], []
+    lock = threading.Lock()
+    stop = time.time() + seconds
+
+    def client(i):
+        rng = random.Random(seed * 1000 + i)
+        local_lat, local_status = [], []
+        while time.time() < stop:
+            url = rng.choice(urls)
+            table = f"bench-{rng.randrange(tables)}"
+            started = time.perf_counter()
+            try:
+                status, body = _request(url, "/api/action", {
+                    'table_id': table, 'action': rng.choice(ACTIONS), 'amount': rng.choice((10, 20, 50)),
+                })
+                if status == 200 and body and body.get("status") == "finished":
+                    status, _ = _request(url, "/api/new-hand", {'table_id': table})
+            except OSError:
+                status = -1
+            local_lat.append(time.perf_counter() - started)
+            local_status.append(status)
+        with lock:
+            latencies.extend(local_lat)
+            statuses.extend(local_status)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    n = len(latencies)
+    return {
+        'requests': n,
+        'rps': n / seconds,
+        'p50_ms': latencies[n // 2] * 1000.0 if n else None,
+        'p99_ms': latencies[min(n - 1, int(n * 0.99))] * 1000.0 if n else None,
+        'conflicts': statuses.count(409),
+        'errors': sum(1 for s in statuses if s not in (200, 409)),
+    }
+
+
+def run(worker_counts: List[int], server: str, clients: int, tables: int, seconds: float,
+        llm_latency: str, seed: int = 0) -> List[Dict]:
+    results = []
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, TABLE_STORE=f"sqlite:{os.path.join(tmp, 'tables.db')}",
+                       LLM_BACKEND="fake", FAKE_LLM_LATENCY=llm_latency, SPECULATION="0")
+            env.pop("TABLE_DB_PATH", None)
+            procs, urls = start_servers(workers, server, env)
+            try:
+                wait_ready(urls)
+                result = dict(drive(urls, clients, tables, seconds, seed), workers=workers, server=server)
+            finally:
+                for p in procs:
+                    p.terminate()
+                for p in procs:
+                    p.wait()
+        result['speedup'] = result['rps'] / results[0]['rps'] if results and results[0]['rps'] else 1.0
+        results.append(result)
+        print(json.dumps(result), flush=True)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Throughput of 1..N workers sharing one table store")
+    parser.add_argument("--workers", default=f"1,2,{os.cpu_count() or 1}",
+                        help="comma-separated worker counts")
+    parser.add_argument("--server", choices=("gunicorn", "processes"),
+                        default="gunicorn" if importlib.util.find_spec("gunicorn") else "processes")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client threads")
+    parser.add_argument("--tables", type=int, default=64, help="tables the clients spread over")
+    parser.add_argument("--seconds", type=float, default=10.0, help="duration per worker count")
+    parser.add_argument("--llm-latency", default="constant:0", help="FakeBackend latency spec")
+    args = parser.parse_args()
+
+    counts = sorted({int(w) for w in args.workers.split(",")})
+    run(counts, args.server, args.clients, args.tables, args.seconds, args.llm_latency)
@@ -0,0 +1,252 @@
+"""
+Offline CFR solver for the one-round 5-card game
+
+Solves the abstraction in strategy_table.py with chance-weighted CFR+
+(regrets clipped at zero, linearly weighted averaging). Each iteration the
+bucket pairs are split across a process pool and the workers' regret and
+strategy deltas are summed, which is exactly one CFR iteration. Progress
+is checkpointed so long solves can be resumed.
+
+Usage:
+    python cfr_solver.py --buckets 10 --iterations 2000 --out strategy_table.bin
+    python cfr_solver.py --resume --iterations 5000   # continue from the checkpoint
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from bisect import bisect_right
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Sequence
+
+from hand_evaluator import HandEvaluator
+from strategy_table import (HISTORIES, HISTORY_INDEX, MAX_ACTIONS, compute_bucket_edges,
+                            contributions, hand_score, legal_actions, player_to_act,
+                            random_hands, write_table)
+
+
+# ------------------- CHANCE MODEL -------------------
+
+def _sample_matchups(args) -> List[List[float]]:
+    """Worker: count bucket pairs and P0 wins (ties = half) over random deals."""
+    edges, samples, seed = args
+    num_buckets = len(edges) + 1
+    rng = random.Random(seed)
+    counts = [[0.0] * num_buckets for _ in range(num_buckets)]
+    wins = [[0.0] * num_buckets for _ in range(num_buckets)]
+    for _ in range(samples):
+        hand0, hand1 = random_hands(rng, 2)
+        b0 = bisect_right(edges, hand_score(hand0))
+        b1 = bisect_right(edges, hand_score(hand1))
+        result = HandEvaluator.compare_hands(hand0, hand1)
+        counts[b0][b1] += 1
+        wins[b0][b1] += 1.0 if result == 1 else (0.5 if result == 0 else 0.0)
+    return [counts, wins]
+
+
+def build_chance_model(edges: Sequence[float], samples: int, pool: Pool,
+                       workers: int, seed: int = 0) -> Dict:
+    """
+    Estimate P(bucket pair) and P0 equity per bucket pair by sampling deals in parallel.
+
+    Returns:
+        dict: {'pairs': [(b0, b1, probability, equity), ...]}
+    """
+    per_worker = max(1, samples // workers)
+    parts = pool.map(_sample_matchups, [(list(edges), per_worker, seed + i) for i in range(workers)])
+    num_buckets = len(edges) + 1
+    total = float(per_worker * workers)
+    pairs = []
+    for b0 in range(num_buckets):
+        for b1 in range(num_buckets):
+            count = sum(p[0][b0][b1] for p in parts)
+            if count == 0:
+                continue
+            won = sum(p[1][b0][b1] for p in parts)
+            pairs.append((b0, b1, count / total, won / count))
+    return {'pairs': pairs}
+
+
+# ------------------- CFR -------------------
+
+def _current_strategy(regrets: Sequence[float], base: int, n: int) -> List[float]:
+    positive = [max(0.0, regrets[base + i]) for i in range(n)]
+    total = sum(positive)
+    if total > 0:
+        return [p / total for p in positive]
+    return [1.0 / n] * n
+
+
+def _cfr_chunk(args):
+    """
+    Worker: one CFR pass over a subset of bucket pairs.
+
+    Returns regret and strategy-sum deltas (flat, same layout as the table).
+    """
+    regrets, pairs, weight = args
+    size = len(regrets)
+    regret_delta = [0.0] * size
+    strategy_delta = [0.0] * size
+    nh = len(HISTORIES)
+
+    def walk(history, b0, b1, equity, reach0, reach1, chance):
+        actions = legal_actions(history)
+        if actions is None:
+            put = contributions(history)
+            if history[-1] == "f":
+                folder = (len(history) - 1) % 2
+                return -put[0] if folder == 0 else put[1]
+            return equity * (put[0] + put[1]) - put[0]
+
+        player = player_to_act(history)
+        bucket = b0 if player == 0 else b1
+        base = (bucket * nh + HISTORY_INDEX[history]) * MAX_ACTIONS
+        n = len(actions)
+        sigma = _current_strategy(regrets, base, n)
+        utils = []
+        node_util = 0.0
+        for i, action in enumerate(actions):
+            if player == 0:
+                u = walk(history + (action,), b0, b1, equity, reach0 * sigma[i], reach1, chance)
+            else:
+                u = walk(history + (action,), b0, b1, equity, reach0, reach1 * sigma[i], chance)
+            utils.append(u)
+            node_util += sigma[i] * u
+
+        own_reach, opp_reach = (reach0, reach1) if player == 0 else (reach1, reach0)
+        sign = 1.0 if player == 0 else -1.0
+        for i in range(n):
+            regret_delta[base + i] += chance * opp_reach * sign * (utils[i] - node_util)
+            strategy_delta[base + i] += weight * chance * own_reach * sigma[i]
+        return node_util
+
+    for b0, b1, probability, equity in pairs:
+        walk((), b0, b1, equity, 1.0, 1.0, probability)
+    return regret_delta, strategy_delta
+
+
+class CFRSolver:
+    """
+    Parallel, checkpointed CFR+ solver over the strategy_table abstraction.
+    """
+
+    def __init__(self, num_buckets: int = 10, samples: int = 100000,
+                 workers: Optional[int] = None, seed: int = 0):
+        self.num_buckets = num_buckets
+        self.samples = samples
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.iteration = 0
+        self.edges = None
+        self.chance = None
+        size = num_buckets * len(HISTORIES) * MAX_ACTIONS
+        self.regrets = [0.0] * size
+        self.strategy_sum = [0.0] * size
+
+    def run(self, iterations: int, checkpoint: Optional[str] = None,
+            checkpoint_every: int = 100, log_every: int = 100):
+        """
+        Run until `iterations` total iterations (including resumed ones) are done.
+        """
+        with Pool(self.workers) as pool:
+            if self.edges is None:
+                started = time.time()
+                self.edges = compute_bucket_edges(self.num_buckets, seed=self.seed)
+                self.chance = build_chance_model(self.edges, self.samples, pool, self.workers, self.seed)
+                print(f"Chance model: {len(self.chance['pairs'])} bucket pairs "
+                      f"from {self.samples} deals in {time.time() - started:.1f}s")
+
+            pairs = self.chance['pairs']
+            chunks = [pairs[i::self.workers] for i in range(self.workers) if pairs[i::self.workers]]
+            started = time.time()
+            start_iteration = self.iteration
+            while self.iteration < iterations:
+                self.iteration += 1
+                weight = float(self.iteration)  # linear averaging
+                results = pool.map(_cfr_chunk, [(self.regrets, chunk, weight) for chunk in chunks])
+                for regret_delta, strategy_delta in results:
+                    for i, d in enumerate(regret_delta):
+                        self.regrets[i] += d
+                    for i, d in enumerate(strategy_delta):
+                        self.strategy_sum[i] += d
+                # CFR+: regrets never go below zero
+                self.regrets = [r if r > 0 else 0.0 for r in self.regrets]
+
+                if log_every and self.iteration % log_every == 0:
+                    rate = (self.iteration - start_iteration) / (time.time() - started)
+                    print(f"iteration {self.iteration}/{iterations} ({rate:.1f} it/s)")
+                if checkpoint and checkpoint_every and self.iteration % checkpoint_every == 0:
+                    self.save_checkpoint(checkpoint)
+            if checkpoint:
+                self.save_checkpoint(checkpoint)
+
+    def average_strategy(self) -> List[float]:
+        """Normalized average strategy, flat [bucket][history][action]."""
+        strategy = [0.0] * len(self.strategy_sum)
+        nh = len(HISTORIES)
+        for bucket in range(self.num_buckets):
+            for history in HISTORIES:
+                n = len(legal_actions(history))
+                base = (bucket * nh + HISTORY_INDEX[history]) * MAX_ACTIONS
+                total = sum(self.strategy_sum[base:base + n])
+                for i in range(n):
+                    strategy[base + i] = self.strategy_sum[base + i] / total if total > 0 else 1.0 / n
+        return strategy
+
+    def write(self, path: str):
+        write_table(path, self.edges, self.average_strategy())
+
+    # ------------------- CHECKPOINTS -------------------
+
+    def save_checkpoint(self, path: str):
+        payload = {
+            'num_buckets': self.num_buckets,
+            'samples': self.samples,
+            'seed': self.seed,
+            'iteration': self.iteration,
+            'edges': self.edges,
+            'chance': self.chance,
+            'regrets': self.regrets,
+            'strategy_sum': self.strategy_sum,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_checkpoint(cls, path: str, workers: Optional[int] = None) -> "CFRSolver":
+        with open(path) as f:
+            payload = json.load(f)
+        solver = cls(payload['num_buckets'], payload['samples'], workers, payload['seed'])
+        solver.iteration = payload['iteration']
+        solver.edges = payload['edges']
+        solver.chance = {'pairs': [tuple(p) for p in payload['chance']['pairs']]}
+        solver.regrets = payload['regrets']
+        solver.strategy_sum = payload['strategy_sum']
+        return solver
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Solve the 5-card game abstraction with CFR+")
+    parser.add_argument("--buckets", type=int, default=10, help="hand-strength buckets")
+    parser.add_argument("--iterations", type=int, default=2000, help="total CFR iterations")
+    parser.add_argument("--samples", type=int, default=100000, help="deals sampled for the chance model")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint", default="cfr_checkpoint.json")
+    parser.add_argument("--checkpoint-every", type=int, default=100)
+    parser.add_argument("--resume", action="store_true", help="continue from --checkpoint")
+    parser.add_argument("--out", default="strategy_table.bin")
+    args = parser.parse_args()
+
+    if args.resume and os.path.exists(args.checkpoint):
+        solver = CFRSolver.from_checkpoint(args.checkpoint, args.workers)
+        print(f"Resuming from iteration {solver.iteration}")
+    else:
+        solver = CFRSolver(args.buckets, args.samples, args.workers, args.seed)
+    solver.run(args.iterations, args.checkpoint, args.checkpoint_every)
+    solver.write(args.out)
+    print(f"Wrote {args.out} ({solver.num_buckets} buckets, {len(HISTORIES)} nodes)")
@@ -0,0 +1,236 @@
+"""
+Decision cache for LLM-driven bots
+
+Maps a bucketed, canonical version of the decision context (hand class,
+pot odds, amount to call, stack, legal actions) plus the bot personality
+to a previously returned decision. Similar spots reuse the answer instead
+of making another LLM round trip.
+"""
+
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DecisionCache:
+    """
+    Thread-safe LRU cache of bot decisions with a TTL.
+
+    Entries are keyed with make_key(). An optional explore rate turns a
+    fraction of hits into misses so the caller asks the model again and
+    play does not become fully deterministic.
+    """
+
+    # Upper bounds for the pot-odds buckets (ratio pot:call)
+    POT_ODDS_BUCKETS = (1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+    # Upper bounds for amount_to_call as a fraction of the stack
+    CALL_FRACTION_BUCKETS = (0.0, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 900.0,
+                 explore_rate: float = 0.0, path: Optional[str] = None,
+                 save_every: int = 25, seed: Optional[int] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries before LRU eviction
+            ttl_seconds: Seconds an entry stays valid (<= 0 disables expiry)
+            explore_rate: Probability (0.0 to 1.0) that a hit is reported as a miss
+            path: Optional JSON file used to persist entries across restarts
+            save_every: Persist to disk after this many new entries
+            seed: Optional seed for the explore coin flips
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.explore_rate = explore_rate
+        self.path = path
+        self.save_every = save_every
+        self._rng = random.Random(seed)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+        self.explores = 0
+        self.expirations = 0
+        self.evictions = 0
+
+        if path:
+            self.load()
+
+    # ------------------- KEYS -------------------
+
+    @classmethod
+    def make_key(cls, context: Dict, personality: str, model: str = "") -> str:
+        """
+        Build a canonical cache key from a prepared decision context.
+
+        Args:
+            context: Dict produced by GeminiBot._prepare_context
+            personality: Bot personality name
+            model: Model name, so different models never share answers
+
+        Returns:
+            str: Stable key for the bucketed situation
+        """
+        money = max(0, int(context.get('money', 0)))
+        amount_to_call = max(0, int(context.get('amount_to_call', 0)))
+        call_fraction = amount_to_call / money if money > 0 else 1.0
+
+        parts = [
+            model,
+            personality,
+            context.get('hand_name', ''),
+            str(context.get('hand_ranking', 0)),
+            "odds%d" % cls._bucket(context.get('pot_odds', float('inf')), cls.POT_ODDS_BUCKETS),
+            "call%d" % cls._bucket(call_fraction, cls.CALL_FRACTION_BUCKETS),
+            "stack%d" % cls._stack_bucket(money),
+            "+".join(sorted(context.get('available_actions', []))),
+        ]
+        return "|".join(parts)
+
+    @staticmethod
+    def _bucket(value: float, bounds) -> int:
+        """Return index of the first bound >= value (len(bounds) if none)."""
+        if value is None or (isinstance(value, float) and math.isinf(value)):
+            return len(bounds)
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                return i
+        return len(bounds)
+
+    @staticmethod
+    def _stack_bucket(money: int) -> int:
+        """Log2 buckets of the stack in units of 100 chips."""
+        if money <= 0:
+            return 0
+        return int(math.log2(money / 100 + 1))
+
+    # ------------------- LOOKUP -------------------
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a decision.
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            dict|None: Copy of the cached decision, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.ttl_seconds > 0 and time.time() - entry['stored_at'] > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if self.explore_rate > 0 and self._rng.random() < self.explore_rate:
+                self.explores += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry['decision'])
+
+    def put(self, key: str, decision: Dict):
+        """
+        Store a decision, evicting the least recently used entry if full.
+
+        Args:
+            key: Key from make_key()
+            decision: Parsed decision dict (action, amount, reasoning, confidence)
+        """
+        stored = {
+            'action': decision.get('action'),
+            'amount': decision.get('amount'),
+            'amount_fraction': decision.get('amount_fraction'),
+            'reasoning': decision.get('reasoning', ''),
+            'confidence': decision.get('confidence', 0.0),
+        }
+        should_save = False
+        with self._lock:
+            self._entries[key] = {'decision': stored, 'stored_at': time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._unsaved += 1
+            if self.path and self._unsaved >= self.save_every:
+                should_save = True
+        if should_save:
+            self.save()
+
+    def clear(self):
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ------------------- PERSISTENCE -------------------
+
+    def save(self, path: Optional[str] = None):
+        """Write all live entries to disk as JSON (atomic replace)."""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            payload = [[k, v] for k, v in self._entries.items()]
+            self._unsaved = 0
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({'version': 1, 'entries': payload}, f)
+        os.replace(tmp_path, path)
+
+    def load(self, path: Optional[str] = None):
+        """Load entries from disk, skipping expired ones. Missing file is a no-op."""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load decision cache from %s: %s", path, e)
+            return
+        now = time.time()
+        with self._lock:
+            for key, entry in payload.get('entries', []):
+                if self.ttl_seconds > 0 and now - entry.get('stored_at', 0) > self.ttl_seconds:
+                    continue
+                self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # ------------------- METRICS -------------------
+
+    def stats(self) -> Dict:
+        """
+        Get cache counters.
+
+        Returns:
+            dict: hits, misses, explores, expirations, evictions, size and hit_rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'explores': self.explores,
+            'expirations': self.expirations,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
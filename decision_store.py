@@ -0,0 +1,163 @@
+"""
+Persistent decision analytics store
+
+Bots hand decision records to DecisionStore.record(), which only puts them
+on a bounded queue. A background writer thread batches them into an
+append-only SQLite table in WAL mode, so the hot path never waits on disk
+and aggregate queries can run while the game is writing.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class DecisionStore:
+    """
+    Batched, append-only decision log backed by SQLite (WAL).
+    """
+
+    COLUMNS = ("ts", "bot", "personality", "hand_class", "action", "amount",
+               "confidence", "latency_ms", "source", "is_fallback", "cache_hit")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS decisions (
+            ts REAL NOT NULL,
+            bot TEXT,
+            personality TEXT,
+            hand_class TEXT,
+            action TEXT,
+            amount INTEGER,
+            confidence REAL,
+            latency_ms REAL,
+            source TEXT,
+            is_fallback INTEGER NOT NULL DEFAULT 0,
+            cache_hit INTEGER NOT NULL DEFAULT 0
+        )
+    """
+
+    def __init__(self, path: str, batch_size: int = 500,
+                 flush_interval: float = 1.0, max_queue: int = 100000):
+        """
+        Open (or create) the store and start the writer thread.
+
+        Args:
+            path: SQLite database file
+            batch_size: Rows per transaction
+            flush_interval: Max seconds a record waits before being written
+            max_queue: Records buffered in memory; beyond this new records are dropped
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.dropped = 0
+
+        conn = self._connect()
+        conn.execute(self.SCHEMA)
+        conn.execute("CREATE INDEX IF NOT EXISTS decisions_ts ON decisions (ts)")
+        conn.commit()
+        conn.close()
+
+        self._stopped = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="decision-store", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record(self, decision: Dict):
+        """
+        Queue one decision record (never blocks).
+
+        Args:
+            decision: Dict with any of COLUMNS; missing ones are stored as NULL
+        """
+        row = tuple(decision.get(col) for col in self.COLUMNS[1:])
+        try:
+            self._queue.put_nowait((decision.get("ts") or time.time(),) + row)
+        except queue.Full:
+            self.dropped += 1
+
+    # ------------------- WRITER -------------------
+
+    def _run(self):
+        conn = self._connect()
+        placeholders = ",".join("?" * len(self.COLUMNS))
+        sql = f"INSERT INTO decisions ({','.join(self.COLUMNS)}) VALUES ({placeholders})"
+        while not (self._stopped.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                conn.executemany(sql, batch)
+                conn.commit()
+                self.written += len(batch)
+        conn.close()
+
+    def _next_batch(self) -> List:
+        """Wait for the first row, then take more until the batch is full or the interval passes."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def close(self):
+        """Flush everything queued and stop the writer."""
+        self._stopped.set()
+        self._writer.join()
+
+    # ------------------- QUERIES -------------------
+
+    def query(self, sql: str, params=()) -> List[tuple]:
+        """Run a read-only query on a separate connection (safe while writing)."""
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def summary(self, since: Optional[float] = None) -> List[Dict]:
+        """
+        Aggregate decisions by hand class, action and source.
+
+        Args:
+            since: Optional unix timestamp lower bound
+
+        Returns:
+            list: Dicts with count, avg_amount, avg_confidence and avg_latency_ms
+        """
+        rows = self.query(
+            """
+            SELECT hand_class, action, source, COUNT(*), AVG(amount),
+                   AVG(confidence), AVG(latency_ms)
+            FROM decisions WHERE ts >= ?
+            GROUP BY hand_class, action, source
+            ORDER BY COUNT(*) DESC
+            """,
+            (since or 0,),
+        )
+        keys = ("hand_class", "action", "source", "count", "avg_amount",
+                "avg_confidence", "avg_latency_ms")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def stats(self) -> Dict:
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'queued': self._queue.qsize(),
+        }
@@ -3,8 +3,10 @@ from game_logic import gen_card
 class Deck:
     """Manages a deck of cards for dealing hands."""
 
-    def __init__(self):
+    def __init__(self, rng=None):
+        """rng: optional random.Random; a seeded one deals the same cards every time."""
         self.dealt_cards = []
+        self.rng = rng
 
     def reset(self):
         """Resets the deck for a new game."""
@@ -12,9 +14,9 @@ class Deck:
 
     def deal_unique_card(self):
         """Deals a single unique card that hasn't been dealt yet. Returns a Card object."""
-        card = gen_card()
+        card = gen_card(self.rng)
         while card.id in self.dealt_cards:
-            card = gen_card()
+            card = gen_card(self.rng)
 
         self.dealt_cards.append(card.id)
         return card
@@ -0,0 +1,267 @@
+"""
+Table flow for the poker game
+
+Turn order, bot decisions, showdown and payout for one table state dict
+(the layout built by app.make_state). Kept free of Flask so the
+same rules can run on cloned states (speculation) and outside a request.
+
+The betting rules themselves are the pure reducer in table_core: every
+action here is applied there and written back to the seat objects, and
+table_core.table_from_state is a cheap immutable snapshot of a table.
+"""
+
+import copy
+import logging
+from collections import deque
+
+from hand_evaluator import HandEvaluator
+from llm_logic import GeminiBot
+from table_core import Action, apply, settle, showdown, sync_state, table_from_state
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+@traced()
+def evaluate_winner(state):
+    """Evaluate winner among all active players (not folded)."""
+    player = state["player"]
+    opponent = state["opponent"]
+    gemini = state.get("gemini_bot")
+    
+    # Get best hands for all players
+    p_best = HandEvaluator.evaluate_hand(player.hand) if player.hand else None
+    o_best = HandEvaluator.evaluate_hand(opponent.hand) if opponent.hand else None
+    g_best = HandEvaluator.evaluate_hand(gemini.hand) if gemini and gemini.hand else None
+    
+    active_players = []
+    if not player.is_folded and p_best:
+        active_players.append(("player", player, p_best))
+    if not opponent.is_folded and o_best:
+        active_players.append(("opponent", opponent, o_best))
+    if gemini and not gemini.is_folded and g_best:
+        active_players.append(("gemini_bot", gemini, g_best))
+    
+    if len(active_players) == 0:
+        return "tie", p_best, o_best, g_best
+    if len(active_players) == 1:
+        return active_players[0][0], p_best, o_best, g_best
+    
+    # Find winner by comparing hands
+    best_player = active_players[0]
+    for i in range(1, len(active_players)):
+        result = HandEvaluator.compare_hands(best_player[1].hand, active_players[i][1].hand)
+        if result == 2:  # Current player beats best
+            best_player = active_players[i]
+    
+    return best_player[0], p_best, o_best, g_best
+
+def get_highest_bet(state):
+    """Get the highest current bet among all players."""
+    bets = [state["player"].current_bet, state["opponent"].current_bet]
+    if state.get("gemini_bot"):
+        bets.append(state["gemini_bot"].current_bet)
+    return max(bets)
+
+def all_players_held_or_folded(state):
+    """Check if all active players have held or folded."""
+    player_done = state.get("player_held") or state["player"].is_folded
+    opponent_done = state.get("opponent_held") or state["opponent"].is_folded
+    gemini_done = True
+    if state.get("gemini_bot"):
+        gemini_done = state.get("gemini_held") or state["gemini_bot"].is_folded
+    return player_done and opponent_done and gemini_done
+
+
+@traced()
+def process_ai_turns_in_order(state, run_gemini: bool = True, deadline=None, decisions=None):
+    """Always act in order: human already acted -> opponent bot -> Gemini.
+
+    The `run_gemini` flag gates calling the Gemini API to avoid unnecessary
+    calls. Set to True only when it's the bot's turn after a player action
+    that advances the round (e.g., hold or raise). `deadline` is the
+    request's latency budget, shared by every bot decision in it.
+    `decisions` is passed through to process_ai_decision."""
+    opponent = state["opponent"]
+    gemini_bot = state.get("gemini_bot")
+
+    highest_bet = get_highest_bet(state)
+
+    if hasattr(opponent, 'decide_action') and not state.get("opponent_held"):
+        process_ai_decision(opponent, "opponent", state, highest_bet, deadline, decisions)
+        highest_bet = get_highest_bet(state)
+
+    if run_gemini and gemini_bot and hasattr(gemini_bot, 'decide_action') and not state.get("gemini_held"):
+        process_ai_decision(gemini_bot, "gemini", state, highest_bet, deadline, decisions)
+
+class _BettingRound:
+    __slots__ = ("current_bet",)
+
+    def __init__(self, current_bet):
+        self.current_bet = current_bet
+
+
+class MockBettingManager:
+    def __init__(self, pot, current_bet):
+        self.pot = pot
+        self.current_round = _BettingRound(current_bet)
+
+    def get_pot(self):
+        return self.pot
+
+
+class MockGameState:
+    """The game_state shape GeminiBot.decide_action reads."""
+
+    def __init__(self, pot, current_bet):
+        self.betting_manager = MockBettingManager(pot, current_bet)
+
+
+@traced()
+def process_ai_decision(ai_player, ai_name, state, _highest_bet, deadline=None, decisions=None):
+    """Process an AI player's decision.
+
+    If `decisions` (a dict keyed by ai_name) already holds a decision for
+    this bot it is applied instead of asking the bot, otherwise the bot's
+    fresh decision is recorded into it. Speculation uses this to replay
+    decisions precomputed on a cloned state."""
+    simple_state = {
+        'pot': state["pot"],
+        'player_bet': state["player"].current_bet,
+        'opponent_bet': state["opponent"].current_bet
+    }
+    if state.get("gemini_bot"):
+        simple_state['gemini_bet'] = state["gemini_bot"].current_bet
+    simple_state['folded'] = [name for name, seat in (("player", state["player"]),
+                                                      ("opponent", state["opponent"]),
+                                                      ("gemini", state.get("gemini_bot")))
+                              if seat and seat.is_folded]
+    
+    current_highest_for_mock = get_highest_bet(state)
+    gemini_state = MockGameState(state["pot"], current_highest_for_mock)
+
+    model = state.get("opponent_model")
+    ai_player.opponent_model = model
+    ai_player.seat = ai_name
+    bet_before = ai_player.current_bet
+    facing_bet = current_highest_for_mock > bet_before
+    
+    try:
+        if decisions is not None and ai_name in decisions:
+            ai_action, ai_amount = decisions[ai_name]
+        elif isinstance(ai_player, GeminiBot):
+            ai_action, ai_amount = ai_player.decide_action(gemini_state, ai_player, deadline=deadline)
+        else:
+            ai_action, ai_amount = ai_player.decide_action(simple_state, ai_player)
+        if decisions is not None:
+            decisions[ai_name] = (ai_action, ai_amount)
+
+        _commit(state, Action(ai_name, ai_action, ai_amount or 0))
+
+        if model is not None:
+            model.record_action(ai_name, ai_action, ai_player.current_bet - bet_before, facing_bet)
+
+    except Exception as e:
+        logger.warning("AI decision error for %s: %s", ai_name, e, extra={'hand': state.get("seed")})
+        # Call if affordable, otherwise stop acting without betting
+        call_needed = max(0, get_highest_bet(state) - ai_player.current_bet)
+        _commit(state, Action(ai_name, "call" if ai_player.money >= call_needed else "stand"))
+
+
+def _commit(state, action) -> bool:
+    """
+    Apply one action to a state dict through the table_core reducer.
+
+    Returns:
+        bool: False if the reducer rejected (or ignored) the action
+    """
+    before = table_from_state(state)
+    after = apply(before, action)
+    if after is before:
+        return False
+    sync_state(state, after, before)
+    return True
+
+
+def apply_player_action(state, action, amount=0, deadline=None, decisions=None):
+    """
+    Apply the human player's action, let the bots respond and settle the
+    hand once everyone has held or folded.
+
+    Args:
+        state: Table state dict
+        action: 'raise', 'call', 'fold' or 'hold'
+        amount: Raise amount (ignored for other actions)
+        deadline: Optional Deadline for the bot decisions this action triggers
+        decisions: Optional dict of bot decisions to replay / record (see process_ai_decision)
+
+    Returns:
+        bool: False if the action was rejected (hold while behind), True otherwise
+    """
+    player = state["player"]
+    model = state.get("opponent_model")
+    bet_before = player.current_bet
+    facing_bet = get_highest_bet(state) > bet_before
+
+    if not _commit(state, Action("player", action, amount, human=True)):
+        return False
+    if model is not None and action in ("raise", "call", "fold", "hold"):
+        model.record_action("player", action, player.current_bet - bet_before, facing_bet)
+
+    if action in ("raise", "hold"):
+        # After a raise, or a hold once matched, the bots act (Gemini included);
+        # a call or fold does not trigger Gemini
+        process_ai_turns_in_order(state, run_gemini=True, deadline=deadline, decisions=decisions)
+
+    if all_players_held_or_folded(state):
+        settle_hand(state)
+    return True
+
+
+def settle_hand(state):
+    """Pick the winner, pay out the pot and mark the hand finished."""
+    table = table_from_state(state)
+    outcome = showdown(table)
+    record_showdown(state, dict(zip(("player", "opponent", "gemini"), outcome[1])))
+    sync_state(state, settle(table, outcome), table)
+
+
+def record_showdown(state, best_hands):
+    """Feed the hands shown down (2+ players left) into the table's opponent model."""
+    model = state.get("opponent_model")
+    if model is None:
+        return
+    seats = {"player": state["player"], "opponent": state["opponent"], "gemini": state.get("gemini_bot")}
+    shown = [name for name, seat in seats.items() if seat and not seat.is_folded and best_hands.get(name)]
+    if len(shown) < 2:
+        return
+    for name in shown:
+        hand_name = best_hands[name][0]
+        model.record_showdown(name, HandEvaluator.HAND_RANKINGS.get(hand_name, 1), seats[name].current_bet)
+
+
+def clone_state(state):
+    """
+    Copy a table state cheaply enough to play out hypothetical actions.
+
+    Seats are shallow-copied (their hands copied), so bots keep sharing
+    their LLM backend, caches and breakers with the real table, but chip
+    counts and flags are independent, as is the opponent model. Gemini clones get a private decision
+    history and no stats or decision store, so speculative turns are not
+    logged as real.
+    """
+    clone = dict(state)
+    if state.get("opponent_model") is not None:
+        clone["opponent_model"] = state["opponent_model"].copy()
+    for key in ("player", "opponent", "gemini_bot"):
+        seat = state.get(key)
+        if seat is None:
+            continue
+        seat_copy = copy.copy(seat)
+        seat_copy.hand = list(seat.hand)
+        if isinstance(seat_copy, GeminiBot):
+            seat_copy.decision_history = deque(maxlen=seat.decision_history.maxlen)
+            seat_copy.path_stats = None
+            seat_copy.decision_store = None
+        clone[key] = seat_copy
+    return clone
@@ -67,11 +67,11 @@ class Card:
         rank_names = {1: "Ace", 11: "Jack", 12: "Queen", 13: "King"}
         return rank_names.get(self.rank, str(self.rank))
 
-#generate a random card
-def gen_card():
+#generate a random card (rng: optional random.Random, default the global one)
+def gen_card(rng=None):
     card = Card()
     #every card in deck has unique id through 52, decipher which is which accordingly:
-    card_num = random.randint(1, 52)
+    card_num = (rng or random).randint(1, 52)
     card.id = card_num
     # modulo 13 to get rank, +1 to adjust for ace high
     card.rank = (card_num % 13) + 1
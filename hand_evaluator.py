@@ -211,6 +211,8 @@ def hand_type(hand):
 
 def win_prob(hand):
     type, rank = HandEvaluator.evaluate_hand(hand)
+    if type == "Two Pair":
+        rank = rank // 100  # evaluate_hand encodes high_pair * 100 + low_pair
     if (type == "Royal Flush"):
         return 1
     
@@ -285,7 +287,7 @@ def win_prob(hand):
             return prob
            
     if (type == "Full House"):
-        if (rank == 13): #A
+        if (rank == 14): #A
             prob = (2598344 -(312*1))/2598960
             return prob
         if (rank == 13): #K
@@ -321,9 +323,12 @@ def win_prob(hand):
         if (rank == 3):
             prob = (2598344 -(312*12))/2598960
             return prob
+        if (rank == 2):
+            prob = (2598344 -(312*13))/2598960
+            return prob
     
     if (type == "Flush"):
-        if (rank == 13): #A
+        if (rank == 14): #A
             prob = (2594600 -(572*0))/2598960
             return prob
         if (rank == 13): #K
@@ -353,7 +358,7 @@ def win_prob(hand):
         
     
     if (type == "Straight"):
-        if (rank == 13): #A
+        if (rank == 14): #A
             prob = (2589444 - (1020*1))/2598960
             return prob
         if (rank == 13): #K
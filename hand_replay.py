@@ -0,0 +1,215 @@
+"""
+Recorded hands and deterministic replay
+
+Every hand is dealt from a Deck seeded with a per-hand seed, so a hand is
+fully described by that seed, the starting stacks, the human's actions and
+the bot decisions each action triggered. Records are one compact JSON line:
+
+    {"v":1,"seed":...,"stacks":[1000,1000,1000],"bots":["BaseAIPlayer","GeminiBot"],
+     "cards":[...15 card ids...],
+     "actions":[["raise",30,{"opponent":["call",null],"gemini":["fold",null]}], ...],
+     "result":"player","final":[1030,970,1000]}
+
+The replayer rebuilds each hand with stand-in bots, feeds the recorded
+decisions back through game_flow, checks that cards, winner and stacks
+come out identical, and times each phase. A corpus of production hands is
+then a realistic, repeatable workload for benchmarking engine changes.
+
+Usage:
+    python hand_replay.py hands.jsonl --repeat 5
+"""
+
+import argparse
+import json
+import random
+import secrets
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from ai_player import BaseAIPlayer
+from deck import Deck
+from game_flow import apply_player_action
+from player import Player
+
+FORMAT_VERSION = 1
+SEATS = ("player", "opponent", "gemini_bot")
+PHASES = ("deal", "actions", "verify")
+
+
+# ------------------- DEALING -------------------
+
+def new_hand_seed() -> int:
+    return secrets.randbits(63)
+
+
+def deal_hand(state, seed: Optional[int] = None):
+    """
+    Deal a new hand to every seat from a deck seeded with `seed` and start
+    recording it. Seats must already be reset for the new round.
+    """
+    seed = new_hand_seed() if seed is None else seed
+    deck = Deck(rng=random.Random(seed))
+    state["deck"] = deck
+    state["seed"] = seed
+    seats = [state[key] for key in SEATS if state.get(key) is not None]
+    for seat in seats:
+        seat.receive_hand(deck.deal_hand(5))
+    state["recording"] = {
+        'v': FORMAT_VERSION,
+        'seed': seed,
+        'stacks': [seat.money for seat in seats],
+        'bots': [type(seat).__name__ for seat in seats[1:]],
+        'cards': list(deck.dealt_cards),
+        'actions': [],
+    }
+
+
+# ------------------- RECORDING -------------------
+
+def record_action(state, action: str, amount: int, decisions: Optional[Dict]):
+    """Append an accepted human action and the bot decisions it triggered."""
+    recording = state.get("recording")
+    if recording is not None:
+        recording['actions'].append([action, amount, dict(decisions or {})])
+
+
+def finish_recording(state) -> Optional[Dict]:
+    """Close the hand's record once it is finished; returns it (only once)."""
+    recording = state.pop("recording", None)
+    if recording is None:
+        return None
+    recording['result'] = state.get("result")
+    recording['final'] = [state[key].money for key in SEATS if state.get(key) is not None]
+    return recording
+
+
+class HandRecorder:
+    """Appends finished hand records to a JSON-lines corpus file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    def append(self, record: Dict):
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+            self.recorded += 1
+
+    def stats(self) -> Dict:
+        return {'path': self.path, 'recorded': self.recorded}
+
+
+def load_corpus(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ------------------- REPLAY -------------------
+
+def _replay_state(record: Dict):
+    """Table state with the recorded stacks; bots are stand-ins whose decisions are replayed."""
+    stacks = record['stacks']
+    state = {
+        "player": Player("You", starting_money=stacks[0], is_bot=False),
+        "opponent": BaseAIPlayer("Opponent", money=stacks[1], rng=random.Random(record['seed'])),
+        "gemini_bot": None,
+        "pot": 0,
+        "player_held": False,
+        "opponent_held": False,
+        "gemini_held": False,
+        "status": "playing",
+        "result": None,
+        "version": 0,
+    }
+    if len(stacks) > 2:
+        state["gemini_bot"] = BaseAIPlayer("Gemini", money=stacks[2], rng=random.Random(record['seed'] + 1))
+    return state
+
+
+def replay_hand(record: Dict) -> Dict:
+    """
+    Re-execute one recorded hand.
+
+    Returns:
+        dict: ok, mismatch (None or a description) and per-phase seconds
+    """
+    if record.get('v') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported hand record version: {record.get('v')}")
+    timings = {}
+
+    started = time.perf_counter()
+    state = _replay_state(record)
+    deal_hand(state, record['seed'])
+    timings['deal'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for action, amount, decisions in record['actions']:
+        replayed = {name: tuple(decision) for name, decision in decisions.items()}
+        apply_player_action(state, action, amount, decisions=replayed)
+        if replayed.keys() != decisions.keys():
+            # A bot acted that had no recorded decision: the stand-in's choice is not the original
+            timings['actions'] = time.perf_counter() - started
+            return {'ok': False, 'mismatch': f"unrecorded bot decision after {action}", 'timings': timings}
+    timings['actions'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = finish_recording(state)
+    mismatch = None
+    if state["deck"].dealt_cards != record['cards']:
+        mismatch = "dealt cards differ"
+    elif state["status"] != "finished" and record.get('result') is not None:
+        mismatch = "hand did not finish"
+    elif result['result'] != record.get('result'):
+        mismatch = f"winner {result['result']} != {record.get('result')}"
+    elif record.get('final') is not None and result['final'] != record['final']:
+        mismatch = f"stacks {result['final']} != {record['final']}"
+    timings['verify'] = time.perf_counter() - started
+    return {'ok': mismatch is None, 'mismatch': mismatch, 'timings': timings}
+
+
+def replay_corpus(records: Iterable[Dict], repeat: int = 1) -> Dict:
+    """
+    Replay every record `repeat` times.
+
+    Returns:
+        dict: hands, mismatches (index and reason, first pass only),
+        seconds per phase and hands per second
+    """
+    records = list(records)
+    totals = {phase: 0.0 for phase in PHASES}
+    mismatches = []
+    hands = 0
+    started = time.perf_counter()
+    for rep in range(repeat):
+        for i, record in enumerate(records):
+            outcome = replay_hand(record)
+            hands += 1
+            for phase, seconds in outcome['timings'].items():
+                totals[phase] += seconds
+            if not outcome['ok'] and rep == 0:
+                mismatches.append({'index': i, 'reason': outcome['mismatch']})
+    elapsed = time.perf_counter() - started
+    return {
+        'hands': hands,
+        'mismatches': mismatches,
+        'seconds': elapsed,
+        'hands_per_sec': hands / elapsed if elapsed > 0 else 0.0,
+        'phase_seconds': totals,
+        'phase_us_per_hand': {p: s / hands * 1e6 if hands else 0.0 for p, s in totals.items()},
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay recorded hands and check the outcomes")
+    parser.add_argument("corpus", help="JSON-lines file written with HAND_RECORD_PATH")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the corpus")
+    args = parser.parse_args()
+
+    summary = replay_corpus(load_corpus(args.corpus), args.repeat)
+    print(json.dumps(summary, indent=2))
+    if summary['mismatches']:
+        raise SystemExit(1)
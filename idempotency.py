@@ -0,0 +1,175 @@
+"""
+Idempotent action submission
+
+A client that times out on POST /api/action (easily done while a Gemini
+turn runs) cannot tell whether its raise was applied, and retrying it
+blindly would bet twice. Clients therefore send an idempotency key per
+action (the Idempotency-Key header, or "request_id" in the body) and reuse
+it on every retry of that action:
+
+- each table keeps a bounded window of its most recent keys with the
+  serialized response each one got; a key already in the window is
+  answered from it without running the action again;
+- a retry arriving while the first attempt is still running waits for it
+  (and then gets its reply) instead of running alongside it;
+- reusing a key for a different action or amount is an error.
+
+The window lives in the table state, so with a shared table store it is
+stored with the table document and every worker sees the same keys.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(Exception):
+    """Raised when a key is reused for a different request."""
+
+
+class IdempotencyInFlight(Exception):
+    """Raised when the first request with a key is still running after the wait."""
+
+
+class ReplyWindow:
+    """
+    One table's most recent idempotency keys and their replies, oldest first.
+
+    A reply is (fingerprint, body, mimetype); the body is the response's
+    text, which keeps the window JSON-serializable for the table store.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._replies = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[str, str, str]]:
+        return self._replies.get(key)
+
+    def put(self, key: str, fingerprint: str, body: str, mimetype: str):
+        self._replies[key] = (fingerprint, body, mimetype)
+        self._replies.move_to_end(key)
+        while len(self._replies) > self.max_entries:
+            self._replies.popitem(last=False)
+
+    def __len__(self):
+        return len(self._replies)
+
+    def to_list(self) -> List[List[str]]:
+        return [[key, *reply] for key, reply in self._replies.items()]
+
+    @classmethod
+    def from_list(cls, items: List[List[str]], max_entries: int = 16) -> "ReplyWindow":
+        window = cls(max_entries)
+        for key, fingerprint, body, mimetype in items[-max_entries:]:
+            window._replies[key] = (fingerprint, body, mimetype)
+        return window
+
+
+def request_fingerprint(action, amount) -> str:
+    """What a retry must repeat for its key to be accepted."""
+    return f"{action}:{amount}"
+
+
+class Idempotency:
+    """
+    Reply windows of the tables (kept in each state as "replies") and the
+    keys currently being run by this process.
+    """
+
+    def __init__(self, window: int = 16, wait_seconds: float = 30.0):
+        """
+        Args:
+            window: Keys (with their replies) remembered per table
+            wait_seconds: How long a retry waits for the running first attempt
+        """
+        self.window = window
+        self.wait_seconds = wait_seconds
+        self._running: Dict[Tuple[str, str], threading.Event] = {}
+        self._lock = threading.Lock()
+        self.stored = 0
+        self.replays = 0
+        self.conflicts = 0
+        self.waits = 0
+
+    @classmethod
+    def from_env(cls) -> "Idempotency":
+        """IDEMPOTENCY_WINDOW (keys per table), IDEMPOTENCY_WAIT_SECONDS."""
+        return cls(window=int(os.environ.get("IDEMPOTENCY_WINDOW", 16)),
+                   wait_seconds=float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", 30)))
+
+    @contextmanager
+    def running(self, table_id: str, key: Optional[str]):
+        """
+        Hold a key for one request; another request with the same key on the
+        same table waits until it is released.
+        """
+        if not key:
+            yield
+            return
+        slot = (table_id, key)
+        while True:
+            with self._lock:
+                event = self._running.get(slot)
+                if event is None:
+                    self._running[slot] = threading.Event()
+                    break
+                self.waits += 1
+            if not event.wait(self.wait_seconds):
+                raise IdempotencyInFlight(f"Request {key} is still being processed")
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._running.pop(slot).set()
+
+    def lookup(self, state, key: Optional[str], fingerprint: str) -> Optional[Tuple[str, str]]:
+        """
+        The stored (body, mimetype) for a key on this table, or None.
+
+        Raises:
+            IdempotencyConflict: The key was used for a different request
+        """
+        window = state.get("replies") if key else None
+        reply = window.get(key) if window is not None else None
+        if reply is None:
+            return None
+        if reply[0] != fingerprint:
+            self.conflicts += 1
+            raise IdempotencyConflict(f"Idempotency key {key} was used for a different request")
+        self.replays += 1
+        return reply[1], reply[2]
+
+    def remember(self, state, key: Optional[str], fingerprint: str, response):
+        """
+        Store a response as the reply for a key on this table.
+
+        Runs inside the table update, which may be retried; the caller
+        counts the reply once with record_stored() after it is written.
+        """
+        if not key:
+            return
+        window = state.get("replies")
+        if window is None:
+            window = state["replies"] = ReplyWindow(self.window)
+        window.max_entries = self.window
+        window.put(key, fingerprint, response.get_data(as_text=True), response.mimetype)
+
+    def record_stored(self):
+        self.stored += 1
+
+    def stats(self) -> Dict:
+        return {
+            'window': self.window,
+            'stored': self.stored,
+            'replays': self.replays,
+            'conflicts': self.conflicts,
+            'waits': self.waits,
+            'running': len(self._running),
+        }
@@ -0,0 +1,450 @@
+"""
+LLM backends for the Gemini bot
+
+GeminiBot talks to an LLMBackend instead of a hard-wired genai client.
+GeminiBackend is the production implementation. FakeBackend and
+MockLLMServer/HTTPBackend are offline stand-ins with configurable
+latency, 503 overloads and canned JSON decisions, for load tests and CI.
+
+Run a stand-in server:
+    python llm_backends.py --port 8099 --latency lognormal:600:0.4 --error-rate 0.05
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Union
+
+
+class BackendOverloadedError(Exception):
+    """Raised when the provider (or stand-in) answers 503 / UNAVAILABLE."""
+
+    def __init__(self, message: str = "model is overloaded"):
+        super().__init__(f"503 UNAVAILABLE: {message}")
+
+
+class LLMResponse(NamedTuple):
+    """Response text plus token counts reported (or estimated) by the backend."""
+    text: str
+    prompt_tokens: int
+    output_tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for backends that do not report usage."""
+    return (len(text) + 3) // 4
+
+
+class LLMBackend(ABC):
+    """
+    Abstract text-generation backend.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, prompt: str, model: str) -> str:
+        """
+        Generate a response for a prompt.
+
+        Args:
+            prompt: Full prompt text
+            model: Model name requested by the bot
+
+        Returns:
+            str: Raw response text
+
+        Raises:
+            BackendOverloadedError: Provider is overloaded (retryable)
+            Exception: Any other provider error
+        """
+
+    def generate_structured(self, prompt: str, model: str,
+                            system_instruction: Optional[str] = None,
+                            response_schema: Optional[Dict] = None) -> LLMResponse:
+        """
+        Generate a JSON response constrained to a schema.
+
+        Backends without native support send the system instruction as a
+        prompt prefix and rely on the prompt to get JSON back.
+
+        Args:
+            prompt: Per-turn prompt text
+            model: Model name requested by the bot
+            system_instruction: Static instructions, kept separate so the
+                provider can cache them
+            response_schema: Schema of the expected JSON object
+
+        Returns:
+            LLMResponse with the JSON text and token counts
+        """
+        full_prompt = f"{system_instruction}\n\n{prompt}" if system_instruction else prompt
+        text = self.generate(full_prompt, model)
+        return LLMResponse(text, estimate_tokens(full_prompt), estimate_tokens(text))
+
+    def generate_stream(self, prompt: str, model: str,
+                        system_instruction: Optional[str] = None,
+                        response_schema: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Generate a response incrementally, yielding text chunks as they arrive.
+
+        The default implementation yields the whole response as one chunk.
+        The request is sent when iteration starts.
+        """
+        if system_instruction or response_schema:
+            yield self.generate_structured(prompt, model, system_instruction, response_schema).text
+        else:
+            yield self.generate(prompt, model)
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Backend using Google's Gemini API (google-genai).
+    Requires GEMINI_API_KEY environment variable to be set.
+    """
+
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None):
+        if api_key:
+            os.environ['GEMINI_API_KEY'] = api_key
+        if 'GEMINI_API_KEY' not in os.environ:
+            raise ValueError(
+                "GEMINI_API_KEY not found. Please set it.\n"
+                "Or pass api_key parameter to constructor."
+            )
+        from google import genai
+        self.client = genai.Client()
+
+    def generate(self, prompt: str, model: str) -> str:
+        response = self.client.models.generate_content(model=model, contents=prompt)
+        return response.text.strip()
+
+    def generate_structured(self, prompt: str, model: str,
+                            system_instruction: Optional[str] = None,
+                            response_schema: Optional[Dict] = None) -> LLMResponse:
+        config = {"response_mime_type": "application/json"}
+        if system_instruction:
+            config["system_instruction"] = system_instruction
+        if response_schema:
+            config["response_schema"] = response_schema
+        response = self.client.models.generate_content(model=model, contents=prompt, config=config)
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None) or estimate_tokens(prompt)
+        output_tokens = getattr(usage, "candidates_token_count", None) or estimate_tokens(response.text)
+        return LLMResponse(response.text.strip(), prompt_tokens, output_tokens)
+
+    def generate_stream(self, prompt: str, model: str,
+                        system_instruction: Optional[str] = None,
+                        response_schema: Optional[Dict] = None) -> Iterator[str]:
+        config = {}
+        if system_instruction:
+            config["system_instruction"] = system_instruction
+        if response_schema:
+            config["response_mime_type"] = "application/json"
+            config["response_schema"] = response_schema
+        for chunk in self.client.models.generate_content_stream(
+                model=model, contents=prompt, config=config or None):
+            if chunk.text:
+                yield chunk.text
+
+
+# ------------------- OFFLINE STAND-IN -------------------
+
+class LatencyModel:
+    """
+    Latency distribution for the stand-in backends.
+
+    Spec strings: "constant:MS", "uniform:LOW_MS:HIGH_MS",
+    "normal:MEAN_MS:STD_MS", "lognormal:MEDIAN_MS:SIGMA", "exponential:MEAN_MS".
+    """
+
+    KINDS = ("constant", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, kind: str = "constant", *params: float):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.params = [float(p) for p in params] or [0.0]
+
+    @classmethod
+    def parse(cls, spec: Union[str, "LatencyModel", None]) -> "LatencyModel":
+        """Build a LatencyModel from a spec string (or pass one through)."""
+        if isinstance(spec, LatencyModel):
+            return spec
+        if not spec:
+            return cls("constant", 0.0)
+        kind, *params = str(spec).split(":")
+        return cls(kind, *params)
+
+    def sample(self, rng: random.Random) -> float:
+        """Sample a latency in seconds."""
+        p = self.params
+        if self.kind == "constant":
+            ms = p[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(p[0], p[1] if len(p) > 1 else p[0])
+        elif self.kind == "normal":
+            ms = rng.gauss(p[0], p[1] if len(p) > 1 else 0.0)
+        elif self.kind == "lognormal":
+            ms = rng.lognormvariate(math.log(max(p[0], 1e-6)), p[1] if len(p) > 1 else 0.0)
+        else:
+            ms = rng.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+        return max(0.0, ms) / 1000.0
+
+    def __repr__(self):
+        return ":".join([self.kind] + [f"{p:g}" for p in self.params])
+
+
+def canned_decision(prompt: str) -> Dict:
+    """
+    Deterministic decision for a single-decision prompt.
+
+    Reads the "strength: N/10" line the bot puts in its prompt and mirrors
+    GeminiBot._fallback_decision, so the stand-in plays sensibly.
+    """
+    match = re.search(r'strength:\s*(\d+)/10', prompt)
+    strength = int(match.group(1)) if match else 1
+    if strength >= 7:
+        return {"action": "raise", "amount": 50, "reasoning": "strong hand", "confidence": 0.9}
+    if strength >= 4:
+        return {"action": "call", "amount": None, "reasoning": "medium hand", "confidence": 0.6}
+    return {"action": "fold", "amount": None, "reasoning": "weak hand", "confidence": 0.7}
+
+
+def canned_response(prompt: str) -> str:
+    """Canned JSON response; answers multi-decision (batched) prompts with an array."""
+    blocks = re.split(r'=== DECISION id=(\d+) ===', prompt)
+    if len(blocks) > 1:
+        items = []
+        for i in range(1, len(blocks), 2):
+            decision = canned_decision(blocks[i + 1])
+            decision['id'] = int(blocks[i])
+            items.append(decision)
+        return json.dumps(items)
+    return json.dumps(canned_decision(prompt))
+
+
+class FakeBackend(LLMBackend):
+    """
+    In-process deterministic stand-in for Gemini.
+
+    Sleeps for a sampled latency, fails with BackendOverloadedError at the
+    configured rate and otherwise returns canned JSON decisions.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: Union[str, LatencyModel, None] = None,
+                 error_rate: float = 0.0,
+                 responses: Optional[Union[List[str], Callable[[str], str]]] = None,
+                 seed: Optional[int] = 0):
+        """
+        Initialize the stand-in.
+
+        Args:
+            latency: LatencyModel or spec string (default: no delay)
+            error_rate: Probability (0.0 to 1.0) of a 503 overload per call
+            responses: Canned response texts (cycled) or a function prompt -> text;
+                defaults to canned_response()
+            seed: Seed for latency and error sampling (None = nondeterministic)
+        """
+        self.latency = LatencyModel.parse(latency)
+        self.error_rate = error_rate
+        self.responses = responses
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    # Characters per chunk when streaming
+    STREAM_CHUNK_CHARS = 16
+
+    def generate(self, prompt: str, model: str) -> str:
+        delay, overloaded, call_index = self._sample()
+        if delay:
+            time.sleep(delay)
+        if overloaded:
+            raise BackendOverloadedError("stand-in backend overloaded")
+        return self._response_text(prompt, call_index)
+
+    def generate_stream(self, prompt: str, model: str,
+                        system_instruction: Optional[str] = None,
+                        response_schema: Optional[Dict] = None) -> Iterator[str]:
+        """Yield the canned response in chunks spread evenly over the sampled latency."""
+        delay, overloaded, call_index = self._sample()
+        if overloaded:
+            raise BackendOverloadedError("stand-in backend overloaded")
+        text = self._response_text(prompt, call_index)
+        size = self.STREAM_CHUNK_CHARS
+        chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        for chunk in chunks:
+            if delay:
+                time.sleep(delay / len(chunks))
+            yield chunk
+
+    def _sample(self):
+        """Draw latency and overload outcome for one call."""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency.sample(self._rng)
+            overloaded = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if overloaded:
+                self.errors += 1
+            return delay, overloaded, self.calls - 1
+
+    def _response_text(self, prompt: str, call_index: int) -> str:
+        if callable(self.responses):
+            return self.responses(prompt)
+        if self.responses:
+            return self.responses[call_index % len(self.responses)]
+        return canned_response(prompt)
+
+
+class HTTPBackend(LLMBackend):
+    """
+    Backend that posts prompts to a MockLLMServer (or anything speaking its protocol).
+
+    Protocol: POST {url}/v1/generate with {"model": ..., "prompt": ...};
+    200 -> {"text": ...}, 503 -> overloaded.
+    """
+
+    name = "http"
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def generate(self, prompt: str, model: str) -> str:
+        body = json.dumps({"model": model, "prompt": prompt}).encode()
+        req = urllib.request.Request(
+            self.url + "/v1/generate", data=body,
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return json.loads(resp.read())["text"]
+        except urllib.error.HTTPError as e:
+            if e.code == 503:
+                raise BackendOverloadedError(f"HTTP 503 from {self.url}")
+            raise Exception(f"HTTP {e.code} from {self.url}: {e.read()[:200]!r}")
+
+
+class MockLLMServer:
+    """
+    Small local HTTP server wrapping a FakeBackend.
+
+    Use start()/stop() in tests, or run this module as a script.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 backend: Optional[FakeBackend] = None):
+        """
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            backend: FakeBackend that produces latency, errors and responses
+        """
+        self.backend = backend or FakeBackend()
+        fake = self.backend
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != "/v1/generate":
+                    self._reply(404, {"error": "not found"})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                    text = fake.generate(payload.get("prompt", ""), payload.get("model", ""))
+                except BackendOverloadedError as e:
+                    self._reply(503, {"error": str(e)})
+                    return
+                except ValueError as e:
+                    self._reply(400, {"error": str(e)})
+                    return
+                self._reply(200, {"text": text})
+
+            def _reply(self, code, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLLMServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+
+def create_backend_from_env(api_key: Optional[str] = None) -> LLMBackend:
+    """
+    Build a backend from environment variables.
+
+    LLM_BACKEND: "gemini" (default), "fake" or "http"
+    LLM_BACKEND_URL: server URL for "http"
+    FAKE_LLM_LATENCY / FAKE_LLM_ERROR_RATE / FAKE_LLM_SEED: stand-in settings for "fake"
+    """
+    kind = os.environ.get("LLM_BACKEND", "gemini").lower()
+    if kind == "fake":
+        seed = os.environ.get("FAKE_LLM_SEED")
+        return FakeBackend(
+            latency=os.environ.get("FAKE_LLM_LATENCY"),
+            error_rate=float(os.environ.get("FAKE_LLM_ERROR_RATE", 0.0)),
+            seed=int(seed) if seed else None,
+        )
+    if kind == "http":
+        return HTTPBackend(os.environ.get("LLM_BACKEND_URL", "http://127.0.0.1:8099"))
+    if kind == "gemini":
+        return GeminiBackend(api_key)
+    raise ValueError(f"Unknown LLM_BACKEND: {kind}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", default="lognormal:600:0.4",
+                        help="latency distribution spec, e.g. constant:50 or lognormal:600:0.4")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, FakeBackend(args.latency, args.error_rate, seed=args.seed))
+    print(f"Mock LLM server on {server.url} (latency={server.backend.latency}, error_rate={args.error_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
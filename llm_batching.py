@@ -0,0 +1,192 @@
+"""
+Micro-batching dispatcher for LLM bot decisions
+
+Bots at different tables submit their decision prompts here instead of
+calling Gemini directly. A background thread collects prompts for a short
+window (or until the batch is full), sends them as one multi-decision
+request and routes each parsed decision back to the bot that asked.
+"""
+
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+
+
+class DecisionBatcher:
+    """
+    Collects decision prompts and sends them to the LLM in batches.
+
+    submit() returns a Future that resolves to the JSON text of that
+    prompt's decision, so callers can pass it straight to
+    GeminiBot._parse_response(). Items missing from a partly parseable
+    batch response resolve with an exception, which the bot turns into
+    its fallback decision.
+    """
+
+    BATCH_INSTRUCTIONS = """You are making {count} independent poker decisions for different tables.
+Each DECISION block below is a separate game with its own player personality.
+Answer every block. Respond ONLY with a JSON array containing one object per decision, in this exact format:
+[{{"id": 0, "action": "call/raise/fold", "amount": 50, "reasoning": "your reasoning", "confidence": 0.8}}]
+
+"""
+
+    def __init__(self, send_fn: Callable[[str], str], window_ms: float = 25.0,
+                 max_batch_size: int = 8):
+        """
+        Initialize the dispatcher and start its worker thread.
+
+        Args:
+            send_fn: Function that sends one prompt to the LLM and returns the response text
+            window_ms: How long to wait for more prompts after the first one arrives
+            max_batch_size: Send immediately once this many prompts are pending
+        """
+        self.send_fn = send_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue = queue.Queue()
+        self._closed = False
+        self.batches_sent = 0
+        self.items_sent = 0
+        self.items_failed = 0
+        self.batch_errors = 0
+
+        self._worker = threading.Thread(target=self._run, name="decision-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, prompt: str) -> Future:
+        """
+        Queue a decision prompt.
+
+        Args:
+            prompt: Full single-decision prompt (from GeminiBot._build_prompt)
+
+        Returns:
+            Future: Resolves to the decision's JSON text
+        """
+        future = Future()
+        if self._closed:
+            future.set_exception(RuntimeError("DecisionBatcher is closed"))
+            return future
+        self._queue.put((prompt, future))
+        return future
+
+    def close(self):
+        """Stop accepting prompts; the worker exits after flushing what is queued."""
+        self._closed = True
+        self._queue.put(None)
+
+    def stats(self) -> Dict:
+        """Get dispatcher counters."""
+        return {
+            'batches_sent': self.batches_sent,
+            'items_sent': self.items_sent,
+            'items_failed': self.items_failed,
+            'batch_errors': self.batch_errors,
+            'avg_batch_size': self.items_sent / self.batches_sent if self.batches_sent else 0.0,
+            'pending': self._queue.qsize(),
+        }
+
+    # ------------------- WORKER -------------------
+
+    def _run(self):
+        """Worker loop: block for the first item, then fill the batch until the window closes."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch: List):
+        """Send one batch and resolve every future in it."""
+        self.batches_sent += 1
+        self.items_sent += len(batch)
+
+        if len(batch) == 1:
+            prompt, future = batch[0]
+            try:
+                future.set_result(self.send_fn(prompt))
+            except Exception as e:
+                self.batch_errors += 1
+                future.set_exception(e)
+            return
+
+        try:
+            response_text = self.send_fn(self._build_batch_prompt([p for p, _ in batch]))
+            decisions = self._parse_batch_response(response_text)
+        except Exception as e:
+            self.batch_errors += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for i, (_, future) in enumerate(batch):
+            decision = decisions.get(i)
+            if decision is None:
+                self.items_failed += 1
+                future.set_exception(ValueError(f"Batch response missing decision {i}"))
+            else:
+                future.set_result(json.dumps(decision))
+
+    def _build_batch_prompt(self, prompts: List[str]) -> str:
+        """Combine single-decision prompts into one multi-decision request."""
+        blocks = [self.BATCH_INSTRUCTIONS.format(count=len(prompts))]
+        for i, prompt in enumerate(prompts):
+            blocks.append(f"=== DECISION id={i} ===\n{prompt}\n")
+        blocks.append("JSON ARRAY RESPONSE:")
+        return "\n".join(blocks)
+
+    @staticmethod
+    def _parse_batch_response(response_text: str) -> Dict[int, Dict]:
+        """
+        Parse a multi-decision response into {id: decision}.
+
+        Falls back to scanning for individual JSON objects when the array
+        as a whole does not parse, so one bad item does not sink the batch.
+        """
+        text = re.sub(r'```(?:json)?\s*\n?', '', response_text, flags=re.IGNORECASE).strip()
+        items = None
+        start, end = text.find('['), text.rfind(']')
+        if start != -1 and end > start:
+            try:
+                items = json.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                items = None
+        if not isinstance(items, list):
+            items = []
+            for match in re.finditer(r'\{[^{}]*\}', text):
+                try:
+                    items.append(json.loads(match.group(0)))
+                except json.JSONDecodeError:
+                    continue
+
+        decisions = {}
+        for position, item in enumerate(items):
+            if not isinstance(item, dict) or 'action' not in item:
+                continue
+            try:
+                item_id = int(item.get('id', position))
+            except (TypeError, ValueError):
+                continue
+            decisions[item_id] = item
+        return decisions
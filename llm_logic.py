@@ -2,16 +2,35 @@
 Gemini-based poker bot implementation
 
 Uses Google's Gemini API for poker decision-making.
-Requires GEMINI_API_KEY environment variable to be set.
+Requires GEMINI_API_KEY environment variable to be set, unless another
+LLMBackend (see llm_backends) is passed in.
 """
 
+import contextvars
 import json
+import logging
 import os
 import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Tuple, Optional, Dict
-from google import genai
 from ai_player import BaseAIPlayer
 from hand_evaluator import HandEvaluator
+from decision_cache import DecisionCache
+from llm_batching import DecisionBatcher
+from llm_backends import LLMBackend, GeminiBackend
+from llm_resilience import (CircuitBreaker, Deadline, DeadlineExceeded, DecisionPathStats, LoadShed,
+                            QueueDeadlineExceeded, RateLimiter)
+from llm_streaming import StreamingDecisionParser
+from decision_store import DecisionStore
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# Runs backend calls that must respect a deadline; the caller stops waiting
+# when the budget is spent and the abandoned call finishes in the background.
+_DEADLINE_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-call")
 
 
 class GeminiBot(BaseAIPlayer):
@@ -33,10 +52,41 @@ class GeminiBot(BaseAIPlayer):
         out of pots. Raise with strong hands and occasionally with weaker hands as bluffs."""
     }
 
+    # Static part of the structured-output prompt; sent as the system
+    # instruction so the provider can cache it across turns
+    STRUCTURED_INSTRUCTIONS = """You make one poker decision per message (5-card draw, single betting round).
+Each message lists the current state. Decide call, raise, or fold, based on hand strength, pot odds and win probability.
+amount is an integer chip raise size within your stack (null unless raising). reasoning is one short sentence.
+confidence is between 0 and 1. When an "opponents" section is present, use it to exploit their tendencies
+(vpip = share of hands they put chips in, af = raises per call, showdown = average strength shown per bet size)."""
+
+    DECISION_SCHEMA = {
+        "type": "OBJECT",
+        "properties": {
+            "action": {"type": "STRING", "enum": ["call", "raise", "fold"]},
+            "amount": {"type": "INTEGER", "nullable": True},
+            "reasoning": {"type": "STRING"},
+            "confidence": {"type": "NUMBER"},
+        },
+        "required": ["action", "amount", "reasoning", "confidence"],
+        "propertyOrdering": ["action", "amount", "reasoning", "confidence"],
+    }
+
     def __init__(self, name: str, money: int = 1000,
                  model: str = "gemini-2.5-flash",
                  personality: str = "balanced",
-                 api_key: Optional[str] = None):
+                 api_key: Optional[str] = None,
+                 decision_cache: Optional[DecisionCache] = None,
+                 batcher: Optional[DecisionBatcher] = None,
+                 backend: Optional[LLMBackend] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 path_stats: Optional[DecisionPathStats] = None,
+                 structured_output: bool = False,
+                 streaming: bool = False,
+                 decision_store: Optional[DecisionStore] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 llm_priority: int = 0,
+                 history_size: int = 200):
         """
         Initialize Gemini-powered bot.
 
@@ -46,61 +96,184 @@ class GeminiBot(BaseAIPlayer):
             model: Gemini model to use (default: "gemini-2.5-flash")
             personality: "conservative", "balanced", or "aggressive"
             api_key: Gemini API key (if not provided, uses GEMINI_API_KEY env var)
+            decision_cache: Optional DecisionCache shared between bots; similar
+                situations reuse a cached decision instead of calling Gemini
+            batcher: Optional DecisionBatcher; prompts are sent together with
+                other tables' prompts instead of one request per decision
+            backend: Optional LLMBackend (default: GeminiBackend); pass a
+                FakeBackend or HTTPBackend to play offline
+            circuit_breaker: Optional CircuitBreaker shared by bots on the same
+                backend; while open, decisions use the fallback strategy
+            path_stats: Optional DecisionPathStats recording which path
+                (llm, cache or a fallback) each decision took
+            structured_output: Request schema-constrained JSON with a static
+                system instruction and a short per-turn prompt
+            streaming: Stream the response and act as soon as action (and
+                amount for a raise) are known; reasoning is filled into the
+                decision history when the stream finishes
+            decision_store: Optional DecisionStore that persists every decision
+                (including fallbacks and cache hits) in the background
+            rate_limiter: Optional RateLimiter shared by every bot in the
+                process; calls wait for a slot and fall back when shed
+            llm_priority: Queue priority of this bot's calls (higher first)
+            history_size: Number of recent decisions kept in memory
         """
         super().__init__(name, money)
         self.model_name = model
         self.personality = personality
         self.system_prompt = self.SYSTEM_PROMPTS[personality]
-        self.decision_history = []
-
-        self._initialize_client(api_key)
-
-    def _initialize_client(self, api_key: Optional[str] = None):
-        """Initialize Gemini client with API key."""
+        self.decision_history = deque(maxlen=history_size)
+        self.decision_store = decision_store
+        self.decision_cache = decision_cache
+        self.batcher = batcher
+        self.batch_timeout = 30.0
+        self.circuit_breaker = circuit_breaker
+        self.rate_limiter = rate_limiter
+        self.llm_priority = llm_priority
+        self.path_stats = path_stats
+        self.structured_output = structured_output
+        self.streaming = streaming
+        self.system_instruction = f"{self.system_prompt}\n\n{self.STRUCTURED_INSTRUCTIONS}"
+        self.last_prompt_tokens = None
+        self.token_usage = {'calls': 0, 'prompt_tokens': 0, 'output_tokens': 0}
+
+        self._initialize_client(api_key, backend)
+
+    def _initialize_client(self, api_key: Optional[str] = None,
+                           backend: Optional[LLMBackend] = None):
+        """Initialize the LLM backend (Gemini client with API key by default)."""
+        if backend is not None:
+            self.backend = backend
+            return
         try:
-            if api_key:
-                os.environ['GEMINI_API_KEY'] = api_key
-
-            if 'GEMINI_API_KEY' not in os.environ:
-                raise ValueError(
-                    "GEMINI_API_KEY not found. Please set it.\n"
-                    "Or pass api_key parameter to constructor."
-                )
-
-            self.client = genai.Client()
-            print(f"Gemini client initialized successfully!")
-
+            self.backend = GeminiBackend(api_key)
+            logger.info("Gemini client initialized")
         except Exception as e:
-            print(f"Error initializing Gemini client: {e}")
-            print("Please ensure you have set the GEMINI_API_KEY environment variable.")
+            logger.error("Error initializing Gemini client: %s (is GEMINI_API_KEY set?)", e)
             raise
 
-    def decide_action(self, game_state, player) -> Tuple[str, Optional[int]]:
+    def decide_action(self, game_state, player,
+                      deadline: Optional[Deadline] = None) -> Tuple[str, Optional[int]]:
         """
         Make a decision using Gemini API.
 
         Args:
             game_state: Current GameState object
             player: Current Player object
+            deadline: Optional Deadline from the route; when it runs out the
+                fallback strategy is used instead of waiting for Gemini
 
         Returns:
             Tuple of (action, amount) where action is 'call', 'raise', or 'fold'
         """
+        started = time.monotonic()
+        context = None
         try:
             context = self._prepare_context(game_state, player)
-            prompt = self._build_prompt(context)
-            response_text = self._call_gemini(prompt)
-            decision = self._parse_response(response_text)
+            decision, source = self._cached_decision(context, player)
+            stream = None
+            if decision is None:
+                if self.circuit_breaker and not self.circuit_breaker.allow_request():
+                    return self._fallback(game_state, player, 'fallback_circuit_open', started, context)
+                prompt = self._build_prompt(context)
+                try:
+                    if self.streaming and self.batcher is None:
+                        decision, stream, parser = self._call_gemini(
+                            prompt, deadline, call=self._open_stream
+                        )
+                        response_text = parser.text
+                    else:
+                        response_text = self._request_decision(prompt, deadline)
+                except (LoadShed, QueueDeadlineExceeded):
+                    # Turned away before reaching Gemini: not a provider failure,
+                    # but a half-open probe slot must be handed back
+                    if self.circuit_breaker:
+                        self.circuit_breaker.release_probe()
+                    raise
+                except Exception:
+                    if self.circuit_breaker:
+                        self.circuit_breaker.record_failure()
+                    raise
+                if self.circuit_breaker:
+                    self.circuit_breaker.record_success()
+                if decision is None:
+                    decision = self._parse_response(response_text)
+                self._store_decision(context, player, decision)
+                source = 'llm'
             validated_action, validated_amount = self._validate_decision(
                 decision, game_state, player
             )
 
-            self._log_decision(player, context, decision)
+            self._log_decision(player, context, decision, source)
+            if stream is not None:
+                # Act now; the reasoning keeps streaming into the decision log
+                _DEADLINE_EXECUTOR.submit(contextvars.copy_context().run, self._drain_stream,
+                                          stream, parser, self.decision_history[-1])
+            self._record_path(source, started, context, validated_action, validated_amount,
+                              decision.get('confidence'))
             return validated_action, validated_amount
+        except DeadlineExceeded as e:
+            logger.info("Gemini deadline: %s, using fallback strategy", e, extra={'bot': self.name})
+            return self._fallback(game_state, player, 'fallback_deadline', started, context)
+        except LoadShed as e:
+            logger.info("Gemini load shed: %s, using fallback strategy", e, extra={'bot': self.name})
+            return self._fallback(game_state, player, 'fallback_shed', started, context)
         except Exception as e:
-            print(f"Gemini error: {e}, using fallback strategy")
-            return self._fallback_decision(game_state, player)
+            logger.warning("Gemini error: %s, using fallback strategy", e, extra={'bot': self.name})
+            return self._fallback(game_state, player, 'fallback_error', started, context)
+
+    def _fallback(self, game_state, player, path: str, started: float,
+                  context: Optional[Dict] = None) -> Tuple[str, Optional[int]]:
+        """Use the rule-based fallback and record why."""
+        action, amount = self._fallback_decision(game_state, player)
+        self._record_path(path, started, context, action, amount)
+        return action, amount
 
+    def _record_path(self, path: str, started: float, context: Optional[Dict] = None,
+                     action: Optional[str] = None, amount: Optional[int] = None,
+                     confidence: Optional[float] = None):
+        """Count which path this decision took and how long it took, and persist it if a store is set."""
+        elapsed = time.monotonic() - started
+        if self.path_stats is not None:
+            self.path_stats.record(path, elapsed)
+        if self.decision_store is not None:
+            self.decision_store.record({
+                'bot': self.name,
+                'personality': self.personality,
+                'hand_class': context['hand_name'] if context else None,
+                'action': action,
+                'amount': amount,
+                'confidence': confidence,
+                'latency_ms': elapsed * 1000.0,
+                'source': path,
+                'is_fallback': int(path.startswith('fallback')),
+                'cache_hit': int(path == 'cache'),
+            })
+
+    def _cached_decision(self, context: Dict, player) -> Tuple[Optional[Dict], str]:
+        """Look up a cached decision for this situation, rescaling raise sizes to the current stack."""
+        if self.decision_cache is None:
+            return None, 'llm'
+        key = DecisionCache.make_key(context, self.personality, self.model_name)
+        decision = self.decision_cache.get(key)
+        if decision is None:
+            return None, 'llm'
+        fraction = decision.get('amount_fraction')
+        if decision['action'] == 'raise' and fraction:
+            decision['amount'] = max(1, int(fraction * player.money))
+        return decision, 'cache'
+
+    def _store_decision(self, context: Dict, player, decision: Dict):
+        """Remember a fresh Gemini decision; raise sizes are stored relative to the stack."""
+        if self.decision_cache is None:
+            return
+        amount = decision.get('amount')
+        if decision['action'] == 'raise' and isinstance(amount, (int, float)) and player.money > 0:
+            decision = dict(decision, amount_fraction=amount / player.money)
+        key = DecisionCache.make_key(context, self.personality, self.model_name)
+        self.decision_cache.put(key, decision)
+
+    @traced()
     def _prepare_context(self, game_state, player) -> Dict:
         """Prepare game context for Gemini."""
         hand_eval = HandEvaluator.evaluate_hand(player.hand)
@@ -134,11 +307,15 @@ class GeminiBot(BaseAIPlayer):
             'pot': pot,
             'pot_odds': pot_odds,
             'available_actions': available_actions,
-            'win_probability': win_probability
+            'win_probability': win_probability,
+            'opponents': self.opponent_model.describe(exclude=self.seat) if self.opponent_model else ''
         }
 
+    @traced()
     def _build_prompt(self, context: Dict) -> str:
         """Build decision prompt for Gemini."""
+        if self.structured_output:
+            return self._build_turn_prompt(context)
         hand_str = ", ".join([f"{card.get_rank_name()} of {card.suit}"
                               for card in context['hand']])
 
@@ -157,7 +334,7 @@ CURRENT GAME STATE:
 - Pot odds: {context['pot_odds']:.2f}:1
 - Estimated win probability: {context['win_probability']:.1%}
 - Available actions: {', '.join(context['available_actions'])}
-
+{self._opponent_section(context)}
 INSTRUCTIONS:
 1. Analyze the situation based on hand strength, pot odds, and win probability
 2. Decide: call, raise, or fold
@@ -169,27 +346,80 @@ INSTRUCTIONS:
 JSON RESPONSE:"""
         return prompt
 
-    def _call_gemini(self, prompt: str) -> str:
-        """Call Gemini API with basic retry/backoff on overload."""
-        import time
+    def _build_turn_prompt(self, context: Dict) -> str:
+        """Short per-turn state for structured-output mode (instructions live in the system instruction)."""
+        hand_str = " ".join(card_code(card) for card in context['hand'])
+        return (
+            f"hand: {hand_str}\n"
+            f"type: {context['hand_name']} (strength: {context['hand_ranking']}/10)\n"
+            f"chips: {context['money']} | to_call: {context['amount_to_call']} | "
+            f"my_bet: {context['current_bet']} | table_bet: {context['bet_to_match']} | "
+            f"pot: {context['pot']} | pot_odds: {context['pot_odds']:.2f}:1 | "
+            f"win_prob: {context['win_probability']:.0%}\n"
+            f"actions: {','.join(context['available_actions'])}"
+            + (f"\nopponents:\n{context['opponents']}" if context.get('opponents') else "")
+        )
+
+    def _opponent_section(self, context: Dict) -> str:
+        """Observed opponent tendencies for the full prompt (empty until there is history)."""
+        if not context.get('opponents'):
+            return ""
+        lines = "\n".join(f"- {line}" for line in context['opponents'].splitlines())
+        return f"\nOPPONENT TENDENCIES (vpip = voluntarily put chips in, af = raises per call):\n{lines}\n"
+
+    def _request_decision(self, prompt: str, deadline: Optional[Deadline] = None) -> str:
+        """Send the prompt through the shared batcher if configured, otherwise call Gemini directly."""
+        if self.batcher is not None:
+            if self.structured_output:
+                # Batched requests are free-form, so the instructions travel with the prompt
+                prompt = f"{self.system_instruction}\n\n{prompt}"
+            timeout = self.batch_timeout
+            if deadline is not None:
+                timeout = min(timeout, deadline.remaining())
+            try:
+                return self.batcher.submit(prompt).result(timeout=timeout)
+            except FutureTimeoutError:
+                raise DeadlineExceeded("batched Gemini request timed out")
+        return self._call_gemini(prompt, deadline)
+
+    @traced()
+    def _call_gemini(self, prompt: str, deadline: Optional[Deadline] = None, call=None):
+        """Call Gemini API with basic retry/backoff on overload, bounded by the deadline.
+
+        `call` defaults to one blocking backend call returning the response
+        text; streaming mode passes _open_stream instead. With a rate
+        limiter every attempt waits for its slot, and overloads slow the
+        limiter down instead of this bot sleeping on its own."""
+        call = call or self._backend_call
         max_retries = 3
         backoff = 1.0
         last_err = None
         for attempt in range(1, max_retries + 1):
+            if deadline is not None:
+                deadline.check("Gemini call")
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(self.llm_priority, deadline)
             try:
-                print(f"Sending request to Gemini ({self.model_name})... attempt {attempt}")
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=prompt
-                )
-                response_text = response.text.strip()
-                print(f"✅ Received response from Gemini: {response_text}")
-                return response_text
+                logger.debug("Sending request to Gemini", extra={'model': self.model_name, 'attempt': attempt})
+                response = self._generate(prompt, deadline, call)
+                if isinstance(response, str):
+                    response = response.strip()
+                    logger.debug("Received response from Gemini", extra={'response': response})
+                if self.rate_limiter is not None:
+                    self.rate_limiter.record_success()
+                return response
+            except DeadlineExceeded:
+                raise
             except Exception as e:
                 last_err = e
                 # Detect overload/unavailable and back off
                 msg = str(e)
                 if "503" in msg or "UNAVAILABLE" in msg or "overloaded" in msg:
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.record_overload()
+                        continue
+                    if deadline is not None and deadline.remaining() <= backoff:
+                        raise DeadlineExceeded(f"no budget left to retry after: {e}")
                     time.sleep(backoff)
                     backoff *= 2
                     continue
@@ -197,8 +427,74 @@ JSON RESPONSE:"""
                 break
         raise Exception(f"Gemini API call failed after retries: {last_err}")
 
+    def _generate(self, prompt: str, deadline: Optional[Deadline] = None, call=None):
+        """One backend call; with a deadline, stop waiting once it expires."""
+        call = call or self._backend_call
+        if deadline is None:
+            return call(prompt)
+        # The call runs in the request's context, so its log records keep the table and hand
+        future = _DEADLINE_EXECUTOR.submit(contextvars.copy_context().run, call, prompt)
+        try:
+            return future.result(timeout=deadline.remaining())
+        except FutureTimeoutError:
+            future.cancel()
+            raise DeadlineExceeded("Gemini call exceeded decision budget")
+
+    def _backend_call(self, prompt: str) -> str:
+        """Call the backend in the configured mode, recording token counts for structured calls."""
+        if not self.structured_output:
+            return self.backend.generate(prompt, self.model_name)
+        response = self.backend.generate_structured(
+            prompt, self.model_name,
+            system_instruction=self.system_instruction,
+            response_schema=self.DECISION_SCHEMA
+        )
+        self.last_prompt_tokens = response.prompt_tokens
+        self.token_usage['calls'] += 1
+        self.token_usage['prompt_tokens'] += response.prompt_tokens
+        self.token_usage['output_tokens'] += response.output_tokens
+        logger.debug("Gemini structured call", extra={'prompt_tokens': response.prompt_tokens,
+                                                      'output_tokens': response.output_tokens})
+        return response.text
+
+    def _open_stream(self, prompt: str):
+        """Start a streamed response and read it until the decision is actionable.
+
+        Returns (decision or None, the partly consumed stream, parser)."""
+        if self.structured_output:
+            stream = self.backend.generate_stream(
+                prompt, self.model_name,
+                system_instruction=self.system_instruction,
+                response_schema=self.DECISION_SCHEMA
+            )
+        else:
+            stream = self.backend.generate_stream(prompt, self.model_name)
+        parser = StreamingDecisionParser()
+        for chunk in stream:
+            if parser.feed(chunk) is not None:
+                break
+        return parser.decision, stream, parser
+
+    def _drain_stream(self, stream, parser: StreamingDecisionParser, entry: Dict):
+        """Finish reading a stream after the decision was applied and log its reasoning."""
+        try:
+            for chunk in stream:
+                parser.feed(chunk)
+            full = self._parse_response(parser.text)
+            entry['reasoning'] = full.get('reasoning', '')
+            entry['confidence'] = full.get('confidence', 0.0)
+        except Exception as e:
+            logger.warning("Could not finish streamed Gemini reasoning: %s", e)
+
+    @traced()
     def _parse_response(self, response_text: str) -> Dict:
         """Parse Gemini response to extract JSON decision."""
+        if self.structured_output:
+            # Schema-constrained output is plain JSON; skip the regex cleanup
+            try:
+                return self._check_decision(json.loads(response_text))
+            except (json.JSONDecodeError, ValueError):
+                pass
         response_text = self._clean_response(response_text)
 
         try:
@@ -212,11 +508,15 @@ JSON RESPONSE:"""
                     raise ValueError("Could not parse JSON from response")
             else:
                 raise ValueError("No JSON found in response")
-        if 'action' not in decision:
+        return self._check_decision(decision)
+
+    def _check_decision(self, decision) -> Dict:
+        """Make sure a parsed decision has a legal action."""
+        if not isinstance(decision, dict) or 'action' not in decision:
             raise ValueError("Response missing 'action' field")
         if decision['action'] not in ['call', 'raise', 'fold']:
             raise ValueError(f"Invalid action: {decision['action']}")
-        print(f"✅ Parsed Gemini decision: {decision}")
+        logger.debug("Parsed Gemini decision", extra={'decision': dict(decision)})
         return decision
 
     def _clean_response(self, text: str) -> str:
@@ -277,14 +577,16 @@ JSON RESPONSE:"""
         else:
             return 'fold', None
 
-    def _log_decision(self, player, context: Dict, decision: Dict):
+    def _log_decision(self, player, context: Dict, decision: Dict, source: str = 'llm'):
         """Log decision for analysis."""
         self.decision_history.append({
             'hand': context['hand_name'],
             'action': decision['action'],
             'amount': decision.get('amount'),
             'reasoning': decision.get('reasoning', ''),
-            'confidence': decision.get('confidence', 0.0)
+            'confidence': decision.get('confidence', 0.0),
+            'source': source,
+            'prompt_tokens': self.last_prompt_tokens if source == 'llm' else None
         })
 
     def _get_hand_strength(self, hand: list) -> int:
@@ -320,14 +622,22 @@ JSON RESPONSE:"""
         return f"Gemini Bot ({self.model_name}, {self.personality})"
 
     def get_decision_history(self):
-        """Get history of decisions for analysis."""
-        return self.decision_history
+        """Get the most recent decisions (bounded by history_size) for analysis."""
+        return list(self.decision_history)
+
+
+def card_code(card) -> str:
+    """Two/three character card code for compact prompts (e.g. 'AH', '10S')."""
+    rank_codes = {1: "A", 11: "J", 12: "Q", 13: "K"}
+    return f"{rank_codes.get(card.rank, str(card.rank))}{str(card.suit)[:1].upper()}"
 
 
 def create_gemini_bot(name: str, money: int = 1000,
                       personality: str = "balanced",
                       model: str = "gemini-2.5-flash",
-                      api_key: Optional[str] = None) -> GeminiBot:
+                      api_key: Optional[str] = None,
+                      decision_cache: Optional[DecisionCache] = None,
+                      backend: Optional[LLMBackend] = None) -> GeminiBot:
     """
     Create a Gemini bot with sensible defaults.
 
@@ -337,6 +647,8 @@ def create_gemini_bot(name: str, money: int = 1000,
         personality: "conservative", "balanced", or "aggressive"
         model: Gemini model (default: gemini-2.5-flash for speed)
         api_key: Optional API key (otherwise uses GEMINI_API_KEY env var)
+        decision_cache: Optional shared DecisionCache
+        backend: Optional LLMBackend (default: Gemini)
 
     Returns:
         GeminiBot instance
@@ -346,10 +658,56 @@ def create_gemini_bot(name: str, money: int = 1000,
         money=money,
         model=model,
         personality=personality,
-        api_key=api_key
+        api_key=api_key,
+        decision_cache=decision_cache,
+        backend=backend
     )
 
 
+def create_gemini_batcher(model: str = "gemini-2.5-flash",
+                          window_ms: float = 25.0,
+                          max_batch_size: int = 8,
+                          backend: Optional[LLMBackend] = None,
+                          rate_limiter: Optional[RateLimiter] = None) -> DecisionBatcher:
+    """
+    Create a DecisionBatcher that sends multi-decision prompts to Gemini.
+
+    Args:
+        model: Gemini model used for batched requests
+        window_ms: Collection window after the first pending prompt
+        max_batch_size: Maximum decisions per request
+        backend: Optional LLMBackend (default: Gemini)
+        rate_limiter: Optional process-wide RateLimiter; each batch request
+            takes one slot and reports overloads to it, like a direct call
+
+    Returns:
+        DecisionBatcher instance (share it between all GeminiBots)
+    """
+    backend = backend or GeminiBackend()
+
+    def send(prompt: str) -> str:
+        if rate_limiter is None:
+            return backend.generate(prompt, model).strip()
+        last_err = None
+        for _ in range(3):
+            # LoadShed propagates to every bot in the batch, which fall back
+            rate_limiter.acquire()
+            try:
+                response = backend.generate(prompt, model).strip()
+            except Exception as e:
+                msg = str(e)
+                if "503" in msg or "UNAVAILABLE" in msg or "overloaded" in msg:
+                    last_err = e
+                    rate_limiter.record_overload()
+                    continue
+                raise
+            rate_limiter.record_success()
+            return response
+        raise Exception(f"Batched Gemini call failed after retries: {last_err}")
+
+    return DecisionBatcher(send, window_ms=window_ms, max_batch_size=max_batch_size)
+
+
 def check_gemini_setup():
     """
     Check if Gemini API is properly set up.
@@ -360,7 +718,7 @@ def check_gemini_setup():
     if 'GEMINI_API_KEY' not in os.environ:
         return False, "GEMINI_API_KEY not found in environment variables"
     try:
-        client = genai.Client()
+        GeminiBackend()
         return True, "Gemini API is properly configured"
     except Exception as e:
         return False, f"Error initializing Gemini: {e}"
\ No newline at end of file
@@ -0,0 +1,339 @@
+"""
+Latency budgets and failure isolation for LLM bot decisions
+
+Deadline carries a per-decision latency budget from the route down to the
+LLM call. CircuitBreaker stops calling the LLM during sustained failures
+and lets a few half-open probes through once it has cooled down.
+DecisionPathStats counts which path each decision took (LLM, cache,
+fallback on deadline / open circuit / error / shed load) so the budget can
+be tuned against decision quality. RateLimiter paces every LLM call in the
+process through one token bucket and a bounded priority queue.
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a decision's latency budget runs out."""
+
+
+class QueueDeadlineExceeded(DeadlineExceeded):
+    """Raised when the budget runs out while waiting in the LLM queue, before any backend call."""
+
+
+class Deadline:
+    """
+    Absolute deadline derived from a latency budget.
+    """
+
+    def __init__(self, budget_seconds: float):
+        """
+        Args:
+            budget_seconds: Time allowed from now
+        """
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    @classmethod
+    def from_ms(cls, budget_ms: Optional[float]) -> Optional["Deadline"]:
+        """Build a deadline from milliseconds; None or <= 0 means no deadline."""
+        if budget_ms is None or budget_ms <= 0:
+            return None
+        return cls(budget_ms / 1000.0)
+
+    def remaining(self) -> float:
+        """Seconds left (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, what: str = "decision"):
+        """Raise DeadlineExceeded if the budget is spent."""
+        if self.expired():
+            raise DeadlineExceeded(f"{what} exceeded {self.budget * 1000:.0f} ms budget")
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures.
+    Open -> half-open after `reset_timeout` seconds; up to
+    `half_open_max_calls` probes are let through. A successful probe
+    closes the circuit, a failed one opens it again; one that never reached
+    the LLM (shed by the rate limiter) hands its slot back.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 15.0,
+                 half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow_request(self) -> bool:
+        """Return True if the caller may call the LLM now."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probes_in_flight = 0
+            if self.state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_max_calls:
+                    self.rejected += 1
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def release_probe(self):
+        """Give back a probe taken by allow_request() for a call that never reached the LLM."""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probes_in_flight = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probes_in_flight = 0
+
+    def stats(self) -> Dict:
+        return {
+            'state': self.state,
+            'consecutive_failures': self._failures,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected,
+        }
+
+
+class DecisionPathStats:
+    """
+    Counts decisions by path and accumulates their latency.
+
+    Paths used by GeminiBot: 'llm', 'cache', 'fallback_deadline',
+    'fallback_circuit_open', 'fallback_shed', 'fallback_error'.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._seconds = {}
+
+    def record(self, path: str, seconds: float):
+        with self._lock:
+            self._counts[path] = self._counts.get(path, 0) + 1
+            self._seconds[path] = self._seconds.get(path, 0.0) + seconds
+
+    def stats(self) -> Dict:
+        """
+        Returns:
+            dict: {path: {'count', 'share', 'avg_ms'}} plus 'total'
+        """
+        with self._lock:
+            total = sum(self._counts.values())
+            result = {'total': total}
+            for path, count in self._counts.items():
+                result[path] = {
+                    'count': count,
+                    'share': count / total,
+                    'avg_ms': self._seconds[path] / count * 1000.0,
+                }
+            return result
+
+
+class LoadShed(Exception):
+    """Raised when the LLM admission queue is full and a request is turned away."""
+
+
+class RateLimiter:
+    """
+    Process-wide token bucket in front of the LLM backend, with a bounded
+    priority queue of waiting callers.
+
+    A caller that finds no token waits in the queue, ranked by enqueue
+    time minus `priority * priority_step` (priority 1 is served as if it
+    had waited `priority_step` seconds longer). When the queue is full the
+    worst-ranked caller, possibly the newcomer, is shed with LoadShed; so
+    is a caller that would wait longer than `max_wait` or than its deadline
+    allows before the queue ahead of it drains, since it would only time
+    out later.
+    Overload responses halve the rate (down to `min_rate`) and successes
+    add it back in small steps, so throughput settles just under the
+    provider's limit instead of every table backing off at once.
+    """
+
+    _WAITING, _GRANTED, _SHED, _EXPIRED = range(4)
+
+    class _Waiter:
+        __slots__ = ("state", "event", "enqueued")
+
+        def __init__(self, enqueued: float):
+            self.state = RateLimiter._WAITING
+            self.event = threading.Event()
+            self.enqueued = enqueued
+
+    def __init__(self, rate: float, burst: Optional[float] = None, max_queue: int = 64,
+                 max_wait: Optional[float] = None, priority_step: float = 1.0,
+                 min_rate: Optional[float] = None):
+        """
+        Args:
+            rate: Calls per second allowed to the backend
+            burst: Bucket size (default: a quarter second's worth, at least 1)
+            max_queue: Callers allowed to wait; beyond this the worst-ranked is shed
+            max_wait: Optional seconds a newcomer may expect to wait before it is shed
+            priority_step: Seconds of queue position one priority level is worth
+            min_rate: Floor for the rate while the provider reports overload
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max(1.0, rate / 4.0)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.priority_step = priority_step
+        self.min_rate = min_rate or rate / 16.0
+        self._tokens = self.burst
+        self._refilled = time.monotonic()
+        self._heap = []
+        self._seq = 0
+        self._depth = 0
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=1024)
+        self.granted = 0
+        self.shed = 0
+        self.expired = 0
+        self.overloads = 0
+        self.max_depth = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _grant(self, waiter, now: float):
+        self._tokens -= 1.0
+        self.granted += 1
+        self._waits.append(now - waiter.enqueued)
+
+    def _dispatch(self, now: float):
+        """Hand available tokens to the best-ranked waiters (lock held)."""
+        self._refill(now)
+        while self._heap and self._tokens >= 1.0:
+            waiter = heapq.heappop(self._heap)[2]
+            if waiter.state != self._WAITING:
+                continue  # shed or expired, removed lazily
+            self._depth -= 1
+            waiter.state = self._GRANTED
+            self._grant(waiter, now)
+            waiter.event.set()
+
+    def acquire(self, priority: int = 0, deadline: Optional[Deadline] = None):
+        """
+        Wait for permission to call the backend.
+
+        Args:
+            priority: Higher is served sooner (e.g. live turns over speculation)
+            deadline: Optional Deadline; waiting stops when it runs out
+
+        Raises:
+            LoadShed: The queue was full and this caller ranked last
+            QueueDeadlineExceeded: The deadline ran out while queued
+        """
+        now = time.monotonic()
+        waiter = self._Waiter(now)
+        with self._lock:
+            self._refill(now)
+            if self._depth == 0 and self._tokens >= 1.0:
+                self._grant(waiter, now)
+                return
+            rank = now - priority * self.priority_step
+            expected_wait = self._depth / self.rate
+            if ((deadline is not None and expected_wait > deadline.remaining())
+                    or (self.max_wait is not None and expected_wait > self.max_wait)):
+                self.shed += 1
+                raise LoadShed(f"{self._depth} calls queued, about {expected_wait:.1f}s to wait")
+            if self._depth >= self.max_queue:
+                worst = max((e for e in self._heap if e[2].state == self._WAITING),
+                            key=lambda e: e[:2], default=None)
+                self.shed += 1
+                if worst is None or worst[0] <= rank:
+                    raise LoadShed(f"LLM queue full ({self.max_queue} waiting)")
+                worst[2].state = self._SHED
+                worst[2].event.set()
+                self._depth -= 1
+            self._seq += 1
+            heapq.heappush(self._heap, (rank, self._seq, waiter))
+            self._depth += 1
+            self.max_depth = max(self.max_depth, self._depth)
+
+        while True:
+            with self._lock:
+                self._dispatch(time.monotonic())
+                if waiter.state == self._GRANTED:
+                    return
+                if waiter.state == self._SHED:
+                    raise LoadShed("shed from the LLM queue by a higher-ranked request")
+                wait_for = max(0.001, (1.0 - self._tokens) / self.rate)
+                if deadline is not None:
+                    remaining = deadline.remaining()
+                    if remaining <= 0:
+                        waiter.state = self._EXPIRED
+                        self._depth -= 1
+                        self.expired += 1
+                        raise QueueDeadlineExceeded("decision budget ran out in the LLM queue")
+                    wait_for = min(wait_for, remaining)
+            waiter.event.wait(wait_for)
+
+    def record_overload(self):
+        """The provider answered 503: halve the rate and drop saved-up burst."""
+        with self._lock:
+            self.overloads += 1
+            self.rate = max(self.min_rate, self.rate / 2.0)
+            self._tokens = min(self._tokens, 0.0)
+
+    def record_success(self):
+        """Creep back towards the configured rate (additive increase)."""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20.0)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            depth = self._depth
+        n = len(waits)
+        return {
+            'rate': self.rate,
+            'max_rate': self.max_rate,
+            'queue_depth': depth,
+            'max_queue_depth': self.max_depth,
+            'granted': self.granted,
+            'shed': self.shed,
+            'expired': self.expired,
+            'overloads': self.overloads,
+            'wait_ms_p50': waits[n // 2] * 1000.0 if n else 0.0,
+            'wait_ms_p95': waits[min(n - 1, int(n * 0.95))] * 1000.0 if n else 0.0,
+            'wait_ms_max': waits[-1] * 1000.0 if n else 0.0,
+        }
@@ -0,0 +1,67 @@
+"""
+Incremental parsing of streamed LLM decisions
+
+The decision JSON is requested with `action` and `amount` first, so the
+bot can act as soon as those fields are complete while the `reasoning`
+text is still being generated.
+"""
+
+import re
+from typing import Dict, Optional
+
+
+class StreamingDecisionParser:
+    """
+    Accumulates streamed text and reports the decision once it is actionable.
+
+    A decision is actionable when `action` is complete and, for a raise,
+    `amount` is complete too. feed() returns it exactly once.
+    """
+
+    ACTION_RE = re.compile(r'"action"\s*:\s*"(call|raise|fold)"')
+    # A number only counts as complete once a delimiter follows it
+    AMOUNT_RE = re.compile(r'"amount"\s*:\s*(null|-?\d+(?:\.\d+)?)\s*[,}\n]')
+
+    def __init__(self):
+        self._chunks = []
+        self._text = ""
+        self.decision = None
+
+    @property
+    def text(self) -> str:
+        """Everything received so far."""
+        if self._chunks:
+            self._text += "".join(self._chunks)
+            self._chunks = []
+        return self._text
+
+    def feed(self, chunk: str) -> Optional[Dict]:
+        """
+        Add a chunk of streamed text.
+
+        Args:
+            chunk: Next piece of the response
+
+        Returns:
+            dict|None: {'action', 'amount'} the first time the decision is
+            actionable, None otherwise
+        """
+        self._chunks.append(chunk)
+        if self.decision is not None:
+            return None
+
+        text = self.text
+        action_match = self.ACTION_RE.search(text)
+        if not action_match:
+            return None
+        action = action_match.group(1)
+        amount = None
+        if action == 'raise':
+            amount_match = self.AMOUNT_RE.search(text)
+            if not amount_match:
+                return None
+            if amount_match.group(1) != 'null':
+                amount = int(float(amount_match.group(1)))
+
+        self.decision = {'action': action, 'amount': amount}
+        return self.decision
@@ -0,0 +1,427 @@
+"""
+Monte Carlo tree search bot
+
+Searches the betting tree of the current hand from the bot's seat. Every
+iteration samples the opponents' holdings from the cards the bot cannot
+see (a determinization), walks the tree with UCB1 at the bot's own
+decisions, lets the opponents respond with a strength-based policy and
+scores the showdown with an integer-card evaluator.
+
+Search is root-parallel: each worker process of a persistent pool grows
+its own tree until the wall-clock budget runs out and the root statistics
+are summed. The most visited action is played.
+"""
+
+import atexit
+import math
+import os
+import random
+import time
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ai_player import BaseAIPlayer
+from structured_logging import reset_worker_logging
+
+# ------------------- FAST EVALUATOR -------------------
+
+# Card ids follow game_logic: 1-13 hearts, 14-26 diamonds, 27-39 spades,
+# 40-52 clubs, rank = id % 13 + 1 with the ace (1) counted high
+_RANK = (0,) + tuple(14 if c % 13 == 0 else c % 13 + 1 for c in range(1, 53))
+_SUIT = (0,) + tuple((c - 1) // 13 for c in range(1, 53))
+
+HIGH_CARD, PAIR, TWO_PAIR, TRIPS, STRAIGHT, FLUSH, FULL_HOUSE, QUADS, STRAIGHT_FLUSH = range(9)
+
+# Share of all 5-card hands in each category, for a rough strength percentile
+_CATEGORY_SHARE = (0.50118, 0.42257, 0.04754, 0.02113, 0.00392, 0.00197, 0.00144, 0.00024, 0.0000154)
+_CATEGORY_BELOW = tuple(sum(_CATEGORY_SHARE[:i]) for i in range(len(_CATEGORY_SHARE)))
+
+
+def fast_score(cards: Sequence[int]) -> int:
+    """
+    Comparable score of a 5-card hand given as card ids (higher wins).
+
+    Category in the top bits, then the ranks that break ties, 4 bits each.
+    """
+    r = sorted([_RANK[c] for c in cards], reverse=True)
+    s = _SUIT[cards[0]]
+    flush = _SUIT[cards[1]] == s and _SUIT[cards[2]] == s and _SUIT[cards[3]] == s and _SUIT[cards[4]] == s
+    a, b, c, d, e = r
+    if a > b > c > d > e:
+        if a - e == 4:
+            return ((STRAIGHT_FLUSH if flush else STRAIGHT) << 20) | (a << 16)
+        if r == [14, 5, 4, 3, 2]:
+            return ((STRAIGHT_FLUSH if flush else STRAIGHT) << 20) | (5 << 16)
+        category = FLUSH if flush else HIGH_CARD
+        return (category << 20) | (a << 16) | (b << 12) | (c << 8) | (d << 4) | e
+
+    counts = {}
+    for rank in r:
+        counts[rank] = counts.get(rank, 0) + 1
+    groups = sorted(counts.items(), key=lambda kv: (kv[1], kv[0]), reverse=True)
+    shape = tuple(n for _, n in groups)
+    if shape == (4, 1):
+        category = QUADS
+    elif shape == (3, 2):
+        category = FULL_HOUSE
+    elif flush:
+        return (FLUSH << 20) | (a << 16) | (b << 12) | (c << 8) | (d << 4) | e
+    elif shape == (3, 1, 1):
+        category = TRIPS
+    elif shape == (2, 2, 1):
+        category = TWO_PAIR
+    else:
+        category = PAIR
+    score = category
+    for rank, _ in groups:
+        score = (score << 4) | rank
+    return score << (4 * (5 - len(groups)))
+
+
+def strength(score: int) -> float:
+    """Approximate percentile (0-1) of a fast_score among random hands."""
+    category = score >> 20
+    top = (score >> 16) & 0xF
+    return _CATEGORY_BELOW[category] + _CATEGORY_SHARE[category] * (top - 2) / 12.0
+
+
+# ------------------- SEARCH -------------------
+
+class _Node:
+    """A bot decision node; children are created on first visit."""
+
+    __slots__ = ("actions", "children", "visits", "value")
+
+    def __init__(self, actions: Tuple[str, ...]):
+        self.actions = actions
+        self.children = {}
+        self.visits = 0
+        self.value = 0.0
+
+    def select(self, exploration: float) -> str:
+        for action in self.actions:
+            if action not in self.children:
+                return action
+        log_n = math.log(self.visits)
+        best, best_ucb = None, -math.inf
+        for action, child in self.children.items():
+            ucb = child.value / child.visits + exploration * math.sqrt(log_n / child.visits)
+            if ucb > best_ucb:
+                best, best_ucb = action, ucb
+        return best
+
+    def child(self, action: str, actions: Tuple[str, ...] = ()) -> "_Node":
+        node = self.children.get(action)
+        if node is None:
+            node = self.children[action] = _Node(actions)
+        return node
+
+
+class _Hand:
+    """Mutable betting state of one simulated hand; copy() is a few list copies."""
+
+    __slots__ = ("pot", "highest", "bets", "folded")
+
+    def __init__(self, pot, highest, bets, folded):
+        self.pot = pot
+        self.highest = highest
+        self.bets = bets
+        self.folded = folded
+
+    def copy(self) -> "_Hand":
+        return _Hand(self.pot, self.highest, list(self.bets), list(self.folded))
+
+    def put(self, seat: int, amount: float):
+        self.bets[seat] += amount
+        self.pot += amount
+        if self.bets[seat] > self.highest:
+            self.highest = self.bets[seat]
+
+
+def _opponent_acts(hand: _Hand, seat: int, strength_: float, fold_bias: float,
+                   rng: random.Random, can_raise: bool) -> bool:
+    """Rollout policy for an opponent facing a bet; returns True if it re-raised."""
+    to_call = hand.highest - hand.bets[seat]
+    if to_call <= 0:
+        return False
+    price = to_call / (hand.pot + to_call)
+    noise = rng.uniform(-0.1, 0.1)
+    if strength_ + noise < price + fold_bias:
+        hand.folded[seat] = True
+        return False
+    if can_raise and strength_ + noise > 0.9:
+        hand.put(seat, to_call + hand.pot + to_call)
+        return True
+    hand.put(seat, to_call)
+    return False
+
+
+def _simulate(root: _Node, start: _Hand, spec: Dict, opp_scores: List[int],
+              opp_strengths: List[float], rng: random.Random) -> Tuple[float, int]:
+    """One iteration from the root; returns (bot chip delta, nodes visited)."""
+    hand = start.copy()
+    me = 0
+    my_start = hand.bets[me]
+    opponents = range(1, len(hand.bets))
+    fold_bias = spec['fold_bias']
+    exploration = spec['exploration']
+    path = [root]
+
+    action = root.select(exploration)
+    node = root.child(action, ("fold", "call"))
+    path.append(node)
+    if action == "fold":
+        value = 0.0
+    else:
+        hand.put(me, hand.highest - hand.bets[me])
+        reraised = False
+        if action.startswith("raise"):
+            amount = min(spec['raise_sizes'][action], spec['stack'] - (hand.bets[me] - my_start))
+            hand.put(me, max(0.0, amount))
+            for seat in opponents:
+                if not hand.folded[seat]:
+                    reraised |= _opponent_acts(hand, seat, opp_strengths[seat - 1],
+                                               fold_bias[seat - 1], rng, not reraised)
+        if reraised:
+            reply = node.select(exploration)
+            path.append(node.child(reply))
+            if reply == "fold":
+                hand.folded[me] = True
+            else:
+                hand.put(me, min(hand.highest - hand.bets[me], spec['stack'] - (hand.bets[me] - my_start)))
+        # Everyone still behind the highest bet calls or folds
+        for seat in opponents:
+            if not hand.folded[seat]:
+                _opponent_acts(hand, seat, opp_strengths[seat - 1], fold_bias[seat - 1], rng, False)
+        value = _showdown(hand, spec['my_score'], opp_scores) - (hand.bets[me] - my_start)
+
+    for n in path:
+        n.visits += 1
+        n.value += value
+    return value, len(path)
+
+
+def _showdown(hand: _Hand, my_score: int, opp_scores: List[int]) -> float:
+    """Chips the bot collects at the end of the hand."""
+    if hand.folded[0]:
+        return 0.0
+    best = my_score
+    winners = 1
+    for seat, score in enumerate(opp_scores, start=1):
+        if hand.folded[seat]:
+            continue
+        if score > best:
+            return 0.0
+        if score == best:
+            winners += 1
+    return hand.pot / winners
+
+
+def run_search(spec: Dict) -> Dict:
+    """
+    Grow one search tree until the spec's deadline (runs in a pool worker).
+
+    Args:
+        spec: Search inputs built by MCTSBot._search_spec
+
+    Returns:
+        dict: {'children': {action: (visits, value)}, 'iterations', 'nodes'}
+    """
+    rng = random.Random(spec['seed'])
+    known = set(spec['hand'])
+    unseen = [c for c in range(1, 53) if c not in known]
+    num_opponents = len(spec['opponent_bets'])
+    start = _Hand(spec['pot'], max([spec['my_bet']] + spec['opponent_bets']),
+                  [spec['my_bet']] + list(spec['opponent_bets']), [False] * (num_opponents + 1))
+    root = _Node(spec['actions'])
+    spec = dict(spec, my_score=fast_score(spec['hand']))
+
+    iterations = nodes = 0
+    end = spec['deadline']
+    while True:
+        cards = rng.sample(unseen, 5 * num_opponents)
+        opp_scores = [fast_score(cards[i * 5:i * 5 + 5]) for i in range(num_opponents)]
+        opp_strengths = [strength(s) for s in opp_scores]
+        _, visited = _simulate(root, start, spec, opp_scores, opp_strengths, rng)
+        iterations += 1
+        nodes += visited
+        # Checking the clock every few iterations keeps it off the hot path
+        if iterations & 15 == 0 and time.time() >= end:
+            break
+    return {
+        'children': {a: (c.visits, c.value) for a, c in root.children.items()},
+        'iterations': iterations,
+        'nodes': nodes,
+    }
+
+
+# ------------------- WORKER POOL -------------------
+
+_POOL = None
+_POOL_SIZE = 0
+
+
+def _get_pool(workers: int) -> Pool:
+    """Persistent rollout pool shared by every MCTSBot in the process."""
+    global _POOL, _POOL_SIZE
+    if _POOL is None or _POOL_SIZE < workers:
+        if _POOL is not None:
+            _POOL.terminate()
+        _POOL = Pool(workers, initializer=reset_worker_logging)
+        _POOL_SIZE = workers
+    return _POOL
+
+
+@atexit.register
+def _close_pool():
+    if _POOL is not None:
+        _POOL.terminate()
+
+
+# ------------------- BOT -------------------
+
+class MCTSBot(BaseAIPlayer):
+    """
+    Time-budgeted MCTS player with parallel rollouts.
+    """
+
+    def __init__(self, name: str, money: int = 1000, budget_ms: float = 50,
+                 workers: Optional[int] = None, raise_fractions: Tuple[float, ...] = (0.5, 1.0),
+                 exploration: float = 1.0, seed: Optional[int] = None):
+        """
+        Initialize the bot.
+
+        Args:
+            name: Player name (displayed in game)
+            money: Starting chip stack (default: 1000)
+            budget_ms: Wall-clock budget per decision
+            workers: Rollout processes (default: all cores; 0 searches in-process)
+            raise_fractions: Raise sizes to consider, as fractions of the pot after calling
+            exploration: UCB1 constant, in units of the pot after our largest raise
+            seed: Optional seed for reproducible searches
+        """
+        super().__init__(name, money, rng=random.Random(seed))
+        self.budget_ms = budget_ms
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.raise_fractions = raise_fractions
+        self.exploration = exploration
+        self.last_search = None
+        self.search_totals = {'decisions': 0, 'iterations': 0, 'nodes': 0, 'seconds': 0.0}
+        if self.workers > 0:
+            _get_pool(self.workers)
+
+    def _search_spec(self, game_state, player, deadline: float) -> Dict:
+        pot = game_state.get("pot", 0)
+        folded = set(game_state.get("folded", ()))
+        others = [(k[:-len("_bet")], v) for k, v in game_state.items()
+                  if k.endswith("_bet") and k != f"{self.seat}_bet"]
+        if self.seat is None and others:
+            # Seat unknown (called outside a table): drop one entry matching our own bet
+            mine = next((i for i, (_, v) in enumerate(others) if v == player.current_bet), 0)
+            others.pop(mine)
+        others = [(seat, bet) for seat, bet in others if seat not in folded]
+        opponent_bets = [bet for _, bet in others]
+        to_call = max(0, max(opponent_bets + [player.current_bet]) - player.current_bet)
+
+        stats = self._opponent_stats()
+        fold_bias = []
+        for seat, _ in others:
+            s = stats.get(seat)
+            # Opponents seen folding to raises more than half the time fold a bit more in rollouts
+            fold_bias.append((s['fold_to_raise'] - 0.5) * 0.2 if s and s['hands'] >= 10 else 0.0)
+
+        base = pot + to_call
+        raise_sizes = {f"raise{i}": max(1, int(f * base)) for i, f in enumerate(self.raise_fractions)}
+        stack_after_call = player.money - to_call
+        actions = ("call",) + (("fold",) if to_call > 0 else ())
+        if stack_after_call > 0:
+            actions += tuple(raise_sizes)
+        return {
+            'hand': [c.id for c in self.hand],
+            'pot': pot,
+            'to_call': to_call,
+            'my_bet': player.current_bet,
+            'opponent_bets': opponent_bets,
+            'stack': player.money,
+            'actions': actions,
+            'raise_sizes': raise_sizes,
+            'fold_bias': fold_bias,
+            # Payoffs swing by about the final pot, so scale exploration to it
+            'exploration': self.exploration * max(base + max(raise_sizes.values()), 1),
+            'deadline': deadline,
+        }
+
+    def decide_action(self, game_state, player) -> Tuple[str, Optional[int]]:
+        """
+        Search until the budget runs out and play the most visited action.
+
+        Args:
+            game_state: Dict with pot, the *_bet amounts of every seat and
+                optionally 'folded' (seat names)
+            player: This bot
+
+        Returns:
+            tuple: (action, amount), 'call' with None doubles as hold
+        """
+        if not self.hand or len(self.hand) < 5:
+            return ("fold", None)
+
+        started = time.time()
+        # Leave a little of the budget for dispatch and merging
+        deadline = started + max(0.001, self.budget_ms / 1000.0 * 0.9)
+        spec = self._search_spec(game_state, player, deadline)
+        if not spec['opponent_bets']:
+            return ("call", None)
+
+        if self.workers > 0:
+            specs = [dict(spec, seed=self.rng.getrandbits(32)) for _ in range(self.workers)]
+            results = _get_pool(self.workers).map(run_search, specs)
+        else:
+            results = [run_search(dict(spec, seed=self.rng.getrandbits(32)))]
+        elapsed = time.time() - started
+
+        visits, values = {}, {}
+        for result in results:
+            for action, (n, v) in result['children'].items():
+                visits[action] = visits.get(action, 0) + n
+                values[action] = values.get(action, 0.0) + v
+        best = max(visits, key=visits.get)
+        iterations = sum(r['iterations'] for r in results)
+        nodes = sum(r['nodes'] for r in results)
+        self.last_search = {
+            'action': best,
+            'iterations': iterations,
+            'nodes': nodes,
+            'elapsed_ms': elapsed * 1000.0,
+            'nodes_per_sec': nodes / elapsed if elapsed > 0 else 0.0,
+            'rollouts_per_sec': iterations / elapsed if elapsed > 0 else 0.0,
+            'workers': max(1, self.workers),
+            'actions': {a: {'visits': visits[a], 'ev': values[a] / visits[a]} for a in visits},
+        }
+        totals = self.search_totals
+        totals['decisions'] += 1
+        totals['iterations'] += iterations
+        totals['nodes'] += nodes
+        totals['seconds'] += elapsed
+
+        if best == "fold":
+            return ("fold", None)
+        if best == "call":
+            return ("call", None)
+        amount = min(spec['raise_sizes'][best], player.money - spec['to_call'])
+        if amount <= 0:
+            return ("call", None)
+        return ("raise", amount)
+
+    def search_stats(self) -> Dict:
+        """Cumulative search counters plus averages per decision."""
+        totals = dict(self.search_totals)
+        decisions = totals['decisions']
+        seconds = totals['seconds']
+        totals['rollouts_per_decision'] = totals['iterations'] / decisions if decisions else 0.0
+        totals['nodes_per_sec'] = totals['nodes'] / seconds if seconds else 0.0
+        totals['last'] = self.last_search
+        return totals
+
+    def get_strategy_name(self) -> str:
+        return f"Monte Carlo tree search over the betting tree ({self.budget_ms:.0f} ms per decision)."
@@ -0,0 +1,190 @@
+"""
+Opponent modeling
+
+Per-seat playing statistics for one table, updated incrementally from
+every action: VPIP (how often a seat voluntarily puts chips in), aggression
+factor (raises / calls), fold-to-raise rate, and the average hand strength
+it shows down for each bet-size bucket.
+
+Counters live in flat typed arrays indexed by seat, so an update is a
+couple of index increments and a model is a few hundred bytes no matter
+how many hands the table plays.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Optional
+
+SEATS = ("player", "opponent", "gemini")
+
+# Counter layout per seat
+HANDS, VPIP, RAISES, CALLS, FACED_RAISE, FOLD_TO_RAISE, SHOWDOWNS = range(7)
+NUM_COUNTERS = 7
+
+# Upper edges (chips committed in the hand) of the showdown bet buckets;
+# the last bucket is everything above the last edge
+BET_BUCKET_EDGES = (0, 25, 100, 250)
+NUM_BET_BUCKETS = len(BET_BUCKET_EDGES) + 1
+
+# Per-hand flags
+_PUT_IN = 1
+
+
+def bet_bucket(chips: int) -> int:
+    """Bucket index for chips committed in a hand."""
+    return bisect_left(BET_BUCKET_EDGES, chips)
+
+
+def bet_bucket_label(bucket: int) -> str:
+    if bucket == 0:
+        return "0"
+    low = BET_BUCKET_EDGES[bucket - 1] + 1
+    if bucket == len(BET_BUCKET_EDGES):
+        return f"{low}+"
+    return f"{low}-{BET_BUCKET_EDGES[bucket]}"
+
+
+class OpponentModel:
+    """
+    Array-backed per-seat statistics for one table.
+    """
+
+    __slots__ = ("seats", "_index", "_counts", "_showdown_count", "_showdown_strength", "_flags")
+
+    def __init__(self, seats: Iterable[str] = SEATS):
+        self.seats = tuple(seats)
+        self._index = {seat: i for i, seat in enumerate(self.seats)}
+        n = len(self.seats)
+        self._counts = array("L", [0]) * (n * NUM_COUNTERS)
+        self._showdown_count = array("L", [0]) * (n * NUM_BET_BUCKETS)
+        self._showdown_strength = array("d", [0.0]) * (n * NUM_BET_BUCKETS)
+        self._flags = bytearray(n)
+
+    def copy(self) -> "OpponentModel":
+        clone = OpponentModel.__new__(OpponentModel)
+        clone.seats = self.seats
+        clone._index = self._index
+        clone._counts = array("L", self._counts)
+        clone._showdown_count = array("L", self._showdown_count)
+        clone._showdown_strength = array("d", self._showdown_strength)
+        clone._flags = bytearray(self._flags)
+        return clone
+
+    def to_bytes(self) -> bytes:
+        """All counters and per-hand flags as one compact blob (see from_bytes)."""
+        return (self._counts.tobytes() + self._showdown_count.tobytes()
+                + self._showdown_strength.tobytes() + bytes(self._flags))
+
+    @classmethod
+    def from_bytes(cls, data: bytes, seats: Iterable[str] = SEATS) -> "OpponentModel":
+        """Rebuild a model written by to_bytes (same seats, same machine word sizes)."""
+        model = cls(seats)
+        arrays = (model._counts, model._showdown_count, model._showdown_strength)
+        expected = sum(len(a) * a.itemsize for a in arrays) + len(model._flags)
+        if len(data) != expected:
+            raise ValueError(f"Opponent model blob is {len(data)} bytes, expected {expected}")
+        offset = 0
+        for a in arrays:
+            size = len(a) * a.itemsize
+            chunk = array(a.typecode)
+            chunk.frombytes(data[offset:offset + size])
+            a[:] = chunk
+            offset += size
+        model._flags[:] = data[offset:]
+        return model
+
+    # ------------------- UPDATES -------------------
+
+    def start_hand(self, seats: Optional[Iterable[str]] = None):
+        """Count a new hand for each seat dealt in (default: all seats)."""
+        for seat in (self.seats if seats is None else seats):
+            i = self._index[seat]
+            self._counts[i * NUM_COUNTERS + HANDS] += 1
+            self._flags[i] = 0
+
+    def record_action(self, seat: str, action: str, chips: int = 0, facing_bet: bool = False):
+        """
+        Update a seat's counters for one action.
+
+        Args:
+            seat: Seat name
+            action: 'raise', 'call', 'fold' or 'hold'
+            chips: Chips the action put in the pot
+            facing_bet: Whether the seat had a bet to call when acting
+        """
+        i = self._index.get(seat)
+        if i is None:
+            return
+        base = i * NUM_COUNTERS
+        counts = self._counts
+        if facing_bet:
+            counts[base + FACED_RAISE] += 1
+        if action == "raise":
+            counts[base + RAISES] += 1
+        elif action == "call" and chips > 0:
+            counts[base + CALLS] += 1
+        elif action == "fold":
+            if facing_bet:
+                counts[base + FOLD_TO_RAISE] += 1
+            return
+        if chips > 0 and not self._flags[i] & _PUT_IN:
+            self._flags[i] |= _PUT_IN
+            counts[base + VPIP] += 1
+
+    def record_showdown(self, seat: str, hand_ranking: int, committed: int):
+        """Record the strength (1-10) a seat showed down with and what it had bet."""
+        i = self._index.get(seat)
+        if i is None:
+            return
+        self._counts[i * NUM_COUNTERS + SHOWDOWNS] += 1
+        slot = i * NUM_BET_BUCKETS + bet_bucket(committed)
+        self._showdown_count[slot] += 1
+        self._showdown_strength[slot] += hand_ranking
+
+    # ------------------- QUERIES -------------------
+
+    def stats(self, seat: str) -> Dict:
+        """
+        Statistics for one seat.
+
+        Returns:
+            dict: hands, vpip, aggression_factor, fold_to_raise, showdowns and
+            showdown_strength ({bet bucket label: average strength 1-10})
+        """
+        i = self._index[seat]
+        base = i * NUM_COUNTERS
+        c = self._counts
+        hands = c[base + HANDS]
+        raises, calls = c[base + RAISES], c[base + CALLS]
+        faced = c[base + FACED_RAISE]
+        showdown_strength = {}
+        for b in range(NUM_BET_BUCKETS):
+            count = self._showdown_count[i * NUM_BET_BUCKETS + b]
+            if count:
+                showdown_strength[bet_bucket_label(b)] = self._showdown_strength[i * NUM_BET_BUCKETS + b] / count
+        return {
+            'hands': hands,
+            'vpip': c[base + VPIP] / hands if hands else 0.0,
+            'aggression_factor': raises / calls if calls else float(raises),
+            'fold_to_raise': c[base + FOLD_TO_RAISE] / faced if faced else 0.0,
+            'showdowns': c[base + SHOWDOWNS],
+            'showdown_strength': showdown_strength,
+        }
+
+    def snapshot(self, exclude: Optional[str] = None) -> Dict[str, Dict]:
+        """Stats for every seat except `exclude` (usually the asking bot's own)."""
+        return {seat: self.stats(seat) for seat in self.seats if seat != exclude}
+
+    def describe(self, exclude: Optional[str] = None) -> str:
+        """One compact line per opponent, for LLM prompts."""
+        lines = []
+        for seat, s in self.snapshot(exclude).items():
+            if not s['hands']:
+                continue
+            line = (f"{seat}: hands {s['hands']} | vpip {s['vpip']:.0%} | "
+                    f"af {s['aggression_factor']:.1f} | fold_to_raise {s['fold_to_raise']:.0%}")
+            if s['showdown_strength']:
+                shown = ", ".join(f"bet {k}: {v:.1f}/10" for k, v in s['showdown_strength'].items())
+                line += f" | showdown {shown}"
+            lines.append(line)
+        return "\n".join(lines)
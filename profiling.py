@@ -0,0 +1,245 @@
+"""
+Opt-in request profiling
+
+Profiles a sampled fraction of requests (PROFILE_MODE + PROFILE_RATE), or
+a single request sent with the admin header
+`X-Profile-Token: <PROFILE_ADMIN_TOKEN>`. Two profilers are available:
+
+- "sample": a background thread reads the request thread's stack from
+  sys._current_frames() every PROFILE_INTERVAL_MS and writes collapsed
+  stacks (.folded, for flamegraph.pl / speedscope) or a speedscope .json.
+  Time spent waiting on the Gemini round trip shows up as the waiting frame.
+- "cprofile": cProfile for the request thread, written as a .prof file.
+
+Files go to PROFILE_DIR. When neither the mode nor an admin token is set,
+no request hooks are installed at all.
+"""
+
+import cProfile
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from flask import g, request
+
+MODES = ("sample", "cprofile")
+FORMATS = ("collapsed", "speedscope")
+TOKEN_HEADER = "X-Profile-Token"
+MODE_HEADER = "X-Profile-Mode"
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack at a fixed interval.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                # Function-level frames (first line), so one function aggregates
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[tuple(stack)] += 1
+
+    # ------------------- OUTPUT -------------------
+
+    @staticmethod
+    def _label(frame) -> str:
+        name, filename, line = frame
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    def write_collapsed(self, path: str):
+        """One `root;...;leaf count` line per distinct stack."""
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(";".join(self._label(fr) for fr in stack) + f" {count}\n")
+
+    def write_speedscope(self, path: str, name: str):
+        """Speedscope's sampled-profile JSON format."""
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, count in self.samples.items():
+            ids = []
+            for fr in stack:
+                if fr not in index:
+                    index[fr] = len(frames)
+                    frames.append({'name': fr[0], 'file': fr[1], 'line': fr[2]})
+                ids.append(index[fr])
+            samples.append(ids)
+            weights.append(count * self.interval)
+        document = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            }],
+            'name': name,
+        }
+        with open(path, "w") as f:
+            json.dump(document, f)
+
+
+class RequestProfiler:
+    """
+    Flask hooks that profile selected requests and write one file per request.
+    """
+
+    def __init__(self, mode: Optional[str] = None, rate: float = 0.0, out_dir: str = "profiles",
+                 admin_token: Optional[str] = None, interval_ms: float = 1.0,
+                 fmt: str = "collapsed", seed: Optional[int] = None):
+        """
+        Args:
+            mode: "sample", "cprofile" or None (only admin requests are profiled)
+            rate: Fraction of requests profiled when a mode is set
+            out_dir: Directory for profile files
+            admin_token: Token for the X-Profile-Token header (None disables it)
+            interval_ms: Sampling interval for the "sample" profiler
+            fmt: "collapsed" or "speedscope" output for the "sample" profiler
+            seed: Optional seed for choosing which requests to profile
+        """
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown profile format: {fmt}")
+        self.mode = mode
+        self.rate = rate if mode else 0.0
+        self.out_dir = out_dir
+        self.admin_token = admin_token
+        self.interval = interval_ms / 1000.0
+        self.fmt = fmt
+        self._rng = random.Random(seed)
+        self.profiled = 0
+        self.rejected_tokens = 0
+        self.last_file = None
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        """PROFILE_MODE, PROFILE_RATE, PROFILE_DIR, PROFILE_ADMIN_TOKEN, PROFILE_INTERVAL_MS, PROFILE_FORMAT."""
+        return cls(
+            mode=os.environ.get("PROFILE_MODE") or None,
+            rate=float(os.environ.get("PROFILE_RATE", 0.01)),
+            out_dir=os.environ.get("PROFILE_DIR", "profiles"),
+            admin_token=os.environ.get("PROFILE_ADMIN_TOKEN") or None,
+            interval_ms=float(os.environ.get("PROFILE_INTERVAL_MS", 1.0)),
+            fmt=os.environ.get("PROFILE_FORMAT", "collapsed"),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rate > 0 or self.admin_token)
+
+    def install(self, app):
+        """Register the request hooks; does nothing when profiling is off."""
+        if not self.enabled:
+            return
+        os.makedirs(self.out_dir, exist_ok=True)
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+
+    # ------------------- HOOKS -------------------
+
+    def _choose_mode(self) -> Optional[str]:
+        token = request.headers.get(TOKEN_HEADER)
+        if token is not None:
+            if self.admin_token and hmac.compare_digest(token, self.admin_token):
+                mode = request.headers.get(MODE_HEADER, self.mode or "sample")
+                return mode if mode in MODES else "sample"
+            self.rejected_tokens += 1
+        if self.rate > 0 and self._rng.random() < self.rate:
+            return self.mode
+        return None
+
+    def _before(self):
+        mode = self._choose_mode()
+        if mode is None:
+            return
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Newer Pythons allow one active profiler; skip overlapping requests
+                return
+        else:
+            profiler = StackSampler(threading.get_ident(), self.interval)
+            profiler.start()
+        g._profile = (mode, profiler, time.perf_counter())
+
+    def _finish(self) -> Optional[str]:
+        entry = g.pop("_profile", None)
+        if entry is None:
+            return None
+        mode, profiler, started = entry
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        stem = "{}-{}-{}-{:.0f}ms".format(
+            time.strftime("%Y%m%d-%H%M%S"), request.method,
+            request.path.strip("/").replace("/", "_") or "root", elapsed_ms,
+        )
+        if mode == "cprofile":
+            profiler.disable()
+            path = os.path.join(self.out_dir, stem + ".prof")
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            if self.fmt == "speedscope":
+                path = os.path.join(self.out_dir, stem + ".speedscope.json")
+                profiler.write_speedscope(path, f"{request.method} {request.path}")
+            else:
+                path = os.path.join(self.out_dir, stem + ".folded")
+                profiler.write_collapsed(path)
+        self.profiled += 1
+        self.last_file = path
+        return path
+
+    def _after(self, response):
+        path = self._finish()
+        if path is not None:
+            response.headers["X-Profile-File"] = os.path.basename(path)
+        return response
+
+    def _teardown(self, exc):
+        # Requests that raised never reach after_request
+        self._finish()
+
+    def stats(self) -> Dict:
+        return {
+            'mode': self.mode,
+            'rate': self.rate,
+            'admin_header': bool(self.admin_token),
+            'profiled': self.profiled,
+            'rejected_tokens': self.rejected_tokens,
+            'last_file': self.last_file,
+        }
@@ -0,0 +1,343 @@
+"""
+Batch simulation jobs for POST /api/simulate
+
+A job plays a number of bot-only hands at one table configuration (bot
+specs, stacks, ante, seed) and streams one JSON line per hand, in hand
+order, then a summary line. Hands run through arena.run_hand, so they
+follow the same rules as the app and the arena; hand i's cards and RNG
+depend only on (seed, i), so a job gives the same results however its
+hands are split across workers.
+
+Jobs run off the request thread: a dispatcher thread per job feeds
+batches of hands to a shared process pool and queues the results for the
+response. Each job has a CPU budget (seconds of worker CPU time, summed
+over its batches); a batch is given a share of what is left and stops
+after the hand that uses it up, so a job overshoots by at most one hand
+per batch in flight. A job ends when its hands are done, its budget is
+spent, or it is cancelled (DELETE /api/simulate/<id> or the client
+disconnecting).
+"""
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional
+
+from arena import ANTE, SEATS, STACK, make_bot, run_hand
+from game_logic import create_card
+from structured_logging import reset_worker_logging
+
+BOT_KINDS = ("base", "strategy", "mcts", "gemini")
+GEMINI_PERSONALITIES = ("balanced", "aggressive", "conservative")
+
+
+class SimulationBusy(Exception):
+    """Raised when the server already runs its maximum number of jobs."""
+
+
+def simulate_batch(task) -> Dict:
+    """
+    Worker: play hands [first, first + count) of a job.
+
+    Stops early once the batch has used `cpu_budget` seconds of CPU time.
+
+    Returns:
+        dict: first hand, per-hand results and CPU seconds used
+    """
+    specs, stacks, ante, seed, first, count, cpu_budget = task
+    started = time.process_time()
+    results = []
+    bots = [make_bot(spec, f"{spec}#{i}") for i, spec in enumerate(specs)]
+    for hand in range(first, first + count):
+        rng = random.Random(seed * 1000003 + hand)
+        ids = rng.sample(range(1, 53), 5 * len(bots))
+        hands = [[create_card(c) for c in ids[i * 5:(i + 1) * 5]] for i in range(len(bots))]
+        pot, winner = run_hand(bots, hands, rng.getrandbits(32), stacks, ante)
+        keys = [key for _, key in SEATS[:len(bots)]]
+        results.append({
+            'hand': hand,
+            'net': [bot.money - stack for bot, stack in zip(bots, stacks)],
+            'pot': pot,
+            'winner': keys.index(winner) if winner in keys else None,
+            'folded': [bot.is_folded for bot in bots],
+        })
+        if time.process_time() - started >= cpu_budget:
+            break
+    return {'first': first, 'hands': results, 'cpu': time.process_time() - started}
+
+
+class SimulationJob:
+    """
+    One running simulation: dispatches its batches and queues result lines.
+    """
+
+    def __init__(self, runner: "SimulationRunner", config: Dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.runner = runner
+        self.config = config
+        self.status = "running"
+        self.cpu_seconds = 0.0
+        self._cancelled = threading.Event()
+        self._lines: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"simulate-{self.id}", daemon=True)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def lines(self) -> Iterator[str]:
+        """NDJSON lines for the response; closing the iterator cancels the job."""
+        try:
+            yield json.dumps({'type': "job", 'id': self.id, 'config': self.config}) + "\n"
+            while True:
+                line = self._lines.get()
+                if line is None:
+                    return
+                yield json.dumps(line) + "\n"
+        finally:
+            self.cancel()
+
+    def _run(self):
+        config = self.config
+        n = len(config['seats'])
+        specs = [seat['bot'] for seat in config['seats']]
+        stacks = [seat['stack'] for seat in config['seats']]
+        cpu_limit = self.runner.cpu_seconds
+        in_flight_limit = self.runner.workers
+        started = time.perf_counter()
+
+        totals = [0] * n
+        wins = [0] * n
+        folds = [0] * n
+        ties = 0
+        emitted = 0
+        todo = [(0, config['hands'])]  # (first hand, count) ranges not yet submitted
+        done: Dict[int, List[Dict]] = {}
+        pending = {}  # future -> (CPU seconds reserved, first hand, count)
+
+        try:
+            while emitted < config['hands'] and not self._cancelled.is_set():
+                reserved = sum(budget for budget, _, _ in pending.values())
+                while todo and len(pending) < in_flight_limit:
+                    budget = min(cpu_limit / in_flight_limit, cpu_limit - self.cpu_seconds - reserved)
+                    if budget <= 0:
+                        break
+                    first, count = todo.pop(0)
+                    size = min(count, self.runner.batch_hands)
+                    if size < count:
+                        todo.insert(0, (first + size, count - size))
+                    task = (specs, stacks, config['ante'], config['seed'], first, size, budget)
+                    pending[self.runner.submit(simulate_batch, task)] = (budget, first, size)
+                    reserved += budget
+                if not pending:
+                    self.status = "cpu_limit"
+                    break
+
+                finished, _ = wait(list(pending), timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    _, first, count = pending.pop(future)
+                    batch = future.result()
+                    self.cpu_seconds += batch['cpu']
+                    self.runner.hands += len(batch['hands'])
+                    done[first] = batch['hands']
+                    played = len(batch['hands'])
+                    if played < count:
+                        # Cut short by its CPU share; the rest goes back in line, in hand order
+                        todo.append((first + played, count - played))
+                        todo.sort()
+
+                # Stream completed hands in hand order
+                while emitted in done:
+                    for result in done.pop(emitted):
+                        for seat in range(n):
+                            totals[seat] += result['net'][seat]
+                            folds[seat] += result['folded'][seat]
+                        if result['winner'] is None:
+                            ties += 1
+                        else:
+                            wins[result['winner']] += 1
+                        self._lines.put(dict(result, type="hand"))
+                        emitted += 1
+            else:
+                if self._cancelled.is_set():
+                    self.status = "cancelled"
+                else:
+                    self.status = "completed"
+        except Exception as e:
+            self.status = "error"
+            self._lines.put({'type': "error", 'error': str(e)})
+        finally:
+            for future in pending:
+                future.cancel()
+            self._lines.put({
+                'type': "summary",
+                'id': self.id,
+                'status': self.status,
+                'hands': emitted,
+                'ties': ties,
+                'seats': [{
+                    'bot': specs[seat],
+                    'net': totals[seat],
+                    'per_100': totals[seat] / emitted * 100 if emitted else 0.0,
+                    'wins': wins[seat],
+                    'folds': folds[seat],
+                } for seat in range(n)],
+                'cpu_seconds': self.cpu_seconds,
+                'wall_seconds': time.perf_counter() - started,
+            })
+            self._lines.put(None)
+            self.runner._finished(self)
+
+
+class SimulationRunner:
+    """
+    Shared worker pool, limits and bookkeeping for simulation jobs.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_jobs: int = 4, max_hands: int = 100000,
+                 cpu_seconds: float = 30.0, batch_hands: int = 50, max_mcts_ms: float = 200.0,
+                 strategy_table: Optional[str] = None):
+        """
+        Args:
+            workers: Worker processes (default: all cores); also the batches one job keeps in flight
+            max_jobs: Jobs running at once before new ones get SimulationBusy
+            max_hands: Most hands one job may ask for
+            cpu_seconds: Worker CPU time one job may use
+            batch_hands: Hands per worker task
+            max_mcts_ms: Largest per-decision search budget for mcts seats
+            strategy_table: Table file for strategy seats (the server's, never the client's)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self.max_hands = max_hands
+        self.cpu_seconds = cpu_seconds
+        self.batch_hands = batch_hands
+        self.max_mcts_ms = max_mcts_ms
+        self.strategy_table = strategy_table
+        self.jobs: Dict[str, SimulationJob] = {}
+        self._pool = None
+        self._lock = threading.Lock()
+        self.started = 0
+        self.finished = {}
+        self.hands = 0
+
+    @classmethod
+    def from_env(cls, strategy_table: Optional[str] = None) -> "SimulationRunner":
+        """
+        SIMULATE_WORKERS, SIMULATE_MAX_JOBS, SIMULATE_MAX_HANDS,
+        SIMULATE_CPU_SECONDS, SIMULATE_BATCH_HANDS
+        """
+        workers = os.environ.get("SIMULATE_WORKERS")
+        return cls(
+            workers=int(workers) if workers else None,
+            max_jobs=int(os.environ.get("SIMULATE_MAX_JOBS", 4)),
+            max_hands=int(os.environ.get("SIMULATE_MAX_HANDS", 100000)),
+            cpu_seconds=float(os.environ.get("SIMULATE_CPU_SECONDS", 30)),
+            batch_hands=int(os.environ.get("SIMULATE_BATCH_HANDS", 50)),
+            strategy_table=strategy_table,
+        )
+
+    # ------------------- CONFIG -------------------
+
+    def _bot_spec(self, spec: str) -> str:
+        kind, _, arg = str(spec).partition(":")
+        if kind not in BOT_KINDS:
+            raise ValueError(f"Unknown bot type: {kind} (expected one of {', '.join(BOT_KINDS)})")
+        if kind == "base":
+            return "base"
+        if kind == "strategy":
+            path = self.strategy_table or "strategy_table.bin"
+            if arg:
+                raise ValueError("strategy seats always use the server's strategy table")
+            if not os.path.exists(path):
+                raise ValueError("This server has no strategy table")
+            return f"strategy:{path}"
+        if kind == "mcts":
+            budget = float(arg or 20)
+            if not 0 < budget <= self.max_mcts_ms:
+                raise ValueError(f"mcts budget must be in (0, {self.max_mcts_ms:g}] ms")
+            return f"mcts:{budget:g}"
+        personality = arg or "balanced"
+        if personality not in GEMINI_PERSONALITIES:
+            raise ValueError(f"Unknown gemini personality: {personality}")
+        return f"gemini:{personality}"
+
+    def parse_config(self, data: Dict) -> Dict:
+        """
+        Validate a request body into a job config.
+
+        {"seats": ["base", {"bot": "mcts:20", "stack": 500}], "hands": 1000,
+         "seed": 1, "ante": 10}
+
+        Raises:
+            ValueError: If the configuration is invalid or over the server limits
+        """
+        seats = data.get("seats") or ["base", "base"]
+        if not isinstance(seats, list) or not 2 <= len(seats) <= len(SEATS):
+            raise ValueError(f"seats must be a list of 2 to {len(SEATS)} bots")
+        parsed = []
+        for seat in seats:
+            if not isinstance(seat, dict):
+                seat = {'bot': seat}
+            stack = int(seat.get("stack", STACK))
+            if stack <= 0:
+                raise ValueError("stack must be positive")
+            parsed.append({'bot': self._bot_spec(seat.get("bot", "base")), 'stack': stack})
+        hands = int(data.get("hands", 100))
+        if not 1 <= hands <= self.max_hands:
+            raise ValueError(f"hands must be between 1 and {self.max_hands}")
+        ante = int(data.get("ante", ANTE))
+        if ante < 0:
+            raise ValueError("ante must not be negative")
+        return {'seats': parsed, 'hands': hands, 'seed': int(data.get("seed", 0)), 'ante': ante}
+
+    # ------------------- JOBS -------------------
+
+    def start(self, config: Dict) -> SimulationJob:
+        """Start a job for a parsed config; raises SimulationBusy at the job limit."""
+        with self._lock:
+            if len(self.jobs) >= self.max_jobs:
+                raise SimulationBusy(f"{len(self.jobs)} simulations already running; try again later")
+            job = SimulationJob(self, config)
+            self.jobs[job.id] = job
+            self.started += 1
+        job._thread.start()
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def submit(self, fn, task):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=reset_worker_logging)
+            return self._pool.submit(fn, task)
+
+    def _finished(self, job: SimulationJob):
+        with self._lock:
+            self.jobs.pop(job.id, None)
+            self.finished[job.status] = self.finished.get(job.status, 0) + 1
+
+    def close(self):
+        for job in list(self.jobs.values()):
+            job.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        return {
+            'workers': self.workers,
+            'running': len(self.jobs),
+            'started': self.started,
+            'finished': dict(self.finished),
+            'hands': self.hands,
+            'cpu_seconds_per_job': self.cpu_seconds,
+        }
@@ -0,0 +1,179 @@
+"""
+Speculative bot decisions
+
+While a table waits for the human, the likely next human actions (hold
+and a few common raise sizes) are played out on cloned states in the
+background and the bots' decisions are kept per table. When the real
+action arrives and is exactly a branch's action (a raise of the same
+amount), those decisions are replayed instead of asking the bots again;
+any other action asks the bots, since their decisions depend on the bet
+they face.
+
+Branch bookkeeping works on table_core snapshots: the likely actions are
+read from the table's immutable Table, and branches are only used if the
+table still equals that snapshot when the action arrives, so any other
+change invalidates them; losing branches are cancelled. The bots are
+stateful objects, so a branch still needs a playable copy of the seats:
+the request takes one copy per schedule, and each branch copies that base
+in its worker thread.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Optional, Tuple
+
+from game_flow import apply_player_action, clone_state
+from table_core import SEAT_INDEX, Table, highest_bet, table_from_state
+
+logger = logging.getLogger(__name__)
+
+
+class Speculator:
+    """
+    Per-table speculation cache backed by a small low-priority worker pool.
+    """
+
+    def __init__(self, max_workers: int = 2,
+                 raise_buckets: Tuple[int, ...] = (20, 50, 100),
+                 max_branches: int = 3, llm_priority: int = -1):
+        """
+        Args:
+            max_workers: Background threads running speculative branches
+            raise_buckets: Raise sizes to speculate on; only a raise of exactly
+                one of these amounts reuses its branch
+            max_branches: Most likely branches to run per table state
+            llm_priority: LLM queue priority of speculative bot calls, below
+                the live turns (0) when a RateLimiter is in use
+        """
+        self.raise_buckets = tuple(sorted(raise_buckets))
+        self.max_branches = max_branches
+        self.llm_priority = llm_priority
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculate")
+        self._tables = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.waited = 0
+        self.cancelled = 0
+        self.branches_run = 0
+
+    # ------------------- BRANCHES -------------------
+
+    @staticmethod
+    def branch_key(action: str, amount: int = 0) -> Tuple[str, int]:
+        """Branch key for a human action: the amount only matters for raises."""
+        return (action, int(amount) if action == "raise" else 0)
+
+    def likely_actions(self, table: Table):
+        """
+        Human actions worth speculating on, most likely first.
+
+        Only actions that make the bots act are useful: hold when matched
+        (call otherwise does nothing for the bots) and raises.
+        """
+        player = table.seats[SEAT_INDEX["player"]]
+        if table.status != "playing" or player.folded:
+            return []
+        actions = []
+        if highest_bet(table) <= player.current_bet:
+            actions.append(("hold", 0))
+        for amount in self.raise_buckets:
+            if amount <= player.money:
+                actions.append(("raise", amount))
+        return actions[:self.max_branches]
+
+    def schedule(self, table_id: str, state):
+        """
+        Start speculating on the table's current state, replacing older branches.
+
+        Must be called from the thread that owns the state (the request);
+        the snapshot and the base copy are taken before returning.
+        """
+        self.invalidate(table_id)
+        table = table_from_state(state)
+        actions = self.likely_actions(table)
+        if not actions:
+            return
+        base = clone_state(state)
+        for key in ("opponent", "gemini_bot"):
+            if hasattr(base.get(key), "llm_priority"):
+                base[key].llm_priority = self.llm_priority
+        branches = {
+            self.branch_key(action, amount): self._executor.submit(self._run_branch, base, action, amount)
+            for action, amount in actions
+        }
+        with self._lock:
+            self._tables[table_id] = {"table": table, "branches": branches}
+
+    def _run_branch(self, base, action: str, amount: int) -> Dict:
+        """Play one hypothetical human action on a copy of the base, recording bot decisions."""
+        decisions = {}
+        apply_player_action(clone_state(base), action, amount, decisions=decisions)
+        self.branches_run += 1
+        return decisions
+
+    # ------------------- LOOKUP -------------------
+
+    def take(self, table_id: str, state, action: str, amount: int = 0,
+             timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Claim the speculated decisions for the action actually taken.
+
+        Other branches for the table are cancelled. If the matching branch
+        is still running, waits up to `timeout` seconds for it.
+
+        Returns:
+            dict|None: {ai_name: (action, amount)} to replay, or None
+        """
+        with self._lock:
+            entry = self._tables.pop(table_id, None)
+        if entry is None or entry["table"] != table_from_state(state):
+            if entry is not None:
+                self._cancel(entry)
+            self.misses += 1
+            return None
+
+        future = entry["branches"].pop(self.branch_key(action, amount), None)
+        self._cancel(entry)
+        if future is None:
+            self.misses += 1
+            return None
+        if not future.done():
+            self.waited += 1
+        try:
+            decisions = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning("Speculative branch failed: %s", e, extra={'table': table_id})
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(decisions)
+
+    def invalidate(self, table_id: str):
+        """Drop (and cancel) all branches for a table."""
+        with self._lock:
+            entry = self._tables.pop(table_id, None)
+        if entry is not None:
+            self._cancel(entry)
+
+    def _cancel(self, entry: Dict):
+        for future in entry["branches"].values():
+            if future.cancel():
+                self.cancelled += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'waited_for_branch': self.waited,
+            'cancelled': self.cancelled,
+            'branches_run': self.branches_run,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'tables': len(self._tables),
+        }
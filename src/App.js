@@ -10,6 +10,55 @@ const suitSymbols = {
   spades: '♠',
 };
 
+// Compact wire format (wire_format.py): positional arrays with card ids
+const COMPACT_STATE = 'application/vnd.poker.compact+json';
+const SUITS = ['hearts', 'diamonds', 'spades', 'clubs'];
+const RANK_CODES = { 1: 'A', 10: '0', 11: 'J', 12: 'Q', 13: 'K' };
+const SUIT_CODES = { hearts: 'H', diamonds: 'D', spades: 'S', clubs: 'C' };
+
+// Retried actions reuse their Idempotency-Key, so the server applies them once (idempotency.py)
+const ACTION_RETRIES = 3;
+const RETRY_DELAY_MS = 500;
+const ACTION_TIMEOUT_MS = 10000;
+
+const newRequestId = () => (window.crypto?.randomUUID
+  ? window.crypto.randomUUID()
+  : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`);
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+const decodeCard = (id) => {
+  if (!id) return { hidden: true };
+  const rank = (id % 13) + 1;
+  const suit = SUITS[Math.floor((id - 1) / 13)];
+  const image = `https://deckofcardsapi.com/static/img/${RANK_CODES[rank] ?? rank}${SUIT_CODES[suit]}.png`;
+  return { rank, suit, image };
+};
+
+const decodeSeat = (seat) => seat && {
+  money: seat[0],
+  current_bet: seat[1],
+  held: !!seat[2],
+  hole: seat[3].map(decodeCard),
+  best: { hand: seat[4], rank: seat[5] },
+};
+
+// Rebuild the verbose state shape the components read
+const decodeState = ([version, pot, status, result, winnerPreview, stateVersion, player, opponent, geminiBot]) => {
+  if (version !== 1) throw new Error(`Unsupported state encoding v${version}`);
+  const state = {
+    pot,
+    status,
+    result,
+    winner_preview: winnerPreview,
+    version: stateVersion,
+    player: decodeSeat(player),
+    opponent: decodeSeat(opponent),
+  };
+  if (geminiBot) state.gemini_bot = decodeSeat(geminiBot);
+  return state;
+};
+
 const faceCardImages = {
   1: '/Taylor.png', // Ace
   13: '/Dylan.png', // King
@@ -82,11 +131,25 @@ function App() {
   const audioRef = useRef(null);
 
   const fetchJson = async (url, opts = {}) => {
-    const res = await fetch(url, {
-      headers: { 'Content-Type': 'application/json' },
-      ...opts,
-    });
-    return res.json();
+    const { headers = {}, retries = 0, timeoutMs, ...rest } = opts;
+    let res;
+    for (let attempt = 0; ; attempt++) {
+      try {
+        res = await fetch(url, {
+          headers: { 'Content-Type': 'application/json', Accept: `${COMPACT_STATE}, application/json;q=0.5`, ...headers },
+          signal: timeoutMs ? AbortSignal.timeout(timeoutMs) : undefined,
+          ...rest,
+        });
+        // 409: table conflict or the first attempt is still running; 5xx: worker trouble
+        if (attempt >= retries || (res.status !== 409 && res.status < 500)) break;
+      } catch (err) {
+        if (attempt >= retries) throw err;
+      }
+      await sleep(RETRY_DELAY_MS * 2 ** attempt);
+    }
+    const body = await res.json();
+    const compact = (res.headers.get('Content-Type') || '').startsWith(COMPACT_STATE);
+    return compact ? decodeState(body) : body;
   };
 
   const loadNewGame = async () => {
@@ -108,6 +171,9 @@ function App() {
   const sendAction = async (action, amount = 0) => {
     const state = await fetchJson('/api/action', {
       method: 'POST',
+      headers: { 'Idempotency-Key': newRequestId() },
+      retries: ACTION_RETRIES,
+      timeoutMs: ACTION_TIMEOUT_MS,
       body: JSON.stringify({ action, amount }),
     });
     setGameState(state);
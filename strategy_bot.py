@@ -0,0 +1,92 @@
+"""
+Strategy-table bot - plays the solved strategy from strategy_table.py
+
+The table is produced offline by cfr_solver.py. At decision time the bot
+maps its hand to a strength bucket and the betting so far to a node of the
+abstract betting tree, then samples from the stored action probabilities.
+"""
+
+import random
+from typing import Optional, Tuple
+
+from ai_player import BaseAIPlayer
+from strategy_table import BET_SIZES, StrategyTable
+
+
+class StrategyBot(BaseAIPlayer):
+    """
+    Bot that decides by a lookup in a precomputed equilibrium strategy table.
+    """
+
+    def __init__(self, name: str, money: int = 1000,
+                 table_path: str = "strategy_table.bin",
+                 min_bet: int = 10, seed: Optional[int] = None):
+        """
+        Initialize the bot.
+
+        Args:
+            name: Player name (displayed in game)
+            money: Starting chip stack (default: 1000)
+            table_path: Strategy table written by cfr_solver.py
+            min_bet: Chips a pot-fraction bet is based on while the pot is empty
+            seed: Optional seed for the bot's own action sampling
+        """
+        super().__init__(name, money, rng=random.Random(seed))
+        self.table = StrategyTable.open(table_path)
+        self.min_bet = min_bet
+
+    def _history(self, to_call: int, pot: int, already_in: int) -> Tuple[str, ...]:
+        """Nearest node of the abstract betting tree for the current spot."""
+        if to_call <= 0:
+            return ("k",)
+        pot_before = max(1, pot - to_call)
+        fraction = to_call / pot_before
+        size = min(range(len(BET_SIZES)), key=lambda i: abs(BET_SIZES[i] - fraction))
+        if already_in > 0:
+            # We have chips in and are behind: treat it as facing a raise
+            return (f"b{size}", "r")
+        return (f"b{size}",)
+
+    def decide_action(self, game_state, player) -> Tuple[str, Optional[int]]:
+        """
+        Decide by sampling the solved strategy for this hand bucket and betting node.
+
+        Args:
+            game_state: Dict with pot and the *_bet amounts of every seat
+            player: This bot
+
+        Returns:
+            tuple: (action, amount), 'call' with None doubles as hold
+        """
+        if not self.hand or len(self.hand) < 5:
+            return ("fold", None)
+
+        pot = game_state.get("pot", 0)
+        highest = max([v for k, v in game_state.items() if k.endswith("_bet")] or [0])
+        to_call = max(0, highest - player.current_bet)
+        history = self._history(to_call, pot, player.current_bet)
+
+        strategy = self.table.strategy(self.table.bucket(self.hand), history)
+        actions = [a for a, _ in strategy]
+        weights = [max(0.0, p) for _, p in strategy]
+        action = self.rng.choices(actions, weights=weights)[0] if sum(weights) > 0 else actions[0]
+
+        if action in ("k", "c"):
+            return ("call", None)
+        if action == "f":
+            # Folding when nothing is owed only throws the hand away
+            return ("call", None) if to_call == 0 else ("fold", None)
+
+        base = max(pot, self.min_bet)
+        if action == "r":
+            amount = base + to_call
+        else:
+            amount = BET_SIZES[int(action[1:])] * base
+        amount = min(int(amount), player.money - to_call)
+        if amount <= 0:
+            return ("call", None)
+        return ("raise", amount)
+
+    def get_strategy_name(self) -> str:
+        return (f"Plays a precomputed CFR equilibrium strategy "
+                f"({self.table.num_buckets} hand buckets, {len(BET_SIZES)} bet sizes).")
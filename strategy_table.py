@@ -0,0 +1,184 @@
+"""
+Strategy table for the one-round 5-card game
+
+Abstraction shared by the offline solver (cfr_solver.py) and StrategyBot:
+hands are grouped into strength buckets, bets into pot-fraction buckets,
+and the betting round is a small fixed tree. The solved average strategy
+is stored as a flat float32 array and memory-mapped at load, so a lookup
+is a couple of index computations.
+
+File layout (little endian):
+    magic b"PKST", uint16 version, uint16 num_buckets, uint16 num_histories,
+    uint16 max_actions, uint16 num_bet_sizes, float32 bet_sizes[num_bet_sizes],
+    float64 bucket_edges[num_buckets - 1],
+    float32 strategy[num_buckets][num_histories][max_actions]
+"""
+
+import mmap
+import random
+import struct
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from game_logic import create_card
+from hand_evaluator import HandEvaluator
+
+MAGIC = b"PKST"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHHH")
+
+# Bet sizes as fractions of the pot; a raise is always pot-sized
+BET_SIZES = (0.5, 1.0, 2.0)
+BET_ACTIONS = tuple(f"b{i}" for i in range(len(BET_SIZES)))
+ANTE = 1.0
+
+
+# ------------------- BETTING TREE -------------------
+
+def legal_actions(history: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
+    """
+    Actions at a node of the abstract betting tree, or None if terminal.
+
+    'k' check, 'bN' bet BET_SIZES[N] of the pot, 'f' fold, 'c' call,
+    'r' pot-sized raise (one raise per hand).
+    """
+    if history == () or history == ("k",):
+        return ("k",) + BET_ACTIONS
+    last = history[-1]
+    if last.startswith("b"):
+        return ("f", "c", "r")
+    if last == "r":
+        return ("f", "c")
+    return None
+
+
+def player_to_act(history: Tuple[str, ...]) -> int:
+    """Player 0 acts first; players alternate."""
+    return len(history) % 2
+
+
+def _decision_nodes() -> List[Tuple[str, ...]]:
+    nodes = []
+    stack = [()]
+    while stack:
+        history = stack.pop()
+        actions = legal_actions(history)
+        if actions is None:
+            continue
+        nodes.append(history)
+        stack.extend(history + (a,) for a in reversed(actions))
+    return nodes
+
+
+HISTORIES = _decision_nodes()
+HISTORY_INDEX = {h: i for i, h in enumerate(HISTORIES)}
+MAX_ACTIONS = max(len(legal_actions(h)) for h in HISTORIES)
+
+
+def contributions(history: Tuple[str, ...]) -> List[float]:
+    """Chips each player has put in (antes included) after `history`."""
+    put = [ANTE, ANTE]
+    for i, action in enumerate(history):
+        p = i % 2
+        other = 1 - p
+        pot = put[0] + put[1]
+        if action.startswith("b"):
+            put[p] += BET_SIZES[int(action[1:])] * pot
+        elif action == "c":
+            put[p] = put[other]
+        elif action == "r":
+            to_call = put[other] - put[p]
+            put[p] += to_call + (pot + to_call)
+    return put
+
+
+# ------------------- HAND BUCKETS -------------------
+
+def hand_score(hand) -> float:
+    """Scalar hand strength: category first, then the category's rank value."""
+    hand_name, value = HandEvaluator.evaluate_hand(hand)
+    return HandEvaluator.HAND_RANKINGS[hand_name] * 100000 + value
+
+
+def random_hands(rng: random.Random, count: int = 1):
+    """Deal `count` disjoint random 5-card hands."""
+    ids = rng.sample(range(1, 53), 5 * count)
+    return [[create_card(c) for c in ids[i * 5:(i + 1) * 5]] for i in range(count)]
+
+
+def compute_bucket_edges(num_buckets: int, samples: int = 20000, seed: int = 0) -> List[float]:
+    """Score thresholds splitting random hands into equal-frequency buckets."""
+    rng = random.Random(seed)
+    scores = sorted(hand_score(random_hands(rng)[0]) for _ in range(samples))
+    return [scores[(i * samples) // num_buckets] for i in range(1, num_buckets)]
+
+
+# ------------------- TABLE -------------------
+
+def write_table(path: str, bucket_edges: Sequence[float], strategy: Sequence[float]):
+    """
+    Write a strategy table.
+
+    Args:
+        path: Output file
+        bucket_edges: num_buckets - 1 score thresholds
+        strategy: Flat probabilities, indexed [bucket][history][action]
+    """
+    num_buckets = len(bucket_edges) + 1
+    expected = num_buckets * len(HISTORIES) * MAX_ACTIONS
+    if len(strategy) != expected:
+        raise ValueError(f"strategy has {len(strategy)} entries, expected {expected}")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, num_buckets, len(HISTORIES), MAX_ACTIONS, len(BET_SIZES)))
+        f.write(struct.pack(f"<{len(BET_SIZES)}f", *BET_SIZES))
+        f.write(struct.pack(f"<{len(bucket_edges)}d", *bucket_edges))
+        f.write(struct.pack(f"<{len(strategy)}f", *strategy))
+
+
+class StrategyTable:
+    """
+    Read-only, memory-mapped strategy table.
+    """
+
+    _open_tables: Dict[str, "StrategyTable"] = {}
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, num_buckets, num_histories, max_actions, num_bets = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} strategy table")
+        offset = HEADER.size
+        bet_sizes = struct.unpack_from(f"<{num_bets}f", self._mmap, offset)
+        offset += 4 * num_bets
+        if num_histories != len(HISTORIES) or max_actions != MAX_ACTIONS or \
+                tuple(round(b, 4) for b in bet_sizes) != BET_SIZES:
+            raise ValueError(f"{path} was solved for a different betting abstraction")
+        self.num_buckets = num_buckets
+        self.bucket_edges = struct.unpack_from(f"<{num_buckets - 1}d", self._mmap, offset)
+        offset += 8 * (num_buckets - 1)
+        self._strategy = memoryview(self._mmap)[offset:].cast("f")
+
+    @classmethod
+    def open(cls, path: str) -> "StrategyTable":
+        """Open a table once per process and share the mapping between bots."""
+        table = cls._open_tables.get(path)
+        if table is None:
+            table = cls._open_tables[path] = cls(path)
+        return table
+
+    def bucket(self, hand) -> int:
+        """Strength bucket of a 5-card hand."""
+        return bisect_right(self.bucket_edges, hand_score(hand))
+
+    def strategy(self, bucket: int, history: Tuple[str, ...]) -> List[Tuple[str, float]]:
+        """
+        Solved action probabilities at a node.
+
+        Returns:
+            list: (action, probability) for each legal action
+        """
+        actions = legal_actions(history)
+        base = (bucket * len(HISTORIES) + HISTORY_INDEX[history]) * MAX_ACTIONS
+        return [(a, self._strategy[base + i]) for i, a in enumerate(actions)]
@@ -0,0 +1,252 @@
+"""
+Non-blocking structured logging
+
+Modules log through the standard library (logging.getLogger(__name__));
+this module installs the pipeline behind it:
+
+- the root logger gets a QueueHandler, so a request thread only drops the
+  record on an in-memory queue, and a QueueListener thread formats and
+  writes it. When the queue is full the record is dropped and counted;
+  logging never blocks a request on console or disk I/O;
+- levels per logger (LOG_LEVEL, LOG_LEVELS="llm_logic=DEBUG,app=WARNING"),
+  so disabled records are never even created;
+- sampling of the high-volume records below INFO (LOG_SAMPLE="0.1" or
+  "llm_logic=0.05,game_flow=0.5"): a sampled-out record never reaches the
+  queue;
+- one JSON object per line (LOG_FORMAT=json, the default, or text) with
+  the table and hand ids of the request (see log_context), the trace id
+  of the current span and any extra= fields.
+
+LOG_FILE writes to a file instead of stdout; LOG_QUEUE_SIZE bounds the queue.
+
+Forked worker processes inherit the queue handler but not the listener
+thread, so process pools pass reset_worker_logging as their initializer.
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Dict, Optional
+
+from tracing import TRACER
+
+_log_context = contextvars.ContextVar("log_context", default=None)
+
+# LogRecord attributes that are not extra= fields
+_RECORD_FIELDS = frozenset(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+
+@contextlib.contextmanager
+def log_context(**fields):
+    """Attach fields (table, hand) to every record logged inside the block."""
+    token = _log_context.set(dict(_log_context.get() or {}, **fields))
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def bind_log_context(**fields):
+    """Add fields to the innermost log_context (e.g. the hand once the table is loaded)."""
+    context = _log_context.get()
+    if context is not None:
+        context.update(fields)
+
+
+def reset_worker_logging():
+    """
+    Pool initializer: log straight to stderr in a forked worker.
+
+    The worker inherited the parent's queue handler, whose queue no thread
+    drains in this process; records would pile up and then be dropped.
+    """
+    level = logging.getLogger().level
+    logging.basicConfig(level=level, stream=sys.stderr, force=True,
+                        format="%(asctime)s %(levelname)s %(name)s[%(process)d]: %(message)s")
+
+
+def _parse_spec(spec: Optional[str]) -> (Optional[str], Dict[str, str]):
+    """'default,name=value,...' -> (default, {name: value})."""
+    default, by_name = None, {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, value = part.partition("=")
+        if sep:
+            by_name[name.strip()] = value.strip()
+        else:
+            default = part
+    return default, by_name
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Producer side: adds the request context, samples, and never blocks."""
+
+    def __init__(self, log_queue, max_size: int, sample_default: float, sample: Dict[str, float],
+                 seed: Optional[int] = None):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.sample_default = sample_default
+        self.sample = sample
+        self._rates: Dict[str, float] = {}
+        self._rng = random.Random(seed)
+        self.enqueued = 0
+        self.sampled_out = 0
+        self.dropped = 0
+
+    def _rate(self, name: str) -> float:
+        """Sample rate of the most specific configured logger prefix."""
+        rate = self._rates.get(name)
+        if rate is None:
+            rate, prefix = self.sample_default, name
+            while prefix:
+                if prefix in self.sample:
+                    rate = self.sample[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._rates[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.INFO:
+            rate = self._rate(record.name)
+            if rate < 1.0 and self._rng.random() >= rate:
+                self.sampled_out += 1
+                return False
+        return super().filter(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only resolve what can change after the call (the message args and
+        # the request context); the listener thread does the formatting
+        record.msg = record.getMessage()
+        record.args = None
+        context = _log_context.get()
+        if context:
+            for key, value in context.items():
+                if getattr(record, key, None) is None:
+                    setattr(record, key, value)
+        trace_id = getattr(TRACER.current_span(), "trace_id", None)
+        if trace_id is not None and getattr(record, "trace", None) is None:
+            record.trace = f"{trace_id:016x}"
+        return record
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # The queue is thread-safe: skip the handler lock every other handler takes
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def enqueue(self, record: logging.LogRecord):
+        # A SimpleQueue (C, no Condition) with an approximate bound
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+        self.enqueued += 1
+
+
+class LogPipeline:
+    """
+    Queue-based logging for the whole process (see the module docstring).
+    """
+
+    def __init__(self, level: str = "INFO", levels: Optional[Dict[str, str]] = None,
+                 sample: float = 1.0, sample_by_logger: Optional[Dict[str, float]] = None,
+                 fmt: str = "json", path: Optional[str] = None, queue_size: int = 10000):
+        """
+        Args:
+            level: Root level
+            levels: Level per logger name (e.g. {"llm_logic": "DEBUG"})
+            sample: Fraction of records below INFO kept
+            sample_by_logger: Sample rate per logger name (and its children)
+            fmt: "json" or "text"
+            path: Append to this file instead of writing to stdout
+            queue_size: Records buffered before new ones are dropped
+        """
+        if fmt not in ("json", "text"):
+            raise ValueError(f"Unknown LOG_FORMAT: {fmt}")
+        self.level = level.upper()
+        self.levels = {name: lvl.upper() for name, lvl in (levels or {}).items()}
+        self.fmt = fmt
+        self.path = path
+        self.queue_size = queue_size
+        self.handler = _QueueHandler(queue.SimpleQueue(), queue_size, sample, sample_by_logger or {})
+        self.listener = None
+
+    @classmethod
+    def from_env(cls) -> "LogPipeline":
+        """LOG_LEVEL, LOG_LEVELS, LOG_SAMPLE, LOG_FORMAT, LOG_FILE, LOG_QUEUE_SIZE."""
+        level_default, levels = _parse_spec(os.environ.get("LOG_LEVELS"))
+        sample_default, sample = _parse_spec(os.environ.get("LOG_SAMPLE"))
+        return cls(level=os.environ.get("LOG_LEVEL") or level_default or "INFO",
+                   levels=levels,
+                   sample=float(sample_default or 1.0),
+                   sample_by_logger={name: float(rate) for name, rate in sample.items()},
+                   fmt=os.environ.get("LOG_FORMAT", "json").lower(),
+                   path=os.environ.get("LOG_FILE") or None,
+                   queue_size=int(os.environ.get("LOG_QUEUE_SIZE", 10000)))
+
+    def install(self) -> "LogPipeline":
+        """Route the root logger through the queue and start the writer thread."""
+        if self.listener is not None:
+            return self
+        output = logging.FileHandler(self.path) if self.path else logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter() if self.fmt == "json" else
+                            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        self.listener = logging.handlers.QueueListener(self.handler.queue, output)
+        self.listener.start()
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, _QueueHandler):
+                root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        for name, level in self.levels.items():
+            logging.getLogger(name).setLevel(level)
+        return self
+
+    def close(self):
+        """Write out what is queued and stop the writer thread."""
+        if self.listener is not None:
+            logging.getLogger().removeHandler(self.handler)
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self) -> Dict:
+        handler = self.handler
+        return {
+            'level': self.level,
+            'levels': self.levels,
+            'format': self.fmt,
+            'enqueued': handler.enqueued,
+            'sampled_out': handler.sampled_out,
+            'dropped': handler.dropped,
+            'queued': handler.queue.qsize(),
+        }
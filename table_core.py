@@ -0,0 +1,220 @@
+"""
+Functional core of the table rules
+
+A table's betting state as immutable records, and the rules as a pure
+reducer:
+
+    table = apply(table, Action("player", "raise", 20))
+
+returns a new Table and never touches the old one. A new table shares
+every seat the action did not change with the old one (and hands are
+tuples of card ids), so keeping a snapshot, an undo step or a branch is
+one reference and a few hundred bytes, where the mutable state dict needs
+its seat objects copied.
+
+game_flow drives this core (asking the bots for their decisions and
+keeping the seat objects and the state dict in sync for the rest of the
+app); table_from_state / sync_state convert between the two.
+"""
+
+from typing import NamedTuple, Optional, Tuple
+
+from game_logic import create_card
+from hand_evaluator import HandEvaluator
+
+# Seat name (as in decisions and the opponent model), state dict key, held flag key
+SEATS = (("player", "player", "player_held"),
+         ("opponent", "opponent", "opponent_held"),
+         ("gemini", "gemini_bot", "gemini_held"))
+SEAT_INDEX = {name: i for i, (name, _, _) in enumerate(SEATS)}
+# Winner names as evaluate_winner reports them
+WINNER_NAMES = ("player", "opponent", "gemini_bot")
+
+# One shared, never mutated Card per id, for the hand evaluator
+CARDS = (None,) + tuple(create_card(card_id) for card_id in range(1, 53))
+
+
+class Seat(NamedTuple):
+    money: int
+    current_bet: int
+    hand: Tuple[int, ...]
+    folded: bool = False
+    held: bool = False
+
+
+class Table(NamedTuple):
+    seats: Tuple[Optional[Seat], ...]  # player, opponent, gemini (None if absent)
+    pot: int = 0
+    status: str = "playing"
+    result: Optional[str] = None
+    version: int = 0
+
+
+class Action(NamedTuple):
+    seat: str  # "player", "opponent" or "gemini"; "table" for a showdown
+    kind: str  # raise, call, fold, hold (human); stand (bot: held without betting); showdown
+    amount: int = 0
+    human: bool = False  # the human's rules: raises exclude the call, holds need a matched bet
+
+
+# ------------------- QUERIES -------------------
+
+def highest_bet(table: Table) -> int:
+    highest = 0
+    for seat in table.seats:
+        if seat is not None and seat.current_bet > highest:
+            highest = seat.current_bet
+    return highest
+
+
+def all_done(table: Table) -> bool:
+    """Every seat has held or folded."""
+    return all(seat.held or seat.folded for seat in table.seats if seat is not None)
+
+
+def cards(seat: Seat):
+    return [CARDS[card_id] for card_id in seat.hand]
+
+
+def showdown(table: Table) -> Tuple[str, Tuple]:
+    """
+    Winner of the hand as it stands, as game_flow.evaluate_winner computes it.
+
+    Returns:
+        tuple: (winner name or "tie", (best hand or None) per seat)
+    """
+    bests = tuple(HandEvaluator.evaluate_hand(cards(seat)) if seat is not None and seat.hand else None
+                  for seat in table.seats)
+    active = [i for i, seat in enumerate(table.seats)
+              if seat is not None and not seat.folded and bests[i]]
+    if not active:
+        return "tie", bests
+    best = active[0]
+    for i in active[1:]:
+        if HandEvaluator.compare_hands(cards(table.seats[best]), cards(table.seats[i])) == 2:
+            best = i
+    return WINNER_NAMES[best], bests
+
+
+# ------------------- REDUCER -------------------
+# Records are built directly rather than with _replace, which is several
+# times slower; this runs for every action of every simulated hand.
+
+def _pay(seat: Seat, amount: int, held: bool) -> Seat:
+    """The seat after putting `amount` (capped at its stack) in the pot."""
+    amount = min(amount, seat.money)
+    return Seat(seat.money - amount, seat.current_bet + amount, seat.hand, seat.folded, held)
+
+
+def _table(table: Table, seats, pot: int, version: int) -> Table:
+    return Table(seats, pot, table.status, table.result, version)
+
+
+def _with(table: Table, i: int, seat: Seat, pot: int, version: int) -> Table:
+    seats = table.seats
+    return _table(table, seats[:i] + (seat,) + seats[i + 1:], pot, version)
+
+
+def _raised(table: Table, i: int, seat: Seat, version: int) -> Table:
+    """After a raise by seat i: nobody has held any more."""
+    seats = tuple(seat if j == i else
+                  Seat(other.money, other.current_bet, other.hand, other.folded, False)
+                  if other is not None and other.held else other
+                  for j, other in enumerate(table.seats))
+    return _table(table, seats, table.pot + seat.current_bet - table.seats[i].current_bet, version)
+
+
+def apply(table: Table, action: Action) -> Table:
+    """
+    The table after one action.
+
+    Human actions bump the table version; a human hold while behind is
+    rejected. Bot actions the rules do not know (or a raise without an
+    amount) change nothing. A rejected or no-op action returns `table`
+    itself, so `apply(t, a) is t` tests for it.
+    """
+    if action.kind == "showdown":
+        return settle(table)
+    if table.status != "playing":
+        return table
+    i = SEAT_INDEX[action.seat]
+    seat = table.seats[i]
+    kind = action.kind
+    to_call = max(0, highest_bet(table) - seat.current_bet)
+    version = table.version + 1 if action.human else table.version
+
+    if kind == "raise":
+        if action.human:
+            return _raised(table, i, _pay(seat, max(0, action.amount), False), version)
+        if action.amount:
+            return _raised(table, i, _pay(seat, to_call + max(0, action.amount), False), version)
+    elif kind == "call":
+        paid = _pay(seat, to_call, True)
+        return _with(table, i, paid, table.pot + paid.current_bet - seat.current_bet, version)
+    elif kind == "fold":
+        return _with(table, i, Seat(seat.money, seat.current_bet, seat.hand, True, True), table.pot, version)
+    elif kind == ("hold" if action.human else "stand"):
+        if action.human and to_call > 0:
+            return table
+        return _with(table, i, Seat(seat.money, seat.current_bet, seat.hand, seat.folded, True),
+                     table.pot, version)
+    # Anything else changes nothing (but still counts as a human action)
+    return _table(table, table.seats, table.pot, version) if action.human else table
+
+
+def settle(table: Table, outcome: Optional[Tuple[str, Tuple]] = None) -> Table:
+    """
+    The table after the showdown: pot paid out (split on a tie), hand finished.
+
+    Args:
+        outcome: showdown(table), if the caller already has it
+    """
+    winner, _ = outcome or showdown(table)
+    seats = list(table.seats)
+    if winner != "tie":
+        i = WINNER_NAMES.index(winner)
+        seats[i] = seats[i]._replace(money=seats[i].money + table.pot)
+    else:
+        active = [i for i, seat in enumerate(seats) if seat is not None and not seat.folded]
+        for i in active:
+            seats[i] = seats[i]._replace(money=seats[i].money + table.pot // len(active))
+    return Table(tuple(seats), 0, "finished", winner, table.version)
+
+
+# ------------------- STATE DICT ADAPTER -------------------
+
+def table_from_state(state) -> Table:
+    """Table for a state dict (its seat objects and flags)."""
+    get = state.get
+    seats = tuple(None if obj is None else
+                  Seat(obj.money, obj.current_bet, tuple([card.id for card in obj.hand]),
+                       bool(obj.is_folded), bool(get(held_key, False)))
+                  for obj, held_key in ((get(key), held_key) for _, key, held_key in SEATS))
+    return Table(seats, state["pot"], state["status"], state["result"], get("version", 0))
+
+
+def sync_state(state, table: Table, previous: Optional[Table] = None):
+    """
+    Write a table into a state dict's seat objects and flags.
+
+    With `previous` (the table the state currently matches) only the
+    seats that changed are written.
+    """
+    for i, (_, key, held_key) in enumerate(SEATS):
+        seat = table.seats[i]
+        if seat is None or (previous is not None and previous.seats[i] is seat):
+            continue
+        obj = state[key]
+        obj.money = seat.money
+        obj.current_bet = seat.current_bet
+        obj.is_folded = seat.folded
+        if previous is None or previous.seats[i].hand != seat.hand:
+            obj.hand = cards(seat)
+        state[held_key] = seat.held
+    state.update({
+        "pot": table.pot,
+        "status": table.status,
+        "result": table.result,
+        "version": table.version,
+    })
+
@@ -0,0 +1,293 @@
+"""
+Durable table persistence
+
+Tables are stored the way hand_replay records hands: a hand is fully
+described by its deck seed, the stacks it started with and the accepted
+human actions with the bot decisions they triggered. The store keeps, per
+table,
+
+- a snapshot: one dealt hand (seed, stacks, version) plus the opponent
+  model as it was when the hand started, and
+- an action log after it: later deals and actions, in order.
+
+Writes go on a queue; a background thread commits them in batches (one
+transaction, and with synchronous=FULL one fsync, per batch), so requests
+never wait on disk. A crash loses at most the last commit interval.
+
+Every `snapshot_entries` log entries a table's next deal is written as a
+new snapshot, which also deletes the table's older log. On startup each
+table is rebuilt from its snapshot plus at most that many replayed
+entries, so recovery time is bounded by tables x snapshot_entries.
+"""
+
+import base64
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from game_flow import apply_player_action
+from hand_replay import SEATS, deal_hand, finish_recording, record_action
+from opponent_model import OpponentModel
+
+SNAPSHOT_VERSION = 1
+
+
+# ------------------- TABLE ENCODING -------------------
+
+def deal_entry(state) -> Dict:
+    """A freshly dealt hand: seed, starting stacks and the table version."""
+    return {
+        'seed': state["seed"],
+        'stacks': [state[key].money for key in SEATS if state.get(key) is not None],
+        'version': state.get("version", 0),
+    }
+
+
+def table_snapshot(state) -> Dict:
+    """Snapshot of a table at the start of a hand (right after dealing)."""
+    snapshot = dict(deal_entry(state), v=SNAPSHOT_VERSION)
+    model = state.get("opponent_model")
+    if model is not None:
+        snapshot['model'] = base64.b64encode(model.to_bytes()).decode("ascii")
+    return snapshot
+
+
+def _redeal(state, entry: Dict):
+    """Reset the seats to the entry's stacks and deal its hand again."""
+    seats = [state[key] for key in SEATS if state.get(key) is not None]
+    for seat, money in zip(seats, entry['stacks']):
+        seat.reset_for_new_round()
+        seat.money = money
+    state.update({
+        "pot": 0,
+        "player_held": False,
+        "opponent_held": False,
+        "gemini_held": False,
+        "status": "playing",
+        "result": None,
+        "version": entry['version'],
+    })
+    deal_hand(state, entry['seed'])
+
+
+def replay_entry(state, kind: str, entry: Dict) -> bool:
+    """
+    Apply one logged entry to a table.
+
+    Returns:
+        bool: False if a bot acted without a logged decision (the bot was
+        asked again, so the table may differ from the original)
+    """
+    if kind == "deal":
+        if state.get("opponent_model") is not None:
+            state["opponent_model"].start_hand()
+        _redeal(state, entry)
+        return True
+    decisions = {name: tuple(decision) for name, decision in entry['decisions'].items()}
+    apply_player_action(state, entry['action'], entry['amount'], decisions=decisions)
+    record_action(state, entry['action'], entry['amount'], decisions)
+    if state["status"] == "finished":
+        # The finished hand was already recorded before the restart
+        finish_recording(state)
+    return decisions.keys() == entry['decisions'].keys()
+
+
+def restore_table(snapshot: Dict, make_state: Callable[[], Dict]) -> Dict:
+    """Fresh table from make_state(), reset to a snapshot's hand and opponent model."""
+    if snapshot.get('v') != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported table snapshot version: {snapshot.get('v')}")
+    state = make_state()
+    if snapshot.get('model') is not None:
+        state["opponent_model"] = OpponentModel.from_bytes(base64.b64decode(snapshot['model']))
+    _redeal(state, snapshot)
+    return state
+
+
+# ------------------- STORE -------------------
+
+class TablePersistence:
+    """
+    Snapshot + action log of every table, group-committed to SQLite (WAL).
+    """
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS table_snapshots (
+            table_id TEXT PRIMARY KEY,
+            ts REAL NOT NULL,
+            data TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS table_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            data TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS table_log_table ON table_log (table_id, seq)",
+    )
+
+    def __init__(self, path: str, snapshot_entries: int = 64, commit_interval: float = 0.02,
+                 batch_size: int = 1000, synchronous: str = "FULL"):
+        """
+        Open (or create) the database and start the writer thread.
+
+        Args:
+            path: SQLite database file
+            snapshot_entries: Log entries per table before its next deal is snapshotted
+            commit_interval: Max seconds a write waits for its group commit
+            batch_size: Max writes per transaction
+            synchronous: SQLite synchronous mode (FULL fsyncs each group commit)
+        """
+        self.path = path
+        self.snapshot_entries = snapshot_entries
+        self.commit_interval = commit_interval
+        self.batch_size = batch_size
+        self.synchronous = synchronous
+        self._queue = queue.Queue()
+        self._since_snapshot: Dict[str, int] = {}
+        self.written = 0
+        self.commits = 0
+        self.snapshots = 0
+        self.recovery = None
+
+        conn = self._connect()
+        for statement in self.SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        conn.close()
+
+        self._stopped = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="table-persistence", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        return conn
+
+    # ------------------- WRITES -------------------
+
+    def log_deal(self, table_id: str, state, snapshot: bool = False):
+        """
+        Persist a newly dealt hand. Written as a snapshot for new tables,
+        when `snapshot` is set (e.g. a new game), or once the table's log is long.
+        """
+        since = self._since_snapshot.get(table_id)
+        if snapshot or since is None or since >= self.snapshot_entries:
+            self._since_snapshot[table_id] = 0
+            self._queue.put((table_id, "snapshot", table_snapshot(state)))
+        else:
+            self._since_snapshot[table_id] = since + 1
+            self._queue.put((table_id, "deal", deal_entry(state)))
+
+    def log_action(self, table_id: str, action: str, amount: int, decisions: Optional[Dict]):
+        """Persist an accepted human action and the bot decisions it triggered."""
+        self._since_snapshot[table_id] = self._since_snapshot.get(table_id, 0) + 1
+        entry = {'action': action, 'amount': amount, 'decisions': dict(decisions or {})}
+        self._queue.put((table_id, "action", entry))
+
+    def _run(self):
+        conn = self._connect()
+        while not (self._stopped.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            now = time.time()
+            for table_id, kind, entry in batch:
+                data = json.dumps(entry, separators=(",", ":"))
+                if kind == "snapshot":
+                    # The log before a snapshot is never replayed again
+                    conn.execute("DELETE FROM table_log WHERE table_id = ?", (table_id,))
+                    conn.execute("INSERT OR REPLACE INTO table_snapshots (table_id, ts, data) VALUES (?, ?, ?)",
+                                 (table_id, now, data))
+                    self.snapshots += 1
+                else:
+                    conn.execute("INSERT INTO table_log (table_id, kind, data) VALUES (?, ?, ?)",
+                                 (table_id, kind, data))
+            conn.commit()
+            self.commits += 1
+            self.written += len(batch)
+        conn.close()
+
+    def _next_batch(self) -> List:
+        """Wait for the first write, then take more until the batch is full or the interval passes."""
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.commit_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def close(self):
+        """Commit everything queued and stop the writer."""
+        self._stopped.set()
+        self._writer.join()
+
+    # ------------------- RECOVERY -------------------
+
+    def restore(self, make_state: Callable[[], Dict]) -> Dict[str, Dict]:
+        """
+        Rebuild every stored table: its snapshot, then its log replayed in order.
+
+        Args:
+            make_state: Builds a fresh table (bots included), as app.make_state
+
+        Returns:
+            dict: Table id -> table state
+        """
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            snapshots = conn.execute("SELECT table_id, data FROM table_snapshots").fetchall()
+            log = conn.execute("SELECT table_id, kind, data FROM table_log ORDER BY seq").fetchall()
+        finally:
+            conn.close()
+
+        entries: Dict[str, List] = {}
+        for table_id, kind, data in log:
+            entries.setdefault(table_id, []).append((kind, json.loads(data)))
+
+        tables = {}
+        replayed = 0
+        mismatches = 0
+        for table_id, data in snapshots:
+            state = restore_table(json.loads(data), make_state)
+            for kind, entry in entries.get(table_id, ()):
+                if not replay_entry(state, kind, entry):
+                    mismatches += 1
+                replayed += 1
+            tables[table_id] = state
+            self._since_snapshot[table_id] = len(entries.get(table_id, ()))
+
+        self.recovery = {
+            'tables': len(tables),
+            'entries_replayed': replayed,
+            'mismatches': mismatches,
+            'seconds': time.perf_counter() - started,
+        }
+        return tables
+
+    def stats(self) -> Dict:
+        return {
+            'written': self.written,
+            'commits': self.commits,
+            'avg_batch': self.written / self.commits if self.commits else 0.0,
+            'snapshots': self.snapshots,
+            'queued': self._queue.qsize(),
+            'recovery': self.recovery,
+        }
@@ -0,0 +1,277 @@
+"""
+Shared table state for multi-worker deployments
+
+With several gunicorn workers each process has its own TABLES, so a table
+only works if every request lands on the same worker. In shared mode
+(TABLE_STORE) a table lives in a TableStore as a versioned document and
+any worker can serve it:
+
+- the document is the table_persistence encoding of the current hand: its
+  snapshot (seed, stacks, opponent model at the deal) and the actions
+  taken since, so it stays small and is rebuilt by replay;
+- every write is a compare-and-set on the document's revision; a worker
+  whose read went stale re-reads, re-applies the request and tries again;
+- each worker caches the tables it served last and only re-reads the
+  document when the stored revision moved on;
+- the table's idempotency reply window (see idempotency) is stored with
+  the document, across hands, so a retry is recognized on any worker.
+
+Backends: SQLite (one file shared by the workers on a machine) and Redis,
+or a Redis-compatible server such as Valkey (needs the `redis` package).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Tuple
+
+from idempotency import ReplyWindow
+from table_persistence import replay_entry, restore_table, table_snapshot
+
+
+class TableConflict(Exception):
+    """Raised when a table kept changing under a request through every retry."""
+
+
+class TableStore(ABC):
+    """
+    Abstract store of versioned table documents.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def revision(self, table_id: str) -> int:
+        """Current revision of a table (0 if it does not exist)."""
+
+    @abstractmethod
+    def load(self, table_id: str) -> Optional[Tuple[int, Dict]]:
+        """(revision, document) or None if the table does not exist."""
+
+    @abstractmethod
+    def save(self, table_id: str, doc: Dict, expected: int) -> Optional[int]:
+        """
+        Write a document if the stored revision is still `expected` (0 creates).
+
+        Returns:
+            int|None: The new revision, or None if another writer got there first
+        """
+
+
+class SQLiteTableStore(TableStore):
+    """Tables in one SQLite file (WAL), shared by every worker process on the machine."""
+
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS shared_tables (
+            table_id TEXT PRIMARY KEY,
+            rev INTEGER NOT NULL,
+            data TEXT NOT NULL
+        )
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._conn().execute(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit: every statement is its own short transaction
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def revision(self, table_id: str) -> int:
+        row = self._conn().execute("SELECT rev FROM shared_tables WHERE table_id = ?", (table_id,)).fetchone()
+        return row[0] if row else 0
+
+    def load(self, table_id: str) -> Optional[Tuple[int, Dict]]:
+        row = self._conn().execute("SELECT rev, data FROM shared_tables WHERE table_id = ?",
+                                   (table_id,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def save(self, table_id: str, doc: Dict, expected: int) -> Optional[int]:
+        data = json.dumps(doc, separators=(",", ":"))
+        if expected == 0:
+            cur = self._conn().execute(
+                "INSERT OR IGNORE INTO shared_tables (table_id, rev, data) VALUES (?, 1, ?)", (table_id, data))
+        else:
+            cur = self._conn().execute(
+                "UPDATE shared_tables SET rev = rev + 1, data = ? WHERE table_id = ? AND rev = ?",
+                (data, table_id, expected))
+        return expected + 1 if cur.rowcount == 1 else None
+
+
+class RedisTableStore(TableStore):
+    """Tables as Redis hashes; the compare-and-set runs as one Lua script."""
+
+    name = "redis"
+
+    _CAS = """
+        local rev = tonumber(redis.call('HGET', KEYS[1], 'rev') or '0')
+        if rev ~= tonumber(ARGV[1]) then return 0 end
+        redis.call('HSET', KEYS[1], 'rev', rev + 1, 'data', ARGV[2])
+        return rev + 1
+    """
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", prefix: str = "poker:table:"):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._cas = self.client.register_script(self._CAS)
+
+    def revision(self, table_id: str) -> int:
+        rev = self.client.hget(self.prefix + table_id, "rev")
+        return int(rev) if rev is not None else 0
+
+    def load(self, table_id: str) -> Optional[Tuple[int, Dict]]:
+        rev, data = self.client.hmget(self.prefix + table_id, "rev", "data")
+        return (int(rev), json.loads(data)) if rev is not None else None
+
+    def save(self, table_id: str, doc: Dict, expected: int) -> Optional[int]:
+        rev = self._cas(keys=[self.prefix + table_id],
+                        args=[expected, json.dumps(doc, separators=(",", ":"))])
+        return int(rev) or None
+
+
+def create_table_store_from_env() -> Optional[TableStore]:
+    """
+    Build the shared store from TABLE_STORE, or None for per-process tables.
+
+    TABLE_STORE: "sqlite:PATH" or a redis:// URL
+    """
+    spec = os.environ.get("TABLE_STORE")
+    if not spec:
+        return None
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisTableStore(spec)
+    if spec.startswith("sqlite:"):
+        return SQLiteTableStore(spec[len("sqlite:"):])
+    raise ValueError(f"Unknown TABLE_STORE: {spec}")
+
+
+# ------------------- SHARED TABLES -------------------
+
+class SharedTables:
+    """
+    Read-modify-write of tables in a TableStore, with a per-worker cache.
+    """
+
+    def __init__(self, store: TableStore, make_state: Callable[[], Dict],
+                 tables: Optional[Dict] = None, retries: int = 5):
+        """
+        Args:
+            store: Backend holding the table documents
+            make_state: Builds a fresh table (bots included), as app.make_state
+            tables: Dict used as this worker's cache of table states (e.g. app.TABLES)
+            retries: Attempts per request before TableConflict
+        """
+        self.store = store
+        self.make_state = make_state
+        self.tables = {} if tables is None else tables
+        self.retries = retries
+        self._docs: Dict[str, Tuple[int, Dict]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.cache_hits = 0
+        self.rebuilds = 0
+        self.commits = 0
+        self.conflicts = 0
+
+    def _lock(self, table_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(table_id, threading.Lock())
+
+    def _create(self, table_id: str):
+        """Store a brand-new table unless another worker just created it."""
+        state = self.make_state()
+        doc = {'snapshot': table_snapshot(state), 'actions': []}
+        if self.store.save(table_id, doc, 0) is None:
+            return None
+        self.tables[table_id] = state
+        self._docs[table_id] = (1, doc)
+        return 1, state, doc
+
+    def _checkout(self, table_id: str, create: bool):
+        """(revision, state, document) for the table's latest stored revision."""
+        cached = self._docs.get(table_id)
+        if cached is not None and table_id in self.tables and self.store.revision(table_id) == cached[0]:
+            self.cache_hits += 1
+            return cached[0], self.tables[table_id], cached[1]
+        loaded = self.store.load(table_id)
+        if loaded is None:
+            created = self._create(table_id) if create else None
+            if created is not None:
+                return created
+            loaded = self.store.load(table_id)
+            if loaded is None:
+                return 0, None, None
+        rev, doc = loaded
+        state = restore_table(doc['snapshot'], self.make_state)
+        for entry in doc['actions']:
+            replay_entry(state, "action", entry)
+        if doc.get('replies'):
+            state["replies"] = ReplyWindow.from_list(doc['replies'], len(doc['replies']))
+        self.rebuilds += 1
+        self.tables[table_id] = state
+        self._docs[table_id] = (rev, doc)
+        return rev, state, doc
+
+    def _forget(self, table_id: str):
+        self._docs.pop(table_id, None)
+        self.tables.pop(table_id, None)
+
+    def transact(self, table_id: str, fn: Callable, create: bool = True):
+        """
+        Run `fn(state)` on the latest version of a table and store the result.
+
+        `fn` returns (result, change, state): change is None (nothing to
+        store), ("deal", None) for a freshly dealt hand or ("action", entry)
+        for an accepted action; state is the table afterwards (it may be a
+        new one). A missing table is created first, or passed as None when
+        `create` is false. On a conflicting write the request is re-applied
+        to the newer revision, so `fn` must not have side effects outside
+        the state.
+
+        Returns:
+            tuple: (result, state) of the successful attempt
+        """
+        with self._lock(table_id):
+            for _ in range(self.retries):
+                rev, state, doc = self._checkout(table_id, create)
+                result, change, state = fn(state)
+                if change is None:
+                    return result, state
+                kind, entry = change
+                if kind == "deal":
+                    new_doc = {'snapshot': table_snapshot(state), 'actions': []}
+                else:
+                    new_doc = {'snapshot': doc['snapshot'], 'actions': doc['actions'] + [entry]}
+                if state.get("replies"):
+                    new_doc['replies'] = state["replies"].to_list()
+                new_rev = self.store.save(table_id, new_doc, rev)
+                if new_rev is not None:
+                    self.commits += 1
+                    self.tables[table_id] = state
+                    self._docs[table_id] = (new_rev, new_doc)
+                    return result, state
+                # Another worker wrote first; our copy is stale (and was mutated)
+                self.conflicts += 1
+                self._forget(table_id)
+        raise TableConflict(f"Table {table_id} changed concurrently {self.retries} times")
+
+    def stats(self) -> Dict:
+        return {
+            'store': self.store.name,
+            'cache_hits': self.cache_hits,
+            'rebuilds': self.rebuilds,
+            'commits': self.commits,
+            'conflicts': self.conflicts,
+        }
@@ -0,0 +1,335 @@
+"""
+Multi-table bot tournaments
+
+Players start with equal stacks at tables of up to three seats (the game's
+seats). Every hand posts the current level's ante plus a small and big
+blind, rotating with the button; players are eliminated when they bust,
+and the field is rebalanced as it shrinks:
+
+- a table is broken, and its players moved to the shortest tables, as
+  soon as the remaining players fit on one table fewer;
+- otherwise a player moves from a longest to a shortest table whenever
+  their sizes differ by more than one.
+
+The tournament is a discrete-event simulation on a simulated clock: a
+heap holds each table's next hand and the next blind level, and the loop
+pops and handles the earliest event. Hands take a jittered number of
+simulated seconds, so tables drift apart as they would in a real room;
+a moved player simply sits in on their new table's next hand. Everything
+is single-threaded and deterministic for a seed.
+
+Usage:
+    python tournament.py --players 3000 --bots base --seed 1
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from arena import SEATS, make_bot, run_hand
+from game_logic import create_card
+
+MAX_SEATS = len(SEATS)
+
+
+def default_blind_schedule(levels: int = 30) -> List[Tuple[int, int, int]]:
+    """(small blind, big blind, ante) per level: a standard opening, then +50% a level."""
+    schedule = [(10, 20, 0), (15, 30, 0), (25, 50, 5), (50, 100, 10), (75, 150, 15), (100, 200, 25)]
+    while len(schedule) < levels:
+        small, big, ante = schedule[-1]
+        schedule.append((small * 3 // 2, big * 3 // 2, ante * 3 // 2))
+    return schedule[:levels]
+
+
+class Table:
+    """One table: its players (by id), button and counters."""
+
+    __slots__ = ("id", "players", "button", "hands", "opened", "closed")
+
+    def __init__(self, table_id: int, players: List[int], opened: float):
+        self.id = table_id
+        self.players = players
+        self.button = 0
+        self.hands = 0
+        self.opened = opened
+        self.closed = None
+
+
+class Tournament:
+    """
+    Event-driven multi-table tournament of bots.
+    """
+
+    def __init__(self, players: int = 300, bots: Sequence[str] = ("base",), seats: int = MAX_SEATS,
+                 starting_stack: int = 1500, schedule: Optional[Sequence[Tuple[int, int, int]]] = None,
+                 level_seconds: float = 600.0, hand_seconds: float = 60.0, seed: int = 0):
+        """
+        Args:
+            players: Entrants
+            bots: Bot specs (see arena.make_bot), assigned to entrants round-robin
+            seats: Seats per table (2 or 3)
+            starting_stack: Chips per entrant
+            schedule: (small blind, big blind, ante) per level; the last level repeats
+            level_seconds: Simulated seconds per blind level
+            hand_seconds: Average simulated seconds per hand
+            seed: Seed for the cards, hand lengths and bot decisions
+        """
+        if not 2 <= seats <= MAX_SEATS:
+            raise ValueError(f"seats must be between 2 and {MAX_SEATS}")
+        if players < 2:
+            raise ValueError("A tournament needs at least 2 players")
+        self.seats = seats
+        self.schedule = list(schedule or default_blind_schedule())
+        self.level_seconds = level_seconds
+        self.hand_seconds = hand_seconds
+        self.rng = random.Random(seed)
+
+        self.bots = [make_bot(spec, f"{spec}#{i}")
+                     for i, spec in zip(range(players), itertools.cycle(bots))]
+        self.stacks = [starting_stack] * players
+        self.specs = [spec for _, spec in zip(range(players), itertools.cycle(bots))]
+        self.alive = players
+        self.finish_order: List[Dict] = []  # busted players, first out first
+
+        self.clock = 0.0
+        self.level = 0
+        self.hands = 0
+        self.timeline: List[Dict] = []
+        self._events = []
+        self._seq = itertools.count()
+
+        # Seat players at random over the fewest tables, sizes within one of each other
+        order = list(range(players))
+        self.rng.shuffle(order)
+        count = math.ceil(players / seats)
+        self.tables: Dict[int, Table] = {}
+        self.all_tables: List[Table] = []
+        self._table_ids = itertools.count()
+        for i in range(count):
+            self._open_table(order[i::count])
+        self._schedule(level_seconds, "level", None)
+        self._mark("start")
+
+    # ------------------- EVENTS -------------------
+
+    def _schedule(self, at: float, kind: str, table_id: Optional[int]):
+        heapq.heappush(self._events, (at, next(self._seq), kind, table_id))
+
+    def _schedule_hand(self, table: Table):
+        self._schedule(self.clock + self.hand_seconds * self.rng.uniform(0.5, 1.5), "hand", table.id)
+
+    def _open_table(self, players: List[int]) -> Table:
+        table = Table(next(self._table_ids), players, self.clock)
+        self.tables[table.id] = table
+        self.all_tables.append(table)
+        self._schedule_hand(table)
+        return table
+
+    def _mark(self, event: str, **extra):
+        """Add a progress point to the timeline."""
+        small, big, ante = self.blinds()
+        self.timeline.append(dict({
+            'event': event,
+            'clock': self.clock,
+            'level': self.level + 1,
+            'blinds': [small, big, ante],
+            'players': self.alive,
+            'tables': len(self.tables),
+            'hands': self.hands,
+            'avg_stack': sum(self.stacks) / max(1, self.alive),
+        }, **extra))
+
+    def blinds(self) -> Tuple[int, int, int]:
+        return self.schedule[min(self.level, len(self.schedule) - 1)]
+
+    @property
+    def finished(self) -> bool:
+        return self.alive <= 1
+
+    def step(self) -> bool:
+        """Handle the next event; returns False once the tournament is over."""
+        if self.finished or not self._events:
+            return False
+        self.clock, _, kind, table_id = heapq.heappop(self._events)
+        if kind == "level":
+            self.level += 1
+            self._schedule(self.clock + self.level_seconds, "level", None)
+            self._mark("level")
+        else:
+            table = self.tables.get(table_id)
+            # Hands still queued for a broken table are dropped
+            if table is not None:
+                self._play_hand(table)
+        return not self.finished
+
+    def run(self, max_hands: Optional[int] = None, on_event: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Play until one player is left (or `max_hands` hands).
+
+        Args:
+            max_hands: Hand limit over all tables
+            on_event: Called with each new timeline entry as it happens
+
+        Returns:
+            dict: The report (see report())
+        """
+        started = time.perf_counter()
+        reported = len(self.timeline)
+        while self.step():
+            if on_event:
+                while reported < len(self.timeline):
+                    on_event(self.timeline[reported])
+                    reported += 1
+            if max_hands is not None and self.hands >= max_hands:
+                break
+        if self.finished:
+            self._mark("finish", winner=self.winner())
+        if on_event:
+            for entry in self.timeline[reported:]:
+                on_event(entry)
+        return self.report(time.perf_counter() - started)
+
+    # ------------------- HANDS -------------------
+
+    def _play_hand(self, table: Table):
+        players = table.players
+        n = len(players)
+        if n < 2:
+            # A lone player (an odd field at two-seat tables) sits out until the field changes
+            self._schedule_hand(table)
+            return
+        # Seat order starts after the button: seat 0 posts the small blind, seat 1 the big
+        order = players[table.button + 1:] + players[:table.button + 1]
+        small, big, ante = self.blinds()
+        ids = self.rng.sample(range(1, 53), 5 * n)
+        hands = [[create_card(c) for c in ids[i * 5:(i + 1) * 5]] for i in range(n)]
+        bots = [self.bots[p] for p in order]
+        run_hand(bots, hands, self.rng.getrandbits(32), [self.stacks[p] for p in order], ante,
+                 [small, big] + [0] * (n - 2))
+        for p, bot in zip(order, bots):
+            self.stacks[p] = bot.money
+        table.hands += 1
+        self.hands += 1
+
+        busted = [p for p in order if self.stacks[p] <= 0]
+        for p in busted:
+            players.remove(p)
+            self.alive -= 1
+            self.finish_order.append({'player': p, 'bot': self.specs[p], 'place': self.alive + 1,
+                                      'clock': self.clock, 'hand': self.hands})
+        table.button = (table.button + 1) % len(players) if players else 0
+        if busted:
+            self._rebalance(table)
+        if table.id in self.tables and not self.finished:
+            self._schedule_hand(table)
+
+    # ------------------- BALANCING -------------------
+
+    def _move(self, player: int, source: Table, target: Table):
+        source.players.remove(player)
+        target.players.append(player)
+        if source.button >= len(source.players):
+            source.button = 0
+
+    def _close_table(self, table: Table):
+        table.closed = self.clock
+        del self.tables[table.id]
+
+    def _rebalance(self, table: Table):
+        """Break and balance tables after `table` lost players."""
+        if self.finished:
+            return
+        while len(self.tables) > math.ceil(self.alive / self.seats):
+            # Break the shortest table, preferring the one that just lost players
+            broken = min(self.tables.values(), key=lambda t: (len(t.players), t is not table))
+            self._close_table(broken)
+            for player in broken.players:
+                min(self.tables.values(), key=lambda t: len(t.players)).players.append(player)
+            self._mark("table_broken", table=broken.id)
+        while True:
+            shortest = min(self.tables.values(), key=lambda t: len(t.players))
+            longest = max(self.tables.values(), key=lambda t: len(t.players))
+            if len(longest.players) - len(shortest.players) <= 1:
+                return
+            # The player about to be big blind at the long table moves
+            self._move(longest.players[(longest.button + 2) % len(longest.players)], longest, shortest)
+
+    # ------------------- REPORTING -------------------
+
+    def winner(self) -> Optional[Dict]:
+        if not self.finished:
+            return None
+        p = next(p for t in self.tables.values() for p in t.players)
+        return {'player': p, 'bot': self.specs[p], 'stack': self.stacks[p]}
+
+    def report(self, wall_seconds: float = 0.0) -> Dict:
+        """
+        Tournament summary.
+
+        Returns:
+            dict: hands, simulated and wall time, hands per wall second, the
+            winner, the final places and per-table throughput (hands, lifetime
+            and hands per simulated hour)
+        """
+        tables = []
+        for t in self.all_tables:
+            lifetime = (t.closed if t.closed is not None else self.clock) - t.opened
+            tables.append({
+                'table': t.id,
+                'hands': t.hands,
+                'open_seconds': lifetime,
+                'hands_per_hour': t.hands / lifetime * 3600 if lifetime else 0.0,
+            })
+        by_bot = {}
+        winner = self.winner()
+        for entry in self.finish_order + ([dict(winner, place=1)] if winner else []):
+            by_bot.setdefault(entry['bot'], []).append(entry['place'])
+        return {
+            'players': len(self.bots),
+            'finished': self.finished,
+            'hands': self.hands,
+            'levels': self.level + 1,
+            'clock_seconds': self.clock,
+            'wall_seconds': wall_seconds,
+            'hands_per_second': self.hands / wall_seconds if wall_seconds else None,
+            'winner': winner,
+            'avg_place_by_bot': {bot: sum(places) / len(places) for bot, places in by_bot.items()},
+            'tables': tables,
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate a multi-table bot tournament")
+    parser.add_argument("--players", type=int, default=300)
+    parser.add_argument("--bots", nargs="+", default=["base"], help="bot specs, assigned round-robin")
+    parser.add_argument("--seats", type=int, default=MAX_SEATS, help="seats per table (2 or 3)")
+    parser.add_argument("--stack", type=int, default=1500, help="starting stack")
+    parser.add_argument("--level-minutes", type=float, default=10.0, help="simulated minutes per blind level")
+    parser.add_argument("--hand-seconds", type=float, default=60.0, help="average simulated seconds per hand")
+    parser.add_argument("--max-hands", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tables", action="store_true", help="include per-table throughput in the report")
+    args = parser.parse_args()
+
+    tournament = Tournament(args.players, args.bots, args.seats, args.stack,
+                            level_seconds=args.level_minutes * 60, hand_seconds=args.hand_seconds,
+                            seed=args.seed)
+
+    def emit(entry):
+        print(json.dumps(entry), flush=True)
+
+    report = tournament.run(args.max_hands, on_event=emit)
+    if not args.tables:
+        tables = report.pop('tables')
+        report['table_hands'] = {'tables': len(tables), 'max': max(t['hands'] for t in tables),
+                                 'mean': sum(t['hands'] for t in tables) / len(tables)}
+    print(json.dumps(report), flush=True)
+    print(f"{report['hands']} hands in {report['wall_seconds']:.2f}s "
+          f"({report['hands_per_second'] or 0:.0f} hands/s), {len(tournament.timeline)} timeline events",
+          file=sys.stderr)
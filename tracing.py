@@ -0,0 +1,399 @@
+"""
+Lightweight tracing spans
+
+Spans mark the stages of a request (route -> bot turns -> bot decision ->
+prompt / LLM call / parse -> showdown -> serialization). They nest through
+a context variable, so every span knows its trace and parent. Finished
+spans are:
+
+- aggregated per name (count and latency percentiles, see stats()), and
+- for sampled traces, exported by a background thread as JSON lines or a
+  Chrome trace-event file (open in chrome://tracing or ui.perfetto.dev).
+
+No collector is needed. Configure with TRACE_EXPORT=jsonl|chrome,
+TRACE_PATH and TRACE_SAMPLE (fraction of traces exported). With
+TRACE_EXPORT unset, span() returns a shared no-op and traced functions
+pay one flag check.
+
+    python tracing.py trace.jsonl                # stages dominating the slowest traces
+    python tracing.py trace.jsonl --hand SEED    # one hand's requests and critical paths
+"""
+
+import argparse
+import atexit
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed stage; attributes can be added while it is open with set()."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "end",
+                 "attrs", "thread_id", "sampled")
+
+    def __init__(self, name: str, trace_id: int, span_id: int, parent_id: Optional[int],
+                 attrs: Dict, sampled: bool):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.sampled = sampled
+        self.thread_id = threading.get_ident()
+        self.start = time.perf_counter()
+        self.end = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'trace_id': f"{self.trace_id:016x}",
+            'span_id': f"{self.span_id:016x}",
+            'parent_id': f"{self.parent_id:016x}" if self.parent_id is not None else None,
+            'start_us': self.start * 1e6,
+            'duration_us': self.duration * 1e6,
+            'thread': self.thread_id,
+            'attrs': self.attrs,
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is off: supports the same calls and does nothing."""
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "name", "attrs", "span", "token")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> Span:
+        parent = _current_span.get()
+        tracer = self.tracer
+        if parent is None:
+            trace_id = tracer._new_id()
+            sampled = tracer.sample_rate >= 1.0 or tracer._rng.random() < tracer.sample_rate
+            parent_id = None
+        else:
+            trace_id, sampled, parent_id = parent.trace_id, parent.sampled, parent.span_id
+        self.span = Span(self.name, trace_id, tracer._new_id(), parent_id, self.attrs, sampled)
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        span = self.span
+        span.end = time.perf_counter()
+        _current_span.reset(self.token)
+        if exc_type is not None:
+            span.attrs['error'] = exc_type.__name__
+        self.tracer._finish(span)
+        return False
+
+
+# ------------------- EXPORTERS -------------------
+
+class _BackgroundExporter:
+    """Queues finished spans and writes them from a daemon thread."""
+
+    def __init__(self, path: str, max_queue: int = 100000):
+        self.path = path
+        self.exported = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._file = open(path, "a")
+        self._writer = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._writer.start()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            span = self._queue.get()
+            if span is None:
+                break
+            self._write(span)
+            self.exported += 1
+            if self._queue.empty():
+                self._file.flush()
+        self._file.flush()
+
+    def _write(self, span: Span):
+        raise NotImplementedError
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+
+
+class JsonLinesExporter(_BackgroundExporter):
+    """One JSON object per span (see Span.to_dict)."""
+
+    def _write(self, span: Span):
+        self._file.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class ChromeTraceExporter(_BackgroundExporter):
+    """
+    Chrome trace-event format ("X" complete events). The JSON array is left
+    open, which the trace viewers accept, so the file can grow while running.
+    """
+
+    def __init__(self, path: str, max_queue: int = 100000):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        super().__init__(path, max_queue)
+        if new_file:
+            self._file.write("[\n")
+
+    def _write(self, span: Span):
+        event = {
+            'name': span.name,
+            'ph': 'X',
+            'ts': span.start * 1e6,
+            'dur': span.duration * 1e6,
+            'pid': os.getpid(),
+            'tid': span.thread_id,
+            'args': dict(span.attrs, trace_id=f"{span.trace_id:016x}"),
+        }
+        self._file.write(json.dumps(event, default=str) + ",\n")
+
+
+# ------------------- TRACER -------------------
+
+class Tracer:
+    """
+    Creates spans, keeps per-name latency samples and hands sampled spans to an exporter.
+    """
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0, enabled: bool = False,
+                 reservoir: int = 2048, seed: Optional[int] = None):
+        """
+        Args:
+            exporter: Optional JsonLinesExporter / ChromeTraceExporter
+            sample_rate: Fraction of traces (root spans) exported
+            enabled: Record spans even without an exporter (stats only)
+            reservoir: Recent durations kept per span name for percentiles
+            seed: Optional seed for trace sampling
+        """
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.enabled = enabled or exporter is not None
+        self._rng = random.Random(seed)
+        self._ids = random.Random(seed)
+        self._lock = threading.Lock()
+        self._durations = defaultdict(lambda: deque(maxlen=reservoir))
+        self._counts = defaultdict(int)
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """TRACE_EXPORT (jsonl|chrome), TRACE_PATH, TRACE_SAMPLE; TRACE_STATS=1 keeps stats without exporting."""
+        kind = os.environ.get("TRACE_EXPORT", "").lower()
+        exporter = None
+        if kind == "jsonl":
+            exporter = JsonLinesExporter(os.environ.get("TRACE_PATH", "trace.jsonl"))
+        elif kind == "chrome":
+            exporter = ChromeTraceExporter(os.environ.get("TRACE_PATH", "trace.json"))
+        elif kind:
+            raise ValueError(f"Unknown TRACE_EXPORT: {kind}")
+        return cls(exporter, sample_rate=float(os.environ.get("TRACE_SAMPLE", 1.0)),
+                   enabled=os.environ.get("TRACE_STATS") == "1")
+
+    def _new_id(self) -> int:
+        return self._ids.getrandbits(64)
+
+    def span(self, name: str, **attrs):
+        """Context manager timing a stage; yields the Span (or a no-op when disabled)."""
+        if not self.enabled:
+            return _NOOP
+        return _SpanContext(self, name, attrs)
+
+    def traced(self, name: Optional[str] = None):
+        """Decorator wrapping every call of a function in a span."""
+        def decorate(fn):
+            span_name = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _SpanContext(self, span_name, {}):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    @staticmethod
+    def current_span():
+        return _current_span.get() or _NOOP
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self._durations[span.name].append(span.duration)
+            self._counts[span.name] += 1
+        if span.sampled and self.exporter is not None:
+            self.exporter.export(span)
+
+    def stats(self) -> Dict:
+        """Per span name: count and p50 / p95 / p99 / max in ms over recent spans."""
+        with self._lock:
+            snapshot = {name: sorted(d) for name, d in self._durations.items()}
+            counts = dict(self._counts)
+        result = {}
+        for name, durations in snapshot.items():
+            n = len(durations)
+            result[name] = {
+                'count': counts[name],
+                'p50_ms': durations[n // 2] * 1000.0,
+                'p95_ms': durations[min(n - 1, int(n * 0.95))] * 1000.0,
+                'p99_ms': durations[min(n - 1, int(n * 0.99))] * 1000.0,
+                'max_ms': durations[-1] * 1000.0,
+            }
+        if self.exporter is not None:
+            result['_exporter'] = {'path': self.exporter.path, 'exported': self.exporter.exported,
+                                   'dropped': self.exporter.dropped}
+        return result
+
+    def close(self):
+        if self.exporter is not None:
+            self.exporter.close()
+            self.exporter = None
+
+
+TRACER = Tracer.from_env()
+atexit.register(TRACER.close)
+span = TRACER.span
+traced = TRACER.traced
+
+
+# ------------------- ANALYSIS -------------------
+
+def critical_path(spans: List[Dict]) -> List[Dict]:
+    """
+    Critical path of one trace: from the root, repeatedly descend into the
+    longest child. Request handling is sequential, so this is the chain of
+    stages bounding the request's latency. Each entry carries the span's
+    self time (duration minus its children).
+    """
+    children = defaultdict(list)
+    root = None
+    for s in spans:
+        if s['parent_id'] is None:
+            root = s
+        else:
+            children[s['parent_id']].append(s)
+    path = []
+    node = root
+    while node is not None:
+        kids = children.get(node['span_id'])
+        nxt = max(kids, key=lambda k: k['duration_us']) if kids else None
+        child_time = sum(k['duration_us'] for k in kids) if kids else 0.0
+        path.append({'name': node['name'], 'duration_us': node['duration_us'],
+                     'self_us': max(0.0, node['duration_us'] - child_time)})
+        node = nxt
+    return path
+
+
+def load_traces(path: str) -> Dict[str, List[Dict]]:
+    """Spans of a JSON-lines trace file, grouped by trace id."""
+    traces = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                s = json.loads(line)
+                traces[s['trace_id']].append(s)
+    return traces
+
+
+def hand_timeline(path: str, hand) -> List[Dict]:
+    """Every traced request of one hand (root attribute `hand`), in order, with its critical path."""
+    timeline = []
+    for trace_id, spans in load_traces(path).items():
+        root = next((s for s in spans if s['parent_id'] is None), None)
+        if root is not None and str(root['attrs'].get('hand')) == str(hand):
+            timeline.append({'trace_id': trace_id, 'start_us': root['start_us'],
+                             'attrs': root['attrs'], 'critical_path': critical_path(spans)})
+    timeline.sort(key=lambda t: t['start_us'])
+    return timeline
+
+
+def summarize(path: str, slowest: float = 0.05) -> Dict:
+    """
+    Load a JSON-lines trace and report which stages dominate the slowest traces.
+
+    Args:
+        path: File written by JsonLinesExporter
+        slowest: Fraction of traces (by root duration) to analyze
+    """
+    traces = load_traces(path)
+    roots = []
+    for trace_id, spans in traces.items():
+        root = next((s for s in spans if s['parent_id'] is None), None)
+        if root is not None:
+            roots.append((root['duration_us'], trace_id))
+    roots.sort(reverse=True)
+    tail = roots[:max(1, int(len(roots) * slowest))] if roots else []
+
+    self_time = defaultdict(float)
+    total = 0.0
+    for duration, trace_id in tail:
+        total += duration
+        spans = traces[trace_id]
+        children_time = defaultdict(float)
+        for s in spans:
+            if s['parent_id'] is not None:
+                children_time[s['parent_id']] += s['duration_us']
+        for s in spans:
+            self_time[s['name']] += max(0.0, s['duration_us'] - children_time[s['span_id']])
+    share = {name: t / total for name, t in sorted(self_time.items(), key=lambda kv: -kv[1])} if total else {}
+    return {
+        'traces': len(roots),
+        'analyzed': len(tail),
+        'tail_threshold_ms': tail[-1][0] / 1000.0 if tail else None,
+        'self_time_share': share,
+        'slowest_critical_path': critical_path(traces[tail[0][1]]) if tail else [],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Summarize a JSON-lines trace")
+    parser.add_argument("trace", help="file written with TRACE_EXPORT=jsonl")
+    parser.add_argument("--slowest", type=float, default=0.05, help="fraction of slowest traces to analyze")
+    parser.add_argument("--hand", default=None, help="print the timeline of one hand (its seed) instead")
+    args = parser.parse_args()
+    if args.hand is not None:
+        print(json.dumps(hand_timeline(args.trace, args.hand), indent=2))
+    else:
+        print(json.dumps(summarize(args.trace, args.slowest), indent=2))
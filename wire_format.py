@@ -0,0 +1,151 @@
+"""
+Wire formats for /api/* responses
+
+Clients pick the encoding with the Accept header:
+
+- application/json (default): serialize_state's verbose objects, with a
+  rank, suit and image URL per card.
+- COMPACT_MEDIA_TYPE: a versioned positional array with card ids
+  (1-52, 0 = hidden); the client rebuilds ranks, suits and image URLs:
+
+      [1, pot, status, result, winner_preview, version,
+       player, opponent, gemini_bot or null]
+      seat = [money, current_bet, held (0/1), [card ids], best hand, best rank]
+
+Independently, responses of at least `min_size` bytes are compressed with
+brotli (if the package is installed) or gzip, per Accept-Encoding.
+"""
+
+import gzip
+import json
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from game_flow import evaluate_winner
+from tracing import traced
+
+COMPACT_VERSION = 1
+COMPACT_MEDIA_TYPE = "application/vnd.poker.compact+json"
+SEAT_KEYS = (("player", "player_held"), ("opponent", "opponent_held"), ("gemini_bot", "gemini_held"))
+
+
+# ------------------- COMPACT ENCODING -------------------
+
+def _seat(seat, held: bool, hidden: bool, best) -> List:
+    cards = [0 if hidden else card.id for card in seat.hand]
+    return [seat.money, seat.current_bet, int(bool(held)), cards,
+            best[0] if best else "—", best[1] if best else 0]
+
+
+@traced()
+def compact_state(state, reveal_opponent: bool = False) -> List:
+    """Same content as app.serialize_state in the compact positional layout."""
+    seats = [state.get(key) for key, _ in SEAT_KEYS]
+    if all(seat is None or len(seat.hand) == 5 for seat in seats):
+        winner, *bests = evaluate_winner(state)
+    else:
+        winner, bests = None, [None, None, None]
+    encoded = [COMPACT_VERSION, state["pot"], state["status"], state["result"], winner,
+               state.get("version", 0)]
+    for i, ((key, held_key), seat) in enumerate(zip(SEAT_KEYS, seats)):
+        if seat is None:
+            encoded.append(None)
+            continue
+        encoded.append(_seat(seat, state.get(held_key, False), i > 0 and not reveal_opponent, bests[i]))
+    return encoded
+
+
+def dumps_compact(payload) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# ------------------- NEGOTIATION -------------------
+
+def _accepted(header: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept / Accept-Encoding header into {value: q}."""
+    accepted = {}
+    for part in (header or "").split(","):
+        value, *params = [p.strip() for p in part.split(";")]
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[value.lower()] = q
+    return accepted
+
+
+def wants_compact(accept: Optional[str]) -> bool:
+    """True if the client prefers the compact encoding over plain JSON."""
+    accepted = _accepted(accept)
+    compact = accepted.get(COMPACT_MEDIA_TYPE, 0.0)
+    return compact > 0 and compact >= accepted.get("application/json", 0.0)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported content coding ('br' or 'gzip') the client accepts, or None."""
+    accepted = _accepted(accept_encoding)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda c: accepted.get(c, accepted.get("*", 0.0)))
+    return best if accepted.get(best, accepted.get("*", 0.0)) > 0 else None
+
+
+def add_vary(response, header: str):
+    """Add a header name to Vary (plain header access; response.vary is slow to update)."""
+    vary = response.headers.get("Vary")
+    response.headers["Vary"] = f"{vary}, {header}" if vary else header
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=5)
+
+
+class ResponseCompressor:
+    """after_request hook compressing large /api/* responses per Accept-Encoding."""
+
+    def __init__(self, min_size: int = 512, prefix: str = "/api/"):
+        self.min_size = min_size
+        self.prefix = prefix
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def install(self, app):
+        app.after_request(self._after)
+
+    def _after(self, response):
+        from flask import request
+        add_vary(response, "Accept-Encoding")
+        if (not request.path.startswith(self.prefix) or response.is_streamed
+                or response.direct_passthrough or "Content-Encoding" in response.headers):
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return response
+        compressed = compress(body, encoding)
+        self.compressed += 1
+        self.bytes_in += len(body)
+        self.bytes_out += len(compressed)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def stats(self) -> Dict:
+        return {
+            'min_size': self.min_size,
+            'compressed': self.compressed,
+            'ratio': self.bytes_out / self.bytes_in if self.bytes_in else None,
+        }